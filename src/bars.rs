@@ -0,0 +1,213 @@
+//! Tick-to-bar aggregation
+//!
+//! Bins trades into OHLCV bars in a single pass. The period key of each trade
+//! is given by `TimeFrame.unify_many()`, and a bar begins wherever the key
+//! changes, the same as `cum_append()`. Trades of the same timestamp are all
+//! cumulated, because they are different trades rather than updates.
+//!
+//! Extremes propagate NaN and volumes are summed from left to right, the same
+//! as `np.maximum.reduceat` and `np.add.reduceat`.
+//!
+//! The keys of volume, dollar and tick bars are the count of thresholds which
+//! the running sum of the measure of the rows has reached before each row.
+//! The running sum is added from left to right, the same as `np.cumsum`, so
+//! that the keys do not depend on how the rows are split into calls.
+
+use pyo3::prelude::*;
+use pyo3::exceptions::PyValueError;
+use numpy::{IntoPyArray, PyArray1, PyReadonlyArray1};
+use ndarray::ArrayView1;
+
+/// The bars of trades, of which `starts[i]` is the index of the first trade
+/// of bar `i`
+#[derive(Debug, Default, PartialEq)]
+pub struct Bars {
+    pub starts: Vec<i64>,
+    pub open: Vec<f64>,
+    pub high: Vec<f64>,
+    pub low: Vec<f64>,
+    pub close: Vec<f64>,
+    pub volume: Vec<f64>,
+}
+
+#[inline]
+fn nan_max(a: f64, b: f64) -> f64 {
+    if a.is_nan() || b.is_nan() { f64::NAN } else { a.max(b) }
+}
+
+#[inline]
+fn nan_min(a: f64, b: f64) -> f64 {
+    if a.is_nan() || b.is_nan() { f64::NAN } else { a.min(b) }
+}
+
+pub fn aggregate(
+    keys: ArrayView1<i64>,
+    price: ArrayView1<f64>,
+    size: ArrayView1<f64>,
+) -> Bars {
+    let mut bars = Bars::default();
+    let mut last_key: Option<i64> = None;
+
+    for ((i, &key), (&p, &s)) in keys.iter().enumerate().zip(price.iter().zip(size.iter())) {
+        if last_key != Some(key) {
+            last_key = Some(key);
+
+            bars.starts.push(i as i64);
+            bars.open.push(p);
+            bars.high.push(p);
+            bars.low.push(p);
+            bars.close.push(p);
+            bars.volume.push(s);
+            continue;
+        }
+
+        let j = bars.starts.len() - 1;
+
+        bars.high[j] = nan_max(bars.high[j], p);
+        bars.low[j] = nan_min(bars.low[j], p);
+        bars.close[j] = p;
+        bars.volume[j] += s;
+    }
+
+    bars
+}
+
+type BarArrays<'py> = (
+    Bound<'py, PyArray1<i64>>,
+    Bound<'py, PyArray1<f64>>,
+    Bound<'py, PyArray1<f64>>,
+    Bound<'py, PyArray1<f64>>,
+    Bound<'py, PyArray1<f64>>,
+    Bound<'py, PyArray1<f64>>,
+);
+
+/// Aggregates trades into bars
+///
+/// Returns (starts, open, high, low, close, volume)
+#[pyfunction]
+pub fn aggregate_ticks<'py>(
+    py: Python<'py>,
+    keys: PyReadonlyArray1<'py, i64>,
+    price: PyReadonlyArray1<'py, f64>,
+    size: PyReadonlyArray1<'py, f64>,
+) -> PyResult<BarArrays<'py>> {
+    let keys = keys.as_array();
+    let price = price.as_array();
+    let size = size.as_array();
+
+    if keys.len() != price.len() || keys.len() != size.len() {
+        return Err(PyValueError::new_err(
+            "keys, price and size must have the same length",
+        ));
+    }
+
+    let bars = aggregate(keys, price, size);
+
+    Ok((
+        bars.starts.into_pyarray(py),
+        bars.open.into_pyarray(py),
+        bars.high.into_pyarray(py),
+        bars.low.into_pyarray(py),
+        bars.close.into_pyarray(py),
+        bars.volume.into_pyarray(py),
+    ))
+}
+
+pub fn threshold(
+    measure: ArrayView1<f64>,
+    offset: f64,
+    threshold: f64,
+) -> (Vec<i64>, Vec<f64>) {
+    let mut keys = Vec::with_capacity(measure.len());
+    let mut cumulative = Vec::with_capacity(measure.len());
+    let mut sum = offset;
+
+    for &m in measure.iter() {
+        keys.push((sum / threshold).floor() as i64);
+        sum += if m.is_nan() { 0.0 } else { m };
+        cumulative.push(sum);
+    }
+
+    (keys, cumulative)
+}
+
+/// Gets the bar keys of rows of which a bar closes every `threshold` of the
+/// cumulative measure
+///
+/// Returns (keys, cumulative measure through each row)
+#[pyfunction]
+pub fn threshold_keys<'py>(
+    py: Python<'py>,
+    measure: PyReadonlyArray1<'py, f64>,
+    offset: f64,
+    threshold: f64,
+) -> PyResult<(Bound<'py, PyArray1<i64>>, Bound<'py, PyArray1<f64>>)> {
+    if !(threshold > 0.0) {
+        return Err(PyValueError::new_err("threshold must be positive"));
+    }
+
+    let (keys, cumulative) = self::threshold(measure.as_array(), offset, threshold);
+
+    Ok((keys.into_pyarray(py), cumulative.into_pyarray(py)))
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use ndarray::array;
+
+    #[test]
+    fn test_aggregate() {
+        let keys = array![1i64, 1, 1, 2, 3, 3];
+        let price = array![2.0, 4.0, 1.0, 5.0, 6.0, 3.0];
+        let size = array![1.0, 2.0, 3.0, 4.0, 5.0, 6.0];
+
+        let bars = aggregate(keys.view(), price.view(), size.view());
+
+        assert_eq!(bars.starts, vec![0, 3, 4]);
+        assert_eq!(bars.open, vec![2.0, 5.0, 6.0]);
+        assert_eq!(bars.high, vec![4.0, 5.0, 6.0]);
+        assert_eq!(bars.low, vec![1.0, 5.0, 3.0]);
+        assert_eq!(bars.close, vec![1.0, 5.0, 3.0]);
+        assert_eq!(bars.volume, vec![6.0, 4.0, 11.0]);
+    }
+
+    #[test]
+    fn test_aggregate_nan() {
+        let keys = array![1i64, 1, 1];
+        let price = array![2.0, f64::NAN, 1.0];
+        let size = array![1.0, 1.0, 1.0];
+
+        let bars = aggregate(keys.view(), price.view(), size.view());
+
+        assert!(bars.high[0].is_nan());
+        assert!(bars.low[0].is_nan());
+        assert_eq!(bars.close, vec![1.0]);
+    }
+
+    #[test]
+    fn test_threshold() {
+        let measure = array![3.0, 4.0, f64::NAN, 5.0, 20.0, 1.0];
+
+        let (keys, cumulative) = threshold(measure.view(), 2.0, 10.0);
+
+        assert_eq!(keys, vec![0, 0, 0, 0, 1, 3]);
+        assert_eq!(cumulative, vec![5.0, 9.0, 9.0, 14.0, 34.0, 35.0]);
+
+        // Split into two calls
+        let (first, _) = threshold(measure.slice(ndarray::s![..3]).view(), 2.0, 10.0);
+        let (second, _) = threshold(measure.slice(ndarray::s![3..]).view(), 9.0, 10.0);
+
+        assert_eq!([first, second].concat(), keys);
+    }
+
+    #[test]
+    fn test_aggregate_empty() {
+        let keys = ndarray::Array1::<i64>::zeros(0);
+        let values = ndarray::Array1::<f64>::zeros(0);
+
+        let bars = aggregate(keys.view(), values.view(), values.view());
+
+        assert_eq!(bars, Bars::default());
+    }
+}
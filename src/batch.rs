@@ -0,0 +1,124 @@
+//! Batched kernel calls
+//!
+//! Python hands over a list of jobs at once, each of which is a tuple of
+//!
+//! - the kernel id (`CommandPreset.native`)
+//! - the command arguments
+//! - the input series, as float64 ndarrays
+//!
+//! The jobs are independent of each other, so that they could be run on
+//! several threads without the GIL. The results are returned in the order
+//! of the jobs, whether or not they are run in parallel.
+
+use std::thread;
+
+use pyo3::prelude::*;
+use pyo3::types::PyTuple;
+use numpy::{IntoPyArray, PyReadonlyArray1};
+use ndarray::CowArray;
+
+use crate::indicators::{run_kernel, Param, Value};
+
+struct Job<'a> {
+    id: String,
+    params: Vec<Param>,
+    inputs: Vec<Value<'a>>,
+}
+
+impl Job<'_> {
+    fn run(&self) -> PyResult<Value<'static>> {
+        run_kernel(&self.id, &self.params, &self.inputs)
+    }
+}
+
+type Buffers<'py> = Vec<(String, Vec<Param>, Vec<PyReadonlyArray1<'py, f64>>)>;
+
+fn extract_jobs<'py>(jobs: &Bound<'py, PyAny>) -> PyResult<Buffers<'py>> {
+    jobs.try_iter()?
+        .map(|job| {
+            let job = job?;
+            let job = job.downcast::<PyTuple>()?;
+
+            let id: String = job.get_item(0)?.extract()?;
+            let params = job
+                .get_item(1)?
+                .try_iter()?
+                .map(|item| Param::extract(&item?))
+                .collect::<PyResult<_>>()?;
+            let inputs = job
+                .get_item(2)?
+                .try_iter()?
+                .map(|item| item?.extract())
+                .collect::<PyResult<_>>()?;
+
+            Ok((id, params, inputs))
+        })
+        .collect()
+}
+
+fn run_parallel(jobs: &[Job<'_>]) -> Vec<PyResult<Value<'static>>> {
+    let threads = thread::available_parallelism()
+        .map(|n| n.get())
+        .unwrap_or(1)
+        .min(jobs.len());
+
+    if threads <= 1 {
+        return jobs.iter().map(Job::run).collect();
+    }
+
+    let chunk_size = jobs.len().div_ceil(threads);
+
+    thread::scope(|scope| {
+        let handles: Vec<_> = jobs
+            .chunks(chunk_size)
+            .map(|chunk| scope.spawn(move || {
+                chunk.iter().map(Job::run).collect::<Vec<_>>()
+            }))
+            .collect();
+
+        handles
+            .into_iter()
+            .flat_map(|handle| handle.join().expect("kernel thread panicked"))
+            .collect()
+    })
+}
+
+/// Run a list of `(kernel_id, args, inputs)` jobs, and return the list of
+/// the results. If `parallel` is true, the jobs are distributed over the
+/// available cores with the GIL released.
+#[pyfunction]
+#[pyo3(signature = (jobs, parallel=false))]
+pub fn run_kernels<'py>(
+    py: Python<'py>,
+    jobs: &Bound<'py, PyAny>,
+    parallel: bool,
+) -> PyResult<Vec<PyObject>> {
+    let buffers = extract_jobs(jobs)?;
+
+    let jobs: Vec<Job<'_>> = buffers
+        .iter()
+        .map(|(id, params, inputs)| Job {
+            id: id.clone(),
+            params: params.clone(),
+            inputs: inputs
+                .iter()
+                .map(|array| Value::Float(CowArray::from(array.as_array())))
+                .collect(),
+        })
+        .collect();
+
+    let results = if parallel {
+        py.allow_threads(|| run_parallel(&jobs))
+    } else {
+        jobs.iter().map(Job::run).collect()
+    };
+
+    results
+        .into_iter()
+        .map(|result| Ok(match result? {
+            Value::Scalar(x) => x.into_pyobject(py)?.into_any().unbind(),
+            Value::Float(array) => array.into_owned().into_pyarray(py).into_any().unbind(),
+            Value::Bool(array) => array.into_pyarray(py).into_any().unbind(),
+        }))
+        .collect()
+}
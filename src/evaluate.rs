@@ -0,0 +1,356 @@
+//! Whole-directive evaluation
+//!
+//! Python compiles a parsed directive into a plan of nested tuples
+//! (see `stock_pandas/directive/native.py`):
+//!
+//! - `("column", name)`
+//! - `("scalar", value)`
+//! - `("kernel", kernel_id, args, series)`
+//! - `("formula", callable, args, series)`
+//! - `("binary", operator, left, right)`
+//! - `("unary", operator, expression)`
+//!
+//! The plan and the source column buffers are handed over once, then
+//! built-in commands and operators are calculated natively, and only the
+//! formulas of user-defined commands are called back into Python.
+
+use std::collections::HashMap;
+
+use pyo3::prelude::*;
+use pyo3::exceptions::{PyKeyError, PyTypeError, PyValueError};
+use pyo3::types::{PyDict, PyTuple};
+use numpy::{IntoPyArray, PyReadonlyArray1};
+use ndarray::{Array1, CowArray, Zip};
+
+use crate::indicators::{run_kernel, Param, Value};
+
+/// A node of the evaluation plan
+enum Node {
+    Column(String),
+    Scalar(f64),
+    Kernel {
+        id: String,
+        params: Vec<Param>,
+        series: Vec<Node>,
+    },
+    Formula {
+        formula: PyObject,
+        args: Vec<PyObject>,
+        series: Vec<Node>,
+    },
+    Binary {
+        operator: String,
+        left: Box<Node>,
+        right: Box<Node>,
+    },
+    Unary {
+        operator: String,
+        expression: Box<Node>,
+    },
+}
+
+fn extract_series(obj: &Bound<'_, PyAny>) -> PyResult<Vec<Node>> {
+    obj.try_iter()?
+        .map(|item| Node::extract(&item?))
+        .collect()
+}
+
+impl Node {
+    fn extract(obj: &Bound<'_, PyAny>) -> PyResult<Self> {
+        let tuple = obj.downcast::<PyTuple>()?;
+        let tag: String = tuple.get_item(0)?.extract()?;
+
+        let node = match tag.as_str() {
+            "column" => Node::Column(tuple.get_item(1)?.extract()?),
+            "scalar" => Node::Scalar(tuple.get_item(1)?.extract()?),
+            "kernel" => Node::Kernel {
+                id: tuple.get_item(1)?.extract()?,
+                params: tuple
+                    .get_item(2)?
+                    .try_iter()?
+                    .map(|item| Param::extract(&item?))
+                    .collect::<PyResult<_>>()?,
+                series: extract_series(&tuple.get_item(3)?)?,
+            },
+            "formula" => Node::Formula {
+                formula: tuple.get_item(1)?.unbind(),
+                args: tuple
+                    .get_item(2)?
+                    .try_iter()?
+                    .map(|item| item.map(Bound::unbind))
+                    .collect::<PyResult<_>>()?,
+                series: extract_series(&tuple.get_item(3)?)?,
+            },
+            "binary" => Node::Binary {
+                operator: tuple.get_item(1)?.extract()?,
+                left: Box::new(Node::extract(&tuple.get_item(2)?)?),
+                right: Box::new(Node::extract(&tuple.get_item(3)?)?),
+            },
+            "unary" => Node::Unary {
+                operator: tuple.get_item(1)?.extract()?,
+                expression: Box::new(Node::extract(&tuple.get_item(2)?)?),
+            },
+            _ => {
+                return Err(PyValueError::new_err(format!(
+                    "unknown plan node \"{}\"",
+                    tag
+                )));
+            }
+        };
+
+        Ok(node)
+    }
+}
+
+type Columns<'py> = HashMap<String, PyReadonlyArray1<'py, f64>>;
+
+fn evaluate<'a, 'py>(
+    py: Python<'py>,
+    node: &Node,
+    columns: &'a Columns<'py>,
+) -> PyResult<Value<'a>> {
+    match node {
+        Node::Column(name) => columns
+            .get(name)
+            .map(|array| Value::Float(CowArray::from(array.as_array())))
+            .ok_or_else(|| PyKeyError::new_err(name.clone())),
+
+        Node::Scalar(value) => Ok(Value::Scalar(*value)),
+
+        Node::Kernel { id, params, series } => {
+            let inputs = series
+                .iter()
+                .map(|child| evaluate(py, child, columns))
+                .collect::<PyResult<Vec<_>>>()?;
+
+            run_kernel(id, params, &inputs)
+        }
+
+        Node::Formula { formula, args, series } => {
+            let mut call_args: Vec<PyObject> = args
+                .iter()
+                .map(|arg| arg.clone_ref(py))
+                .collect();
+
+            for child in series {
+                call_args.push(to_python(py, evaluate(py, child, columns)?)?);
+            }
+
+            let result = formula.bind(py).call1(PyTuple::new(py, call_args)?)?;
+            from_python(py, &result)
+        }
+
+        Node::Binary { operator, left, right } => {
+            let left = evaluate(py, left, columns)?;
+            let right = evaluate(py, right, columns)?;
+
+            binary(operator, &left, &right)
+        }
+
+        Node::Unary { operator, expression } => {
+            let value = evaluate(py, expression, columns)?;
+
+            unary(operator, &value)
+        }
+    }
+}
+
+fn to_python(py: Python<'_>, value: Value<'_>) -> PyResult<PyObject> {
+    Ok(match value {
+        Value::Scalar(x) => x.into_pyobject(py)?.into_any().unbind(),
+        Value::Float(array) => array.into_owned().into_pyarray(py).into_any().unbind(),
+        Value::Bool(array) => array.into_pyarray(py).into_any().unbind(),
+    })
+}
+
+/// Convert the return value of a Python formula
+fn from_python(py: Python<'_>, result: &Bound<'_, PyAny>) -> PyResult<Value<'static>> {
+    let numpy = py.import("numpy")?;
+    let array = numpy.call_method1("asarray", (result,))?;
+    let kind: String = array.getattr("dtype")?.getattr("kind")?.extract()?;
+
+    if kind == "b" {
+        let array: PyReadonlyArray1<'_, bool> = array.extract()?;
+        return Ok(Value::Bool(array.as_array().to_owned()));
+    }
+
+    let array = array.call_method1("astype", ("float64",))?;
+    let array: PyReadonlyArray1<'_, f64> = array.extract()?;
+
+    Ok(Value::float(array.as_array().to_owned()))
+}
+
+fn check_len(a: &Value<'_>, b: &Value<'_>) -> PyResult<()> {
+    match (a.len(), b.len()) {
+        (Some(x), Some(y)) if x != y => Err(PyValueError::new_err(format!(
+            "operands could not be broadcast together with shapes ({},) ({},)",
+            x, y
+        ))),
+        (None, None) => Err(PyTypeError::new_err(
+            "at least one operand should be a series"
+        )),
+        _ => Ok(()),
+    }
+}
+
+/// Apply `f` element-wise, where scalars are broadcast
+fn map_float<T, F>(left: &Value<'_>, right: &Value<'_>, f: F) -> PyResult<Array1<T>>
+where
+    T: Clone,
+    F: Fn(f64, f64) -> T,
+{
+    check_len(left, right)?;
+
+    Ok(match (left, right) {
+        (Value::Scalar(l), _) => right.to_float()?.mapv(|r| f(*l, r)),
+        (_, Value::Scalar(r)) => left.to_float()?.mapv(|l| f(l, *r)),
+        _ => {
+            let l = left.to_float()?;
+            let r = right.to_float()?;
+            Zip::from(&l).and(&r).map_collect(|a, b| f(*a, *b))
+        }
+    })
+}
+
+fn bool_operands<'v>(
+    operator: &str,
+    left: &'v Value<'_>,
+    right: &'v Value<'_>,
+) -> PyResult<(&'v Array1<bool>, &'v Array1<bool>)> {
+    check_len(left, right)?;
+
+    match (left, right) {
+        (Value::Bool(l), Value::Bool(r)) => Ok((l, r)),
+        _ => Err(PyTypeError::new_err(format!(
+            "ufunc for operator \"{}\" not supported for the input types",
+            operator
+        ))),
+    }
+}
+
+fn zip_bool<F>(left: &Array1<bool>, right: &Array1<bool>, f: F) -> Array1<bool>
+where
+    F: Fn(bool, bool) -> bool,
+{
+    Zip::from(left).and(right).map_collect(|a, b| f(*a, *b))
+}
+
+/// Returns `(cross, less)`, the same as `stock_pandas.common.compare_cross`
+fn compare_cross(
+    left: &Value<'_>,
+    right: &Value<'_>,
+) -> PyResult<(Array1<bool>, Array1<bool>)> {
+    let less = map_float(left, right, |l, r| r < l)?;
+    let mut cross = Array1::from_elem(less.len(), false);
+
+    for i in 1..less.len() {
+        cross[i] = less[i] != less[i - 1];
+    }
+
+    Ok((cross, less))
+}
+
+fn binary(operator: &str, left: &Value<'_>, right: &Value<'_>) -> PyResult<Value<'static>> {
+    // numpy treats `+` and `*` of two bool arrays as logical or / and
+    if let (Value::Bool(l), Value::Bool(r)) = (left, right) {
+        match operator {
+            "+" => {
+                check_len(left, right)?;
+                return Ok(Value::Bool(zip_bool(l, r, |a, b| a | b)));
+            }
+            "*" => {
+                check_len(left, right)?;
+                return Ok(Value::Bool(zip_bool(l, r, |a, b| a & b)));
+            }
+            "-" => {
+                return Err(PyTypeError::new_err(
+                    "numpy boolean subtract, the `-` operator, is not supported"
+                ));
+            }
+            _ => {}
+        }
+    }
+
+    let value = match operator {
+        "+" => Value::float(map_float(left, right, |l, r| l + r)?),
+        "-" => Value::float(map_float(left, right, |l, r| l - r)?),
+        "*" => Value::float(map_float(left, right, |l, r| l * r)?),
+        "/" => Value::float(map_float(left, right, |l, r| l / r)?),
+
+        "<" => Value::Bool(map_float(left, right, |l, r| l < r)?),
+        "<=" => Value::Bool(map_float(left, right, |l, r| l <= r)?),
+        ">=" => Value::Bool(map_float(left, right, |l, r| l >= r)?),
+        ">" => Value::Bool(map_float(left, right, |l, r| l > r)?),
+        "==" => Value::Bool(map_float(left, right, |l, r| l == r)?),
+        "!=" => Value::Bool(map_float(left, right, |l, r| l != r)?),
+
+        "&" => {
+            let (l, r) = bool_operands(operator, left, right)?;
+            Value::Bool(zip_bool(l, r, |a, b| a & b))
+        }
+        "^" => {
+            let (l, r) = bool_operands(operator, left, right)?;
+            Value::Bool(zip_bool(l, r, |a, b| a ^ b))
+        }
+        "|" => {
+            let (l, r) = bool_operands(operator, left, right)?;
+            Value::Bool(zip_bool(l, r, |a, b| a | b))
+        }
+
+        "><" => Value::Bool(compare_cross(left, right)?.0),
+        "//" => {
+            let (cross, less) = compare_cross(left, right)?;
+            Value::Bool(zip_bool(&cross, &less, |c, l| c & l))
+        }
+        "\\" => {
+            let (cross, less) = compare_cross(left, right)?;
+            Value::Bool(zip_bool(&cross, &less, |c, l| c & !l))
+        }
+
+        _ => {
+            return Err(PyValueError::new_err(format!(
+                "unknown operator \"{}\"",
+                operator
+            )));
+        }
+    };
+
+    Ok(value)
+}
+
+fn unary(operator: &str, value: &Value<'_>) -> PyResult<Value<'static>> {
+    match operator {
+        "-" => match value {
+            Value::Scalar(x) => Ok(Value::Scalar(-x)),
+            Value::Float(array) => Ok(Value::float(array.mapv(|x| -x))),
+            Value::Bool(_) => Err(PyTypeError::new_err(
+                "the numpy boolean negative, the `-` operator, is not supported"
+            )),
+        },
+        "~" => Ok(Value::Bool(value.to_bool()?.mapv(|b| !b))),
+        _ => Err(PyValueError::new_err(format!(
+            "unknown unary operator \"{}\"",
+            operator
+        ))),
+    }
+}
+
+/// Evaluate a compiled directive plan against the source columns,
+/// which is a dict of column name -> float64 ndarray.
+#[pyfunction]
+pub fn evaluate_directive<'py>(
+    py: Python<'py>,
+    plan: &Bound<'py, PyAny>,
+    columns: &Bound<'py, PyDict>,
+) -> PyResult<PyObject> {
+    let node = Node::extract(plan)?;
+
+    let mut buffers: Columns<'py> = HashMap::with_capacity(columns.len());
+    for (name, array) in columns.iter() {
+        let array: PyReadonlyArray1<'py, f64> = array.extract()?;
+        buffers.insert(name.extract()?, array);
+    }
+
+    let value = evaluate(py, &node, &buffers)?.into_owned();
+    to_python(py, value)
+}
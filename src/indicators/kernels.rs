@@ -0,0 +1,414 @@
+//! Kernel dispatch
+//!
+//! Maps the kernel id of a built-in command preset (`CommandPreset.native`)
+//! to the internal indicator functions, so that a calculation could be
+//! requested by name without crossing the Python boundary for each command.
+
+use pyo3::prelude::*;
+use pyo3::exceptions::{PyTypeError, PyValueError};
+use pyo3::types::{PyBool, PyFloat, PyInt, PyString};
+use ndarray::{Array1, CowArray, Ix1};
+
+use crate::simd;
+
+use super::trend_following::{
+    ewma_internal,
+    macd_internal,
+    macd_signal_internal,
+    macd_histogram_internal,
+    bbi_internal,
+    tr_internal,
+    atr_internal,
+};
+use super::support_resistance::{
+    boll_band_internal,
+    bbw_internal,
+    hv_internal,
+};
+use super::overbought_oversold::{
+    rsv_internal,
+    kdj_k_internal,
+    kdj_d_internal,
+    kdj_j_internal,
+    rsi_internal,
+    donchian_internal,
+};
+use super::tools::{
+    increase_internal,
+    style_internal,
+    repeat_internal,
+    change_internal,
+};
+
+/// A command argument
+#[derive(Debug, Clone)]
+pub enum Param {
+    Int(i64),
+    Float(f64),
+    Str(String),
+    Bool(bool),
+}
+
+impl Param {
+    /// Extract a command argument from a Python primitive value
+    pub fn extract(obj: &Bound<'_, PyAny>) -> PyResult<Self> {
+        // `bool` is a subclass of `int` in Python, so check it first
+        if obj.is_instance_of::<PyBool>() {
+            return Ok(Param::Bool(obj.extract()?));
+        }
+
+        if obj.is_instance_of::<PyInt>() {
+            return Ok(Param::Int(obj.extract()?));
+        }
+
+        if obj.is_instance_of::<PyFloat>() {
+            return Ok(Param::Float(obj.extract()?));
+        }
+
+        if obj.is_instance_of::<PyString>() {
+            return Ok(Param::Str(obj.extract()?));
+        }
+
+        Err(PyTypeError::new_err(format!(
+            "unsupported command argument: {}",
+            obj.repr()?
+        )))
+    }
+
+    fn as_f64(&self) -> Option<f64> {
+        match self {
+            Param::Int(i) => Some(*i as f64),
+            Param::Float(f) => Some(*f),
+            _ => None,
+        }
+    }
+
+    fn as_i64(&self) -> Option<i64> {
+        match self {
+            Param::Int(i) => Some(*i),
+            Param::Float(f) if f.fract() == 0.0 => Some(*f as i64),
+            _ => None,
+        }
+    }
+}
+
+/// A value during calculation: either a scalar or a series
+#[derive(Debug, Clone)]
+pub enum Value<'a> {
+    Scalar(f64),
+    Float(CowArray<'a, f64, Ix1>),
+    Bool(Array1<bool>),
+}
+
+impl<'a> Value<'a> {
+    pub fn float(array: Array1<f64>) -> Value<'static> {
+        Value::Float(CowArray::from(array))
+    }
+
+    pub fn len(&self) -> Option<usize> {
+        match self {
+            Value::Scalar(_) => None,
+            Value::Float(array) => Some(array.len()),
+            Value::Bool(array) => Some(array.len()),
+        }
+    }
+
+    /// Get the series as float values, `True` as `1.0`, `False` as `0.0`
+    pub fn to_float(&self) -> PyResult<CowArray<'_, f64, Ix1>> {
+        match self {
+            Value::Float(array) => Ok(CowArray::from(array.view())),
+            Value::Bool(array) => Ok(CowArray::from(
+                array.mapv(|b| if b { 1.0 } else { 0.0 })
+            )),
+            Value::Scalar(_) => Err(PyValueError::new_err(
+                "a series is required, but got a scalar"
+            )),
+        }
+    }
+
+    /// Get the series as bool values, which follows `ndarray.astype(bool)`
+    pub fn to_bool(&self) -> PyResult<CowArray<'_, bool, Ix1>> {
+        match self {
+            Value::Bool(array) => Ok(CowArray::from(array.view())),
+            // NaN is truthy, the same as numpy
+            Value::Float(array) => Ok(CowArray::from(array.mapv(|x| x != 0.0))),
+            Value::Scalar(_) => Err(PyValueError::new_err(
+                "a series is required, but got a scalar"
+            )),
+        }
+    }
+
+    /// Detach the value from the borrowed input buffers
+    pub fn into_owned(self) -> Value<'static> {
+        match self {
+            Value::Scalar(x) => Value::Scalar(x),
+            Value::Float(array) => Value::float(array.into_owned()),
+            Value::Bool(array) => Value::Bool(array),
+        }
+    }
+}
+
+fn param<'p>(name: &str, params: &'p [Param], index: usize) -> PyResult<&'p Param> {
+    params.get(index).ok_or_else(|| PyValueError::new_err(format!(
+        "kernel \"{}\" requires args[{}]",
+        name, index
+    )))
+}
+
+fn usize_param(name: &str, params: &[Param], index: usize) -> PyResult<usize> {
+    match param(name, params, index)?.as_i64() {
+        Some(value) if value >= 0 => Ok(value as usize),
+        _ => Err(PyValueError::new_err(format!(
+            "args[{}] of kernel \"{}\" must be a non-negative int",
+            index, name
+        ))),
+    }
+}
+
+fn i32_param(name: &str, params: &[Param], index: usize) -> PyResult<i32> {
+    match param(name, params, index)?.as_i64() {
+        Some(value) => Ok(value as i32),
+        None => Err(PyValueError::new_err(format!(
+            "args[{}] of kernel \"{}\" must be an int",
+            index, name
+        ))),
+    }
+}
+
+fn f64_param(name: &str, params: &[Param], index: usize) -> PyResult<f64> {
+    param(name, params, index)?.as_f64().ok_or_else(|| PyValueError::new_err(format!(
+        "args[{}] of kernel \"{}\" must be a number",
+        index, name
+    )))
+}
+
+fn str_param<'p>(name: &str, params: &'p [Param], index: usize) -> PyResult<&'p str> {
+    match param(name, params, index)? {
+        Param::Str(value) => Ok(value.as_str()),
+        _ => Err(PyValueError::new_err(format!(
+            "args[{}] of kernel \"{}\" must be a str",
+            index, name
+        ))),
+    }
+}
+
+fn input<'v, 'a>(name: &str, inputs: &'v [Value<'a>], index: usize) -> PyResult<&'v Value<'a>> {
+    inputs.get(index).ok_or_else(|| PyValueError::new_err(format!(
+        "kernel \"{}\" requires series[{}]",
+        name, index
+    )))
+}
+
+fn float_input<'v>(
+    name: &str,
+    inputs: &'v [Value<'_>],
+    index: usize,
+) -> PyResult<CowArray<'v, f64, Ix1>> {
+    input(name, inputs, index)?.to_float()
+}
+
+/// Run the kernel `name` with command arguments `params` on series `inputs`
+pub fn run_kernel(
+    name: &str,
+    params: &[Param],
+    inputs: &[Value<'_>],
+) -> PyResult<Value<'static>> {
+    let value = match name {
+        // Trend-following indicators
+        "ma" | "boll" => {
+            let data = float_input(name, inputs, 0)?;
+            Value::float(simd::sma(data.view(), usize_param(name, params, 0)?))
+        }
+        "ema" => {
+            let data = float_input(name, inputs, 0)?;
+            Value::float(ewma_internal(data.view(), usize_param(name, params, 0)?))
+        }
+        "macd" => {
+            let data = float_input(name, inputs, 0)?;
+            Value::float(macd_internal(
+                data.view(),
+                usize_param(name, params, 0)?,
+                usize_param(name, params, 1)?,
+            ))
+        }
+        "macd.signal" => {
+            let data = float_input(name, inputs, 0)?;
+            Value::float(macd_signal_internal(
+                data.view(),
+                usize_param(name, params, 0)?,
+                usize_param(name, params, 1)?,
+                usize_param(name, params, 2)?,
+            ))
+        }
+        "macd.histogram" => {
+            let data = float_input(name, inputs, 0)?;
+            Value::float(macd_histogram_internal(
+                data.view(),
+                usize_param(name, params, 0)?,
+                usize_param(name, params, 1)?,
+                usize_param(name, params, 2)?,
+            ))
+        }
+        "bbi" => {
+            let data = float_input(name, inputs, 0)?;
+            Value::float(bbi_internal(
+                data.view(),
+                usize_param(name, params, 0)?,
+                usize_param(name, params, 1)?,
+                usize_param(name, params, 2)?,
+                usize_param(name, params, 3)?,
+            ))
+        }
+        "tr" => {
+            let high = float_input(name, inputs, 0)?;
+            let low = float_input(name, inputs, 1)?;
+            let close = float_input(name, inputs, 2)?;
+            Value::float(tr_internal(high.view(), low.view(), close.view()))
+        }
+        "atr" => {
+            let high = float_input(name, inputs, 0)?;
+            let low = float_input(name, inputs, 1)?;
+            let close = float_input(name, inputs, 2)?;
+            Value::float(atr_internal(
+                high.view(),
+                low.view(),
+                close.view(),
+                usize_param(name, params, 0)?,
+            ))
+        }
+
+        // Support and resistance indicators
+        "boll.upper" | "boll.lower" => {
+            let data = float_input(name, inputs, 0)?;
+            Value::float(boll_band_internal(
+                data.view(),
+                usize_param(name, params, 0)?,
+                f64_param(name, params, 1)?,
+                name == "boll.upper",
+            ))
+        }
+        "bbw" => {
+            let data = float_input(name, inputs, 0)?;
+            Value::float(bbw_internal(data.view(), usize_param(name, params, 0)?))
+        }
+        "hv" => {
+            let data = float_input(name, inputs, 0)?;
+            Value::float(hv_internal(
+                data.view(),
+                usize_param(name, params, 0)?,
+                i32_param(name, params, 1)?,
+                i32_param(name, params, 2)?,
+            ))
+        }
+
+        // Overbought/oversold indicators
+        "llv" => {
+            let data = float_input(name, inputs, 0)?;
+            Value::float(simd::rolling_min(data.view(), usize_param(name, params, 0)?))
+        }
+        "hhv" => {
+            let data = float_input(name, inputs, 0)?;
+            Value::float(simd::rolling_max(data.view(), usize_param(name, params, 0)?))
+        }
+        "donchian" => {
+            let high = float_input(name, inputs, 0)?;
+            let low = float_input(name, inputs, 1)?;
+            Value::float(donchian_internal(
+                high.view(),
+                low.view(),
+                usize_param(name, params, 0)?,
+            ))
+        }
+        "rsv" => {
+            let high = float_input(name, inputs, 0)?;
+            let low = float_input(name, inputs, 1)?;
+            let close = float_input(name, inputs, 2)?;
+            Value::float(rsv_internal(
+                high.view(),
+                low.view(),
+                close.view(),
+                usize_param(name, params, 0)?,
+            ))
+        }
+        "kdj.k" => {
+            let high = float_input(name, inputs, 0)?;
+            let low = float_input(name, inputs, 1)?;
+            let close = float_input(name, inputs, 2)?;
+            Value::float(kdj_k_internal(
+                high.view(),
+                low.view(),
+                close.view(),
+                usize_param(name, params, 0)?,
+                usize_param(name, params, 1)?,
+                f64_param(name, params, 2)?,
+            ))
+        }
+        "kdj.d" | "kdj.j" => {
+            let high = float_input(name, inputs, 0)?;
+            let low = float_input(name, inputs, 1)?;
+            let close = float_input(name, inputs, 2)?;
+            let kernel = if name == "kdj.d" {
+                kdj_d_internal
+            } else {
+                kdj_j_internal
+            };
+            Value::float(kernel(
+                high.view(),
+                low.view(),
+                close.view(),
+                usize_param(name, params, 0)?,
+                usize_param(name, params, 1)?,
+                usize_param(name, params, 2)?,
+                f64_param(name, params, 3)?,
+            ))
+        }
+        "rsi" => {
+            let data = float_input(name, inputs, 0)?;
+            Value::float(rsi_internal(data.view(), usize_param(name, params, 0)?))
+        }
+
+        // Tools
+        "increase" => {
+            let data = float_input(name, inputs, 0)?;
+            Value::Bool(increase_internal(
+                data.view(),
+                usize_param(name, params, 0)?,
+                i32_param(name, params, 1)?,
+            ))
+        }
+        "style" => {
+            let open = float_input(name, inputs, 0)?;
+            let close = float_input(name, inputs, 1)?;
+            Value::Bool(style_internal(
+                str_param(name, params, 0)?,
+                open.view(),
+                close.view(),
+            )?)
+        }
+        "repeat" => {
+            let repeat = usize_param(name, params, 0)?;
+            let series = input(name, inputs, 0)?;
+
+            if repeat == 1 {
+                // The same as the Python formula, the series is returned as-is
+                return Ok(series.clone().into_owned());
+            }
+
+            let data = series.to_bool()?;
+            Value::Bool(repeat_internal(data.view(), repeat))
+        }
+        "change" => {
+            let data = float_input(name, inputs, 0)?;
+            Value::float(change_internal(data.view(), usize_param(name, params, 0)?))
+        }
+
+        _ => {
+            return Err(PyValueError::new_err(format!(
+                "unknown kernel \"{}\"",
+                name
+            )));
+        }
+    };
+
+    Ok(value)
+}
@@ -6,6 +6,8 @@ mod trend_following;
 mod support_resistance;
 mod overbought_oversold;
 mod tools;
+mod kernels;
+mod sweep;
 
 use pyo3::prelude::*;
 
@@ -13,6 +15,8 @@ pub use trend_following::*;
 pub use support_resistance::*;
 pub use overbought_oversold::*;
 pub use tools::*;
+pub use kernels::{run_kernel, Param, Value};
+pub use sweep::{calc_sweep, sweep_kernel, SWEEP_KERNELS};
 
 /// Register all indicator functions with the Python module
 pub fn register_indicators(m: &Bound<'_, PyModule>) -> PyResult<()> {
@@ -20,6 +24,7 @@ pub fn register_indicators(m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(calc_ma, m)?)?;
     m.add_function(wrap_pyfunction!(calc_ewma, m)?)?;
     m.add_function(wrap_pyfunction!(calc_smma, m)?)?;
+    m.add_function(wrap_pyfunction!(calc_ewm_state, m)?)?;
     m.add_function(wrap_pyfunction!(calc_macd, m)?)?;
     m.add_function(wrap_pyfunction!(calc_macd_signal, m)?)?;
     m.add_function(wrap_pyfunction!(calc_macd_histogram, m)?)?;
@@ -49,6 +54,10 @@ pub fn register_indicators(m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(calc_style, m)?)?;
     m.add_function(wrap_pyfunction!(calc_repeat, m)?)?;
     m.add_function(wrap_pyfunction!(calc_change, m)?)?;
+    m.add_function(wrap_pyfunction!(calc_prefix_sums, m)?)?;
+
+    // Parameter sweeps
+    m.add_function(wrap_pyfunction!(calc_sweep, m)?)?;
 
     Ok(())
 }
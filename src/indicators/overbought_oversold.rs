@@ -37,34 +37,42 @@ pub fn calc_hhv<'py>(
     Ok(result.into_pyarray(py))
 }
 
-/// Calculate RSV (Raw Stochastic Value)
-#[pyfunction]
-pub fn calc_rsv<'py>(
-    py: Python<'py>,
-    high: PyReadonlyArray1<'py, f64>,
-    low: PyReadonlyArray1<'py, f64>,
-    close: PyReadonlyArray1<'py, f64>,
+/// Internal function for RSV calculation
+pub(crate) fn rsv_internal(
+    high: ArrayView1<f64>,
+    low: ArrayView1<f64>,
+    close: ArrayView1<f64>,
     period: usize,
-) -> PyResult<Bound<'py, PyArray1<f64>>> {
-    let high = high.as_array();
-    let low = low.as_array();
-    let close = close.as_array();
-
+) -> Array1<f64> {
     let llv = simd::rolling_min(low, period);
     let hhv = simd::rolling_max(high, period);
 
     let n = close.len();
-    let mut result = Array1::from_elem(n, f64::NAN);
+    let mut rsv = Array1::from_elem(n, 0.0);
 
     for i in 0..n {
         let denom = hhv[i] - llv[i];
         if denom.abs() > 1e-10 {
-            result[i] = (close[i] - llv[i]) / denom * 100.0;
-        } else {
-            result[i] = 0.0;
+            rsv[i] = (close[i] - llv[i]) / denom * 100.0;
         }
     }
 
+    rsv
+}
+
+/// Calculate RSV (Raw Stochastic Value)
+#[pyfunction]
+pub fn calc_rsv<'py>(
+    py: Python<'py>,
+    high: PyReadonlyArray1<'py, f64>,
+    low: PyReadonlyArray1<'py, f64>,
+    close: PyReadonlyArray1<'py, f64>,
+    period: usize,
+) -> PyResult<Bound<'py, PyArray1<f64>>> {
+    let high = high.as_array();
+    let low = low.as_array();
+    let close = close.as_array();
+    let result = rsv_internal(high, low, close, period);
     Ok(result.into_pyarray(py))
 }
 
@@ -90,6 +98,22 @@ fn ewma_with_init(data: ArrayView1<f64>, period: usize, init: f64) -> Array1<f64
     result
 }
 
+/// Internal function for KDJ K line calculation
+pub(crate) fn kdj_k_internal(
+    high: ArrayView1<f64>,
+    low: ArrayView1<f64>,
+    close: ArrayView1<f64>,
+    period_rsv: usize,
+    period_k: usize,
+    init: f64,
+) -> Array1<f64> {
+    // Calculate RSV
+    let rsv = rsv_internal(high, low, close, period_rsv);
+
+    // Calculate K using EWMA with init
+    ewma_with_init(rsv.view(), period_k, init)
+}
+
 /// Calculate KDJ K line
 #[pyfunction]
 pub fn calc_kdj_k<'py>(
@@ -104,24 +128,25 @@ pub fn calc_kdj_k<'py>(
     let high = high.as_array();
     let low = low.as_array();
     let close = close.as_array();
+    let result = kdj_k_internal(high, low, close, period_rsv, period_k, init);
+    Ok(result.into_pyarray(py))
+}
 
-    // Calculate RSV
-    let llv = simd::rolling_min(low, period_rsv);
-    let hhv = simd::rolling_max(high, period_rsv);
-
-    let n = close.len();
-    let mut rsv = Array1::from_elem(n, 0.0);
-
-    for i in 0..n {
-        let denom = hhv[i] - llv[i];
-        if denom.abs() > 1e-10 {
-            rsv[i] = (close[i] - llv[i]) / denom * 100.0;
-        }
-    }
+/// Internal function for KDJ D line calculation
+pub(crate) fn kdj_d_internal(
+    high: ArrayView1<f64>,
+    low: ArrayView1<f64>,
+    close: ArrayView1<f64>,
+    period_rsv: usize,
+    period_k: usize,
+    period_d: usize,
+    init: f64,
+) -> Array1<f64> {
+    // Calculate K first
+    let k = kdj_k_internal(high, low, close, period_rsv, period_k, init);
 
-    // Calculate K using EWMA with init
-    let result = ewma_with_init(rsv.view(), period_k, init);
-    Ok(result.into_pyarray(py))
+    // Calculate D using EWMA with init
+    ewma_with_init(k.view(), period_d, init)
 }
 
 /// Calculate KDJ D line
@@ -139,26 +164,28 @@ pub fn calc_kdj_d<'py>(
     let high = high.as_array();
     let low = low.as_array();
     let close = close.as_array();
+    let result = kdj_d_internal(
+        high, low, close, period_rsv, period_k, period_d, init
+    );
+    Ok(result.into_pyarray(py))
+}
 
-    // Calculate K first
-    let llv = simd::rolling_min(low, period_rsv);
-    let hhv = simd::rolling_max(high, period_rsv);
-
-    let n = close.len();
-    let mut rsv = Array1::from_elem(n, 0.0);
-
-    for i in 0..n {
-        let denom = hhv[i] - llv[i];
-        if denom.abs() > 1e-10 {
-            rsv[i] = (close[i] - llv[i]) / denom * 100.0;
-        }
-    }
-
-    let k = ewma_with_init(rsv.view(), period_k, init);
+/// Internal function for KDJ J line calculation
+pub(crate) fn kdj_j_internal(
+    high: ArrayView1<f64>,
+    low: ArrayView1<f64>,
+    close: ArrayView1<f64>,
+    period_rsv: usize,
+    period_k: usize,
+    period_d: usize,
+    init: f64,
+) -> Array1<f64> {
+    // Calculate K and D
+    let k = kdj_k_internal(high, low, close, period_rsv, period_k, init);
+    let d = ewma_with_init(k.view(), period_d, init);
 
-    // Calculate D using EWMA with init
-    let result = ewma_with_init(k.view(), period_d, init);
-    Ok(result.into_pyarray(py))
+    // J = 3K - 2D
+    3.0 * &k - 2.0 * &d
 }
 
 /// Calculate KDJ J line
@@ -176,37 +203,14 @@ pub fn calc_kdj_j<'py>(
     let high = high.as_array();
     let low = low.as_array();
     let close = close.as_array();
-
-    // Calculate K and D
-    let llv = simd::rolling_min(low, period_rsv);
-    let hhv = simd::rolling_max(high, period_rsv);
-
-    let n = close.len();
-    let mut rsv = Array1::from_elem(n, 0.0);
-
-    for i in 0..n {
-        let denom = hhv[i] - llv[i];
-        if denom.abs() > 1e-10 {
-            rsv[i] = (close[i] - llv[i]) / denom * 100.0;
-        }
-    }
-
-    let k = ewma_with_init(rsv.view(), period_k, init);
-    let d = ewma_with_init(k.view(), period_d, init);
-
-    // J = 3K - 2D
-    let result = 3.0 * &k - 2.0 * &d;
+    let result = kdj_j_internal(
+        high, low, close, period_rsv, period_k, period_d, init
+    );
     Ok(result.into_pyarray(py))
 }
 
-/// Calculate RSI (Relative Strength Index)
-#[pyfunction]
-pub fn calc_rsi<'py>(
-    py: Python<'py>,
-    close: PyReadonlyArray1<'py, f64>,
-    period: usize,
-) -> PyResult<Bound<'py, PyArray1<f64>>> {
-    let close = close.as_array();
+/// Internal function for RSI calculation
+pub(crate) fn rsi_internal(close: ArrayView1<f64>, period: usize) -> Array1<f64> {
     let n = close.len();
 
     // Calculate delta
@@ -243,9 +247,33 @@ pub fn calc_rsi<'py>(
         }
     }
 
+    result
+}
+
+/// Calculate RSI (Relative Strength Index)
+#[pyfunction]
+pub fn calc_rsi<'py>(
+    py: Python<'py>,
+    close: PyReadonlyArray1<'py, f64>,
+    period: usize,
+) -> PyResult<Bound<'py, PyArray1<f64>>> {
+    let close = close.as_array();
+    let result = rsi_internal(close, period);
     Ok(result.into_pyarray(py))
 }
 
+/// Internal function for Donchian Channel middle line calculation
+pub(crate) fn donchian_internal(
+    high: ArrayView1<f64>,
+    low: ArrayView1<f64>,
+    period: usize,
+) -> Array1<f64> {
+    let hhv = simd::rolling_max(high, period);
+    let llv = simd::rolling_min(low, period);
+
+    (&hhv + &llv) / 2.0
+}
+
 /// Calculate Donchian Channel middle line
 #[pyfunction]
 pub fn calc_donchian<'py>(
@@ -256,11 +284,6 @@ pub fn calc_donchian<'py>(
 ) -> PyResult<Bound<'py, PyArray1<f64>>> {
     let high = high.as_array();
     let low = low.as_array();
-
-    let hhv = simd::rolling_max(high, period);
-    let llv = simd::rolling_min(low, period);
-
-    let result = (&hhv + &llv) / 2.0;
+    let result = donchian_internal(high, low, period);
     Ok(result.into_pyarray(py))
 }
-
@@ -6,7 +6,7 @@
 
 use pyo3::prelude::*;
 use numpy::{PyArray1, PyReadonlyArray1, IntoPyArray};
-use ndarray::Array1;
+use ndarray::{Array1, ArrayView1};
 
 use crate::simd;
 
@@ -31,9 +31,7 @@ pub fn calc_boll_upper<'py>(
     times: f64,
 ) -> PyResult<Bound<'py, PyArray1<f64>>> {
     let data = data.as_array();
-    let ma = simd::sma(data, period);
-    let std = simd::rolling_std(data, period, 0); // ddof=0 for population std
-    let result = &ma + times * &std;
+    let result = boll_band_internal(data, period, times, true);
     Ok(result.into_pyarray(py))
 }
 
@@ -46,12 +44,27 @@ pub fn calc_boll_lower<'py>(
     times: f64,
 ) -> PyResult<Bound<'py, PyArray1<f64>>> {
     let data = data.as_array();
-    let ma = simd::sma(data, period);
-    let std = simd::rolling_std(data, period, 0);
-    let result = &ma - times * &std;
+    let result = boll_band_internal(data, period, times, false);
     Ok(result.into_pyarray(py))
 }
 
+/// Internal function for the upper or the lower band of Bollinger Bands
+pub(crate) fn boll_band_internal(
+    data: ArrayView1<f64>,
+    period: usize,
+    times: f64,
+    upper: bool,
+) -> Array1<f64> {
+    let ma = simd::sma(data, period);
+    let std = simd::rolling_std(data, period, 0); // ddof=0 for population std
+
+    if upper {
+        &ma + times * &std
+    } else {
+        &ma - times * &std
+    }
+}
+
 /// Calculate Bollinger Band Width
 #[pyfunction]
 pub fn calc_bbw<'py>(
@@ -60,12 +73,17 @@ pub fn calc_bbw<'py>(
     period: usize,
 ) -> PyResult<Bound<'py, PyArray1<f64>>> {
     let data = data.as_array();
+    let result = bbw_internal(data, period);
+    Ok(result.into_pyarray(py))
+}
+
+/// Internal function for Bollinger Band Width calculation
+pub(crate) fn bbw_internal(data: ArrayView1<f64>, period: usize) -> Array1<f64> {
     let ma = simd::sma(data, period);
     let std = simd::rolling_std(data, period, 0);
 
     // BBW = 4 * std / ma
-    let result = 4.0 * &std / &ma;
-    Ok(result.into_pyarray(py))
+    4.0 * &std / &ma
 }
 
 /// Calculate Historical Volatility
@@ -78,6 +96,17 @@ pub fn calc_hv<'py>(
     trading_days: i32,
 ) -> PyResult<Bound<'py, PyArray1<f64>>> {
     let close = close.as_array();
+    let result = hv_internal(close, period, minutes, trading_days);
+    Ok(result.into_pyarray(py))
+}
+
+/// Internal function for Historical Volatility calculation
+pub(crate) fn hv_internal(
+    close: ArrayView1<f64>,
+    period: usize,
+    minutes: i32,
+    trading_days: i32,
+) -> Array1<f64> {
     let n = close.len();
 
     // Calculate log returns
@@ -94,8 +123,6 @@ pub fn calc_hv<'py>(
     // Annualize: std * sqrt(trading_days * day_minutes / minutes)
     let day_minutes = 1440.0; // 24 * 60
     let annualization = ((trading_days as f64) * day_minutes / (minutes as f64)).sqrt();
-    let result = &rolling_std * annualization;
-
-    Ok(result.into_pyarray(py))
+    &rolling_std * annualization
 }
 
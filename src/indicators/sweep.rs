@@ -0,0 +1,315 @@
+//! Parameter sweeps
+//!
+//! Calculates a kernel for many periods in one call. The result is a matrix
+//! of which column `j` is the series of `periods[j]`, and the work that does
+//! not depend on the period is done only once:
+//!
+//! - ma, boll: prefix sums (and prefix sums of squares) of the series
+//! - ema, rsi: a single pass over the rows which updates the EWMA states of
+//!   all periods, bit-identical to the kernels of a single period
+//! - hhv, llv: a sparse table of the extrema of power-of-two windows
+
+use pyo3::prelude::*;
+use numpy::{IntoPyArray, PyArray2, PyReadonlyArray1};
+use ndarray::{Array1, Array2, ArrayView1};
+
+use crate::simd::{self, Ewma};
+
+use super::kernels::Param;
+
+/// The ids of the kernels which support sweeping
+pub const SWEEP_KERNELS: &[&str] = &[
+    "ma", "boll", "boll.upper", "boll.lower", "ema", "rsi", "hhv", "llv",
+];
+
+/// Prefix sums of a series, of which index `i` covers the first `i` values.
+/// The values are shifted by the first valid value to reduce cancellation.
+struct PrefixSums {
+    offset: f64,
+    sums: Array1<f64>,
+    sq_sums: Array1<f64>,
+    nans: Array1<usize>,
+}
+
+impl PrefixSums {
+    fn new(data: ArrayView1<f64>) -> Self {
+        let n = data.len();
+        let offset = data.iter().copied().find(|x| !x.is_nan()).unwrap_or(0.0);
+
+        let shifted = data.mapv(|x| if x.is_nan() { 0.0 } else { x - offset });
+        let squared = shifted.mapv(|x| x * x);
+
+        let (sums, comps) = simd::prefix_sums(shifted.view(), 0.0, 0.0);
+        let (sq_sums, sq_comps) = simd::prefix_sums(squared.view(), 0.0, 0.0);
+
+        let mut prefix = PrefixSums {
+            offset,
+            sums: Array1::zeros(n + 1),
+            sq_sums: Array1::zeros(n + 1),
+            nans: Array1::zeros(n + 1),
+        };
+
+        for i in 0..n {
+            prefix.sums[i + 1] = sums[i] + comps[i];
+            prefix.sq_sums[i + 1] = sq_sums[i] + sq_comps[i];
+            prefix.nans[i + 1] = prefix.nans[i] + data[i].is_nan() as usize;
+        }
+
+        prefix
+    }
+
+    /// The shifted sum and sum of squares of the window of `period` values
+    /// ending at row `i`, or `None` if the window is not full or contains NaN
+    #[inline]
+    fn window(&self, i: usize, period: usize) -> Option<(f64, f64)> {
+        if period == 0 || i + 1 < period {
+            return None;
+        }
+
+        let (start, stop) = (i + 1 - period, i + 1);
+
+        if self.nans[stop] != self.nans[start] {
+            return None;
+        }
+
+        Some((
+            self.sums[stop] - self.sums[start],
+            self.sq_sums[stop] - self.sq_sums[start],
+        ))
+    }
+}
+
+fn sweep_boll(data: ArrayView1<f64>, periods: &[usize], times: f64) -> Array2<f64> {
+    let n = data.len();
+    let prefix = PrefixSums::new(data);
+    let mut result = Array2::from_elem((n, periods.len()), f64::NAN);
+
+    for i in 0..n {
+        for (j, &period) in periods.iter().enumerate() {
+            if let Some((sum, sq_sum)) = prefix.window(i, period) {
+                let p = period as f64;
+                let mean = sum / p;
+
+                result[[i, j]] = if times == 0.0 {
+                    mean + prefix.offset
+                } else {
+                    // Population variance, the same as `boll.upper`
+                    let var = ((sq_sum - sum * sum / p) / p).max(0.0);
+                    mean + prefix.offset + times * var.sqrt()
+                };
+            }
+        }
+    }
+
+    result
+}
+
+fn sweep_ema(data: ArrayView1<f64>, periods: &[usize]) -> Array2<f64> {
+    let n = data.len();
+    let mut states: Vec<Ewma> = periods
+        .iter()
+        .map(|&period| Ewma::new((period as f64 - 1.0) / 2.0, true, false, period))
+        .collect();
+    let mut result = Array2::from_elem((n, periods.len()), f64::NAN);
+
+    for i in 0..n {
+        let cur = data[i];
+        for (j, state) in states.iter_mut().enumerate() {
+            result[[i, j]] = state.update(cur);
+        }
+    }
+
+    result
+}
+
+fn sweep_rsi(data: ArrayView1<f64>, periods: &[usize]) -> Array2<f64> {
+    let n = data.len();
+    let delta = simd::diff(data);
+
+    let smma = |period: usize| Ewma::new(period as f64 - 1.0, true, false, period);
+    let mut gains: Vec<Ewma> = periods.iter().map(|&p| smma(p)).collect();
+    let mut losses: Vec<Ewma> = periods.iter().map(|&p| smma(p)).collect();
+
+    let mut result = Array2::from_elem((n, periods.len()), f64::NAN);
+
+    for i in 0..n {
+        let d = delta[i];
+        let (gain, loss) = if d.is_nan() {
+            (f64::NAN, f64::NAN)
+        } else {
+            (d.max(0.0), (-d).max(0.0))
+        };
+
+        for j in 0..periods.len() {
+            let smma_gain = gains[j].update(gain);
+            let smma_loss = losses[j].update(loss);
+
+            if smma_gain.is_nan() || smma_loss.is_nan() {
+                continue;
+            }
+
+            result[[i, j]] = if smma_loss.abs() < 1e-10 {
+                100.0
+            } else {
+                100.0 - 100.0 / (1.0 + smma_gain / smma_loss)
+            };
+        }
+    }
+
+    result
+}
+
+/// Rolling extrema which ignore NaN values, the same as `simd::rolling_max`
+/// and `simd::rolling_min`, with a sparse table shared by all periods
+fn sweep_extremum(data: ArrayView1<f64>, periods: &[usize], max: bool) -> Array2<f64> {
+    let n = data.len();
+    let mut result = Array2::from_elem((n, periods.len()), f64::NAN);
+
+    let longest = periods.iter().copied().filter(|&p| p <= n).max().unwrap_or(0);
+
+    if longest == 0 {
+        return result;
+    }
+
+    let pick = |a: f64, b: f64| {
+        if a.is_nan() {
+            b
+        } else if b.is_nan() {
+            a
+        } else if max {
+            a.max(b)
+        } else {
+            a.min(b)
+        }
+    };
+
+    // table[k][i] is the extremum of data[i..i + 2^k]
+    let mut table: Vec<Array1<f64>> = vec![data.to_owned()];
+    let mut width = 1;
+
+    while width * 2 <= longest {
+        let prev = &table[table.len() - 1];
+        let next = Array1::from_shape_fn(n + 1 - width * 2, |i| {
+            pick(prev[i], prev[i + width])
+        });
+        table.push(next);
+        width *= 2;
+    }
+
+    for (j, &period) in periods.iter().enumerate() {
+        if period == 0 || period > n {
+            continue;
+        }
+
+        let k = (usize::BITS - 1 - period.leading_zeros()) as usize;
+        let level = &table[k];
+        let span = 1 << k;
+
+        for i in (period - 1)..n {
+            result[[i, j]] = pick(level[i + 1 - period], level[i + 1 - span]);
+        }
+    }
+
+    result
+}
+
+/// Calculate kernel `name` for every period of `periods`, with the other
+/// command arguments `params`. Returns `None` if the kernel could not be swept.
+pub fn sweep_kernel(
+    name: &str,
+    data: ArrayView1<f64>,
+    periods: &[usize],
+    params: &[Param],
+) -> Option<Array2<f64>> {
+    let times = || match params.first() {
+        Some(Param::Int(i)) => Some(*i as f64),
+        Some(Param::Float(f)) => Some(*f),
+        _ => None,
+    };
+
+    let result = match name {
+        "ma" | "boll" => sweep_boll(data, periods, 0.0),
+        "boll.upper" => sweep_boll(data, periods, times()?),
+        "boll.lower" => sweep_boll(data, periods, -times()?),
+        "ema" => sweep_ema(data, periods),
+        "rsi" => sweep_rsi(data, periods),
+        "hhv" => sweep_extremum(data, periods, true),
+        "llv" => sweep_extremum(data, periods, false),
+        _ => return None,
+    };
+
+    Some(result)
+}
+
+/// Calculate kernel `name` for every period of `periods` into a matrix of
+/// shape `(len(data), len(periods))`, or `None` if the kernel could not be
+/// swept
+#[pyfunction]
+pub fn calc_sweep<'py>(
+    py: Python<'py>,
+    name: &str,
+    data: PyReadonlyArray1<'py, f64>,
+    periods: Vec<usize>,
+    params: Vec<Bound<'py, PyAny>>,
+) -> PyResult<Option<Bound<'py, PyArray2<f64>>>> {
+    let params = params
+        .iter()
+        .map(Param::extract)
+        .collect::<PyResult<Vec<_>>>()?;
+
+    let data = data.as_array();
+
+    Ok(sweep_kernel(name, data, &periods, &params).map(|result| result.into_pyarray(py)))
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use ndarray::array;
+
+    use super::super::trend_following::ewma_internal;
+    use super::super::overbought_oversold::rsi_internal;
+
+    #[test]
+    fn test_sweep_ema_rsi_identical() {
+        let data = array![1.0, f64::NAN, 3.0, 2.0, 5.0, 4.0, 4.0, 7.0, 6.0, 8.0];
+        let periods = [2, 3, 5];
+
+        let ema = sweep_ema(data.view(), &periods);
+        let rsi = sweep_rsi(data.view(), &periods);
+
+        for (j, &period) in periods.iter().enumerate() {
+            let expected = ewma_internal(data.view(), period);
+            let expected_rsi = rsi_internal(data.view(), period);
+
+            for i in 0..data.len() {
+                assert_eq!(ema[[i, j]].to_bits(), expected[i].to_bits());
+                assert_eq!(rsi[[i, j]].to_bits(), expected_rsi[i].to_bits());
+            }
+        }
+    }
+
+    #[test]
+    fn test_sweep_ma_hhv() {
+        let data = array![1.0, 2.0, f64::NAN, 4.0, 5.0, 3.0, 7.0, 1.0];
+        let periods = [1, 2, 3, 5, 9];
+
+        let ma = sweep_boll(data.view(), &periods, 0.0);
+        let hhv = sweep_extremum(data.view(), &periods, true);
+
+        for (j, &period) in periods.iter().enumerate() {
+            let expected = simd::sma(data.view(), period);
+            let expected_hhv = simd::rolling_max(data.view(), period);
+
+            for i in 0..data.len() {
+                if expected[i].is_nan() {
+                    assert!(ma[[i, j]].is_nan());
+                } else {
+                    assert!((ma[[i, j]] - expected[i]).abs() < 1e-12);
+                }
+
+                assert_eq!(hhv[[i, j]].to_bits(), expected_hhv[i].to_bits());
+            }
+        }
+    }
+}
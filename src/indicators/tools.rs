@@ -4,27 +4,27 @@
 //! - style: Candlestick style (bullish/bearish)
 //! - repeat: Check if condition repeats
 //! - change: Percentage change
+//! - prefix sums: Compensated cumulative sums
 
 use pyo3::prelude::*;
 use numpy::{PyArray1, PyReadonlyArray1, IntoPyArray};
-use ndarray::Array1;
+use ndarray::{Array1, ArrayView1};
 
-/// Check if values are increasing/decreasing in a rolling window
-#[pyfunction]
-pub fn calc_increase<'py>(
-    py: Python<'py>,
-    data: PyReadonlyArray1<'py, f64>,
+use crate::simd;
+
+/// Internal function for the increase check
+pub(crate) fn increase_internal(
+    data: ArrayView1<f64>,
     repeat: usize,
     direction: i32,
-) -> PyResult<Bound<'py, PyArray1<bool>>> {
-    let data = data.as_array();
+) -> Array1<bool> {
     let n = data.len();
     let period = repeat + 1;
 
     let mut result = Array1::from_elem(n, false);
 
     if period > n {
-        return Ok(result.into_pyarray(py));
+        return result;
     }
 
     for i in (period - 1)..n {
@@ -48,19 +48,28 @@ pub fn calc_increase<'py>(
         result[i] = is_increasing;
     }
 
-    Ok(result.into_pyarray(py))
+    result
 }
 
-/// Calculate candlestick style (bullish or bearish)
+/// Check if values are increasing/decreasing in a rolling window
 #[pyfunction]
-pub fn calc_style<'py>(
+pub fn calc_increase<'py>(
     py: Python<'py>,
-    style: &str,
-    open: PyReadonlyArray1<'py, f64>,
-    close: PyReadonlyArray1<'py, f64>,
+    data: PyReadonlyArray1<'py, f64>,
+    repeat: usize,
+    direction: i32,
 ) -> PyResult<Bound<'py, PyArray1<bool>>> {
-    let open = open.as_array();
-    let close = close.as_array();
+    let data = data.as_array();
+    let result = increase_internal(data, repeat, direction);
+    Ok(result.into_pyarray(py))
+}
+
+/// Internal function for candlestick style calculation
+pub(crate) fn style_internal(
+    style: &str,
+    open: ArrayView1<f64>,
+    close: ArrayView1<f64>,
+) -> PyResult<Array1<bool>> {
     let n = open.len();
 
     let mut result = Array1::from_elem(n, false);
@@ -83,29 +92,36 @@ pub fn calc_style<'py>(
         }
     }
 
-    Ok(result.into_pyarray(py))
+    Ok(result)
 }
 
-/// Check if a boolean condition repeats for n periods
+/// Calculate candlestick style (bullish or bearish)
 #[pyfunction]
-pub fn calc_repeat<'py>(
+pub fn calc_style<'py>(
     py: Python<'py>,
-    data: PyReadonlyArray1<'py, bool>,
-    repeat: usize,
+    style: &str,
+    open: PyReadonlyArray1<'py, f64>,
+    close: PyReadonlyArray1<'py, f64>,
 ) -> PyResult<Bound<'py, PyArray1<bool>>> {
-    let data = data.as_array();
+    let open = open.as_array();
+    let close = close.as_array();
+    let result = style_internal(style, open, close)?;
+    Ok(result.into_pyarray(py))
+}
+
+/// Internal function for the repeat check
+pub(crate) fn repeat_internal(data: ArrayView1<bool>, repeat: usize) -> Array1<bool> {
     let n = data.len();
 
     if repeat == 1 {
         // Just return a copy
-        let result: Array1<bool> = data.to_owned();
-        return Ok(result.into_pyarray(py));
+        return data.to_owned();
     }
 
     let mut result = Array1::from_elem(n, false);
 
     if repeat > n {
-        return Ok(result.into_pyarray(py));
+        return result;
     }
 
     for i in (repeat - 1)..n {
@@ -119,17 +135,23 @@ pub fn calc_repeat<'py>(
         result[i] = all_true;
     }
 
-    Ok(result.into_pyarray(py))
+    result
 }
 
-/// Calculate percentage change
+/// Check if a boolean condition repeats for n periods
 #[pyfunction]
-pub fn calc_change<'py>(
+pub fn calc_repeat<'py>(
     py: Python<'py>,
-    data: PyReadonlyArray1<'py, f64>,
-    period: usize,
-) -> PyResult<Bound<'py, PyArray1<f64>>> {
+    data: PyReadonlyArray1<'py, bool>,
+    repeat: usize,
+) -> PyResult<Bound<'py, PyArray1<bool>>> {
     let data = data.as_array();
+    let result = repeat_internal(data, repeat);
+    Ok(result.into_pyarray(py))
+}
+
+/// Internal function for percentage change calculation
+pub(crate) fn change_internal(data: ArrayView1<f64>, period: usize) -> Array1<f64> {
     let n = data.len();
     let shift = period - 1;
 
@@ -142,6 +164,31 @@ pub fn calc_change<'py>(
         }
     }
 
+    result
+}
+
+/// Calculate percentage change
+#[pyfunction]
+pub fn calc_change<'py>(
+    py: Python<'py>,
+    data: PyReadonlyArray1<'py, f64>,
+    period: usize,
+) -> PyResult<Bound<'py, PyArray1<f64>>> {
+    let data = data.as_array();
+    let result = change_internal(data, period);
     Ok(result.into_pyarray(py))
 }
 
+/// Calculate compensated prefix sums, continued from the running sum `hi`
+/// and its compensation `lo`
+#[pyfunction]
+pub fn calc_prefix_sums<'py>(
+    py: Python<'py>,
+    data: PyReadonlyArray1<'py, f64>,
+    hi: f64,
+    lo: f64,
+) -> PyResult<(Bound<'py, PyArray1<f64>>, Bound<'py, PyArray1<f64>>)> {
+    let data = data.as_array();
+    let (sums, comps) = simd::prefix_sums(data, hi, lo);
+    Ok((sums.into_pyarray(py), comps.into_pyarray(py)))
+}
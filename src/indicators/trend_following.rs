@@ -32,10 +32,15 @@ pub fn calc_ewma<'py>(
     period: usize,
 ) -> PyResult<Bound<'py, PyArray1<f64>>> {
     let data = data.as_array();
+    let result = ewma_internal(data, period);
+    Ok(result.into_pyarray(py))
+}
+
+/// Internal function for EMA calculation
+pub(crate) fn ewma_internal(data: ArrayView1<f64>, period: usize) -> Array1<f64> {
     // EMA uses com = (period - 1) / 2
     let com = (period as f64 - 1.0) / 2.0;
-    let result = simd::ewma_com(data, com, true, false, period);
-    Ok(result.into_pyarray(py))
+    simd::ewma_com(data, com, true, false, period)
 }
 
 /// Calculate Smoothed Moving Average
@@ -50,8 +55,35 @@ pub fn calc_smma<'py>(
     Ok(result.into_pyarray(py))
 }
 
+/// The state of an EWMA after some values:
+/// (weighted average, weight of the previous values, count of observations)
+pub type EwmState = (f64, f64, usize);
+
+/// Calculate EWMA with center-of-mass `com` (adjust=True, ignore_na=False),
+/// which continues from `state` if provided, and returns the averages of
+/// `data` along with the state after the last value
+#[pyfunction]
+#[pyo3(signature = (data, com, min_periods, state=None))]
+pub fn calc_ewm_state<'py>(
+    py: Python<'py>,
+    data: PyReadonlyArray1<'py, f64>,
+    com: f64,
+    min_periods: usize,
+    state: Option<EwmState>,
+) -> PyResult<(Bound<'py, PyArray1<f64>>, EwmState)> {
+    let mut ewma = simd::Ewma::new(com, true, false, min_periods);
+
+    if let Some((weighted_avg, old_wt, nobs)) = state {
+        ewma = ewma.resume(weighted_avg, old_wt, nobs);
+    }
+
+    let result = ewma.feed(data.as_array());
+
+    Ok((result.into_pyarray(py), (ewma.weighted_avg, ewma.old_wt, ewma.nobs)))
+}
+
 /// Internal function for MACD calculation
-fn macd_internal(data: ArrayView1<f64>, fast_period: usize, slow_period: usize) -> Array1<f64> {
+pub(crate) fn macd_internal(data: ArrayView1<f64>, fast_period: usize, slow_period: usize) -> Array1<f64> {
     let com_fast = (fast_period as f64 - 1.0) / 2.0;
     let com_slow = (slow_period as f64 - 1.0) / 2.0;
 
@@ -84,10 +116,20 @@ pub fn calc_macd_signal<'py>(
     signal_period: usize,
 ) -> PyResult<Bound<'py, PyArray1<f64>>> {
     let data = data.as_array();
+    let result = macd_signal_internal(data, fast_period, slow_period, signal_period);
+    Ok(result.into_pyarray(py))
+}
+
+/// Internal function for MACD Signal line calculation
+pub(crate) fn macd_signal_internal(
+    data: ArrayView1<f64>,
+    fast_period: usize,
+    slow_period: usize,
+    signal_period: usize,
+) -> Array1<f64> {
     let macd = macd_internal(data, fast_period, slow_period);
     let com_signal = (signal_period as f64 - 1.0) / 2.0;
-    let result = simd::ewma_com(macd.view(), com_signal, true, false, signal_period);
-    Ok(result.into_pyarray(py))
+    simd::ewma_com(macd.view(), com_signal, true, false, signal_period)
 }
 
 /// Calculate MACD Histogram
@@ -100,13 +142,23 @@ pub fn calc_macd_histogram<'py>(
     signal_period: usize,
 ) -> PyResult<Bound<'py, PyArray1<f64>>> {
     let data = data.as_array();
+    let result = macd_histogram_internal(data, fast_period, slow_period, signal_period);
+    Ok(result.into_pyarray(py))
+}
+
+/// Internal function for MACD Histogram calculation
+pub(crate) fn macd_histogram_internal(
+    data: ArrayView1<f64>,
+    fast_period: usize,
+    slow_period: usize,
+    signal_period: usize,
+) -> Array1<f64> {
     let macd = macd_internal(data, fast_period, slow_period);
     let com_signal = (signal_period as f64 - 1.0) / 2.0;
     let signal = simd::ewma_com(macd.view(), com_signal, true, false, signal_period);
 
     // Histogram = 2 * (MACD - Signal)
-    let result = 2.0 * (&macd - &signal);
-    Ok(result.into_pyarray(py))
+    2.0 * (&macd - &signal)
 }
 
 /// Calculate BBI (Bull and Bear Index)
@@ -120,17 +172,28 @@ pub fn calc_bbi<'py>(
     d: usize,
 ) -> PyResult<Bound<'py, PyArray1<f64>>> {
     let data = data.as_array();
+    let result = bbi_internal(data, a, b, c, d);
+    Ok(result.into_pyarray(py))
+}
+
+/// Internal function for BBI calculation
+pub(crate) fn bbi_internal(
+    data: ArrayView1<f64>,
+    a: usize,
+    b: usize,
+    c: usize,
+    d: usize,
+) -> Array1<f64> {
     let ma_a = simd::sma(data, a);
     let ma_b = simd::sma(data, b);
     let ma_c = simd::sma(data, c);
     let ma_d = simd::sma(data, d);
 
-    let result = (&ma_a + &ma_b + &ma_c + &ma_d) / 4.0;
-    Ok(result.into_pyarray(py))
+    (&ma_a + &ma_b + &ma_c + &ma_d) / 4.0
 }
 
 /// Internal function for True Range calculation
-fn tr_internal(
+pub(crate) fn tr_internal(
     high: ArrayView1<f64>,
     low: ArrayView1<f64>,
     close: ArrayView1<f64>,
@@ -180,13 +243,22 @@ pub fn calc_atr<'py>(
     let high = high.as_array();
     let low = low.as_array();
     let close = close.as_array();
+    let result = atr_internal(high, low, close, period);
+    Ok(result.into_pyarray(py))
+}
 
+/// Internal function for ATR calculation
+pub(crate) fn atr_internal(
+    high: ArrayView1<f64>,
+    low: ArrayView1<f64>,
+    close: ArrayView1<f64>,
+    period: usize,
+) -> Array1<f64> {
     // Calculate True Range using internal function
     let tr = tr_internal(high, low, close);
 
     // Calculate MA of TR
-    let result = simd::sma(tr.view(), period);
-    Ok(result.into_pyarray(py))
+    simd::sma(tr.view(), period)
 }
 
 #[cfg(test)]
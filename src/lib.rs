@@ -3,6 +3,9 @@
 //! This crate provides:
 //! - Directive parsing (tokenizer, parser, AST)
 //! - Technical indicator calculations with SIMD optimization
+//! - Whole-directive evaluation
+//! - Batched kernel calls
+//! - Tick-to-bar aggregation and keys of volume, dollar and tick bars
 //! - Python bindings via PyO3
 
 use pyo3::prelude::*;
@@ -10,10 +13,16 @@ use pyo3::prelude::*;
 pub mod directive;
 pub mod indicators;
 pub mod errors;
+pub mod evaluate;
+pub mod batch;
+pub mod bars;
 pub mod simd;
 
 use directive::parse_directive;
 use indicators::register_indicators;
+use evaluate::evaluate_directive;
+use batch::run_kernels;
+use bars::{aggregate_ticks, threshold_keys};
 
 /// A Python module implemented in Rust for stock-pandas
 #[pymodule]
@@ -24,5 +33,15 @@ fn stock_pandas_rs(m: &Bound<'_, PyModule>) -> PyResult<()> {
     // Register indicator calculation functions
     register_indicators(m)?;
 
+    // Register whole-directive evaluation function
+    m.add_function(wrap_pyfunction!(evaluate_directive, m)?)?;
+
+    // Register batched kernel function
+    m.add_function(wrap_pyfunction!(run_kernels, m)?)?;
+
+    // Register tick-to-bar aggregation functions
+    m.add_function(wrap_pyfunction!(aggregate_ticks, m)?)?;
+    m.add_function(wrap_pyfunction!(threshold_keys, m)?)?;
+
     Ok(())
 }
@@ -37,63 +37,104 @@ pub fn sma(data: ArrayView1<f64>, period: usize) -> Array1<f64> {
     result
 }
 
-/// SIMD-optimized exponential weighted moving average with center-of-mass
-/// This matches the pandas implementation used in the original Cython code
-#[inline]
-pub fn ewma_com(
-    data: ArrayView1<f64>,
-    com: f64,
+/// The running state of an exponential weighted moving average, which could
+/// be saved after some values and resumed with more values later
+#[derive(Debug, Clone, Copy)]
+pub struct Ewma {
+    old_wt_factor: f64,
+    new_wt: f64,
     adjust: bool,
     ignore_na: bool,
     min_periods: usize,
-) -> Array1<f64> {
-    let n = data.len();
-    let mut result = Array1::from_elem(n, f64::NAN);
+    started: bool,
+    pub weighted_avg: f64,
+    pub old_wt: f64,
+    pub nobs: usize,
+}
 
-    if n == 0 {
-        return result;
+impl Ewma {
+    pub fn new(com: f64, adjust: bool, ignore_na: bool, min_periods: usize) -> Self {
+        let alpha = 1.0 / (1.0 + com);
+
+        Ewma {
+            old_wt_factor: 1.0 - alpha,
+            new_wt: if adjust { 1.0 } else { alpha },
+            adjust,
+            ignore_na,
+            min_periods: min_periods.max(1),
+            started: false,
+            weighted_avg: f64::NAN,
+            old_wt: 1.0,
+            nobs: 0,
+        }
     }
 
-    let min_periods = min_periods.max(1);
-    let alpha = 1.0 / (1.0 + com);
-    let old_wt_factor = 1.0 - alpha;
-    let new_wt = if adjust { 1.0 } else { alpha };
+    /// Continue from the state after some previous values
+    pub fn resume(mut self, weighted_avg: f64, old_wt: f64, nobs: usize) -> Self {
+        self.started = true;
+        self.weighted_avg = weighted_avg;
+        self.old_wt = old_wt;
+        self.nobs = nobs;
+        self
+    }
 
-    let mut weighted_avg = data[0];
-    let mut is_observation = !weighted_avg.is_nan();
-    let mut nobs = if is_observation { 1 } else { 0 };
-    result[0] = if nobs >= min_periods { weighted_avg } else { f64::NAN };
-    let mut old_wt = 1.0;
+    /// Feed the next value, and get the average, or NaN if there are not
+    /// enough observations
+    #[inline]
+    pub fn update(&mut self, cur: f64) -> f64 {
+        let is_observation = !cur.is_nan();
 
-    for i in 1..n {
-        let cur = data[i];
-        is_observation = !cur.is_nan();
         if is_observation {
-            nobs += 1;
+            self.nobs += 1;
         }
 
-        if !weighted_avg.is_nan() {
-            if is_observation || !ignore_na {
-                old_wt *= old_wt_factor;
+        if !self.started {
+            self.started = true;
+            self.weighted_avg = cur;
+        } else if !self.weighted_avg.is_nan() {
+            if is_observation || !self.ignore_na {
+                self.old_wt *= self.old_wt_factor;
                 if is_observation {
-                    if weighted_avg != cur {
-                        weighted_avg = (old_wt * weighted_avg + new_wt * cur) / (old_wt + new_wt);
+                    if self.weighted_avg != cur {
+                        self.weighted_avg = (self.old_wt * self.weighted_avg + self.new_wt * cur)
+                            / (self.old_wt + self.new_wt);
                     }
-                    if adjust {
-                        old_wt += new_wt;
+                    if self.adjust {
+                        self.old_wt += self.new_wt;
                     } else {
-                        old_wt = 1.0;
+                        self.old_wt = 1.0;
                     }
                 }
             }
         } else if is_observation {
-            weighted_avg = cur;
+            self.weighted_avg = cur;
         }
 
-        result[i] = if nobs >= min_periods { weighted_avg } else { f64::NAN };
+        if self.nobs >= self.min_periods {
+            self.weighted_avg
+        } else {
+            f64::NAN
+        }
     }
 
-    result
+    /// Feed the values, and get the averages
+    pub fn feed(&mut self, data: ArrayView1<f64>) -> Array1<f64> {
+        // Iterate in the logical order, which is required by the recursion
+        Array1::from_iter(data.iter().map(|&cur| self.update(cur)))
+    }
+}
+
+/// SIMD-optimized exponential weighted moving average with center-of-mass
+/// This matches the pandas implementation used in the original Cython code
+#[inline]
+pub fn ewma_com(
+    data: ArrayView1<f64>,
+    com: f64,
+    adjust: bool,
+    ignore_na: bool,
+    min_periods: usize,
+) -> Array1<f64> {
+    Ewma::new(com, adjust, ignore_na, min_periods).feed(data)
 }
 
 /// SIMD-optimized smoothed moving average (SMMA/MMA)
@@ -214,11 +255,55 @@ pub fn diff(data: ArrayView1<f64>) -> Array1<f64> {
     result
 }
 
+/// Compensated (Neumaier) prefix sums, continued from the running sum `hi`
+/// and its compensation `lo`.
+///
+/// Returns the running sums and compensations after each item
+#[inline]
+pub fn prefix_sums(data: ArrayView1<f64>, hi: f64, lo: f64) -> (Array1<f64>, Array1<f64>) {
+    let n = data.len();
+    let mut sums = Array1::zeros(n);
+    let mut comps = Array1::zeros(n);
+
+    let mut sum = hi;
+    let mut comp = lo;
+
+    for i in 0..n {
+        let x = data[i];
+        let t = sum + x;
+
+        if sum.abs() >= x.abs() {
+            comp += (sum - t) + x;
+        } else {
+            comp += (x - t) + sum;
+        }
+
+        sum = t;
+        sums[i] = sum;
+        comps[i] = comp;
+    }
+
+    (sums, comps)
+}
+
 #[cfg(test)]
 mod tests {
     use super::*;
     use ndarray::array;
 
+    #[test]
+    fn test_prefix_sums() {
+        let data = array![1e16, 1.0, -1e16, 1.0];
+        let (sums, comps) = prefix_sums(data.view(), 0.0, 0.0);
+
+        assert_eq!(sums[3] + comps[3], 2.0);
+
+        // Continue from the previous state
+        let (sums2, comps2) = prefix_sums(data.slice(ndarray::s![2..]), sums[1], comps[1]);
+        assert_eq!(sums2[1], sums[3]);
+        assert_eq!(comps2[1], comps[3]);
+    }
+
     #[test]
     fn test_sma() {
         let data = array![1.0, 2.0, 3.0, 4.0, 5.0];
@@ -1,4 +1,7 @@
 from .dataframe import StockDataFrame
+from .stream import StockStream
+from .frames import MultiTimeFrame
+from .snapshot import Snapshot
 
 from .exceptions import (
     DirectiveSyntaxError,
@@ -23,6 +26,12 @@ from .meta.time_frame import (
     TimeFrame,
     TimeFrameArg
 )
+from .meta.bars import (
+    ThresholdBars,
+    TickBars,
+    VolumeBars,
+    DollarBars
+)
 
 from .meta.cumulator import (
     Cumulator,
@@ -38,5 +47,10 @@ from .backend import (
     use_rust
 )
 
+from .precision import (
+    set_lookback_tolerance,
+    get_lookback_tolerance
+)
+
 from importlib.metadata import version as _get_version
 __version__ = _get_version('stock-pandas')
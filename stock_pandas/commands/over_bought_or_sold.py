@@ -2,7 +2,10 @@
 # Indicators to show overbought or oversold position
 # ----------------------------------------------------
 from typing import (
-    Iterator
+    Iterator,
+    Optional,
+    Tuple,
+    cast
 )
 
 import numpy as np
@@ -14,7 +17,9 @@ from stock_pandas.common import (
 )
 
 from stock_pandas.math.ma import (
-    calc_smma
+    calc_smma_state,
+    ewm_lookback,
+    EwmaState
 )
 
 from stock_pandas.directive.command import CommandDefinition
@@ -30,7 +35,6 @@ from .common import (
     arg_period,
     arg_period_14,
     lookback_period,
-    lookback_a_lot,
     create_series_args,
     series_close
 )
@@ -68,7 +72,8 @@ preset_llv = CommandPreset(
     formula=llv,
     lookback=lookback_period,
     args=[arg_period],
-    series=create_series_args(['low'])
+    series=create_series_args(['low']),
+    native='llv'
 )
 BUILTIN_COMMANDS['llv'] = CommandDefinition(preset_llv)
 
@@ -89,7 +94,8 @@ preset_hhv = CommandPreset(
     formula=hhv,
     lookback=lookback_period,
     args=[arg_period],
-    series=create_series_args(['high'])
+    series=create_series_args(['high']),
+    native='hhv'
 )
 BUILTIN_COMMANDS['hhv'] = CommandDefinition(preset_hhv)
 
@@ -121,7 +127,8 @@ BUILTIN_COMMANDS['donchian'] = CommandDefinition(
         formula=donchian,
         lookback=lookback_period,
         args=[arg_period],
-        series=create_series_args(['high', 'low'])
+        series=create_series_args(['high', 'low']),
+        native='donchian'
     ),
     dict(
         upper=preset_hhv,
@@ -174,7 +181,8 @@ BUILTIN_COMMANDS['rsv'] = CommandDefinition(
         formula=rsv,
         lookback=lookback_period,
         args=[arg_period],
-        series=series_rsv
+        series=series_rsv,
+        native='rsv'
     )
 )
 
@@ -306,6 +314,119 @@ def kdj_j(
     return KDJ_WEIGHT_K * k_series - KDJ_WEIGHT_D * d_series
 
 
+# The last `period_rsv - 1` rows of high, low and close for the next RSV,
+# and the last values of K and D (`None` if D is not calculated)
+KdjState = Tuple[
+    np.ndarray, np.ndarray, np.ndarray, float, Optional[float]
+]
+
+
+def _kdj_stateful(
+    period_rsv: int,
+    period_k: int,
+    period_d: Optional[int],
+    init: float,
+    high_series: ReturnType,
+    low_series: ReturnType,
+    close_series: ReturnType,
+    state: Optional[KdjState]
+) -> Tuple[ReturnType, Optional[ReturnType], KdjState]:
+    empty = np.empty(0)
+
+    high_tail, low_tail, close_tail, k, d = (
+        (empty, empty, empty, init, init)
+        if state is None
+        else state
+    )
+
+    high_series = np.concatenate((high_tail, high_series))
+    low_series = np.concatenate((low_tail, low_series))
+    close_series = np.concatenate((close_tail, close_series))
+
+    # RSV only depends on the rows inside the rolling window
+    rsv_series = rsv(
+        period_rsv, high_series, low_series, close_series
+    )[len(close_tail):]
+
+    k_series = np.fromiter(ewma(rsv_series, period_k, k), float)
+    d_series = None
+
+    if period_d is not None:
+        d_series = np.fromiter(
+            ewma(k_series, period_d, init if d is None else d),
+            float
+        )
+
+    keep = max(len(close_series) - period_rsv + 1, 0)
+
+    return k_series, d_series, (
+        high_series[keep:],
+        low_series[keep:],
+        close_series[keep:],
+        k_series[-1] if len(k_series) else k,
+        None if d_series is None else (
+            d_series[-1] if len(d_series) else d
+        )
+    )
+
+
+def kdj_k_stateful(
+    period_rsv: int,
+    period_k: int,
+    init: float,
+    high_series: ReturnType,
+    low_series: ReturnType,
+    close_series: ReturnType,
+    state: Optional[KdjState]
+) -> Tuple[ReturnType, KdjState]:
+    k_series, _, state = _kdj_stateful(
+        period_rsv, period_k, None, init,
+        high_series, low_series, close_series, state
+    )
+
+    return k_series, state
+
+
+def kdj_d_stateful(
+    period_rsv: int,
+    period_k: int,
+    period_d: int,
+    init: float,
+    high_series: ReturnType,
+    low_series: ReturnType,
+    close_series: ReturnType,
+    state: Optional[KdjState]
+) -> Tuple[ReturnType, KdjState]:
+    _, d_series, state = _kdj_stateful(
+        period_rsv, period_k, period_d, init,
+        high_series, low_series, close_series, state
+    )
+
+    # `d_series` is always calculated with `period_d`
+    return cast(ReturnType, d_series), state
+
+
+def kdj_j_stateful(
+    period_rsv: int,
+    period_k: int,
+    period_d: int,
+    init: float,
+    high_series: ReturnType,
+    low_series: ReturnType,
+    close_series: ReturnType,
+    state: Optional[KdjState]
+) -> Tuple[ReturnType, KdjState]:
+    k_series, d_series, state = _kdj_stateful(
+        period_rsv, period_k, period_d, init,
+        high_series, low_series, close_series, state
+    )
+
+    return (
+        KDJ_WEIGHT_K * k_series
+        - KDJ_WEIGHT_D * cast(ReturnType, d_series)
+    ), state
+
+
 def init_to_float(raw_value: CommandArgInputType) -> float:
     try:
         value = float(raw_value)
@@ -322,6 +443,20 @@ def init_to_float(raw_value: CommandArgInputType) -> float:
     return value
 
 
+def lookback_kdj_k(period_rsv: int, period_k: int, *_) -> int:
+    return period_rsv - 1 + ewm_lookback(1. / period_k)
+
+
+def lookback_kdj_dj(
+    period_rsv: int,
+    period_k: int,
+    period_d: int,
+    *_
+) -> int:
+    # D is the EWMA of K
+    return period_rsv - 1 + ewm_lookback(1. / period_k, 1. / period_d)
+
+
 arg_period_k = CommandArg(3, period_to_int)
 args_kdj_common = [
     # period of rsv
@@ -346,24 +481,29 @@ BUILTIN_COMMANDS['kdj'] = CommandDefinition(
     sub_commands={
         'k': CommandPreset(
             formula=kdj_k,
-            # KDJ needs more lookback to warm up ewma
-            lookback=lookback_a_lot,
+            lookback=lookback_kdj_k,
             args=args_k,
-            series=series_rsv
+            series=series_rsv,
+            native='kdj.k',
+            stateful_formula=kdj_k_stateful
         ),
 
         'd': CommandPreset(
             formula=kdj_d,
-            lookback=lookback_a_lot,
+            lookback=lookback_kdj_dj,
             args=args_dj,
-            series=series_rsv
+            series=series_rsv,
+            native='kdj.d',
+            stateful_formula=kdj_d_stateful
         ),
 
         'j': CommandPreset(
             formula=kdj_j,
-            lookback=lookback_a_lot,
+            lookback=lookback_kdj_dj,
             args=args_dj,
-            series=series_rsv
+            series=series_rsv,
+            native='kdj.j',
+            stateful_formula=kdj_j_stateful
         )
     }
 )
@@ -380,22 +520,60 @@ def rsi(period: int, close_series: ReturnType) -> ReturnType:
     if use_rust():
         return np.asarray(_rs_rsi(close_series.astype(float), period))
 
-    delta = np.diff(close_series, prepend=np.nan)
+    return rsi_stateful(period, close_series, None)[0]
+
 
-    # gain
-    U = (np.absolute(delta) + delta) / 2.
-    # loss
-    D = (np.absolute(delta) - delta) / 2.
+# The last close, and the SMMA states of gains and losses
+RsiState = Tuple[float, EwmaState, EwmaState]
 
-    smma_u = calc_smma(U, period)
-    smma_d = calc_smma(D, period)
 
-    return 100 - 100 / (1. + smma_u / smma_d)
+def rsi_stateful(
+    period: int,
+    close_series: ReturnType,
+    state: Optional[RsiState]
+) -> Tuple[ReturnType, RsiState]:
+    prev_close, smma_u_state, smma_d_state = (
+        (np.nan, None, None) if state is None else state
+    )
+
+    close_series = close_series.astype(float)
+    delta = np.diff(close_series, prepend=prev_close)
+
+    if use_rust():
+        # The same as `rsi_internal` of stock_pandas_rs
+        U = np.maximum(delta, 0.)
+        D = np.maximum(- delta, 0.)
+    else:
+        # gain
+        U = (np.absolute(delta) + delta) / 2.
+        # loss
+        D = (np.absolute(delta) - delta) / 2.
+
+    smma_u, smma_u_state = calc_smma_state(U, period, smma_u_state)
+    smma_d, smma_d_state = calc_smma_state(D, period, smma_d_state)
+
+    if use_rust():
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = np.where(
+                np.abs(smma_d) < 1e-10,
+                100.,
+                100 - 100 / (1. + smma_u / smma_d)
+            )
+
+        result[np.isnan(smma_u) | np.isnan(smma_d)] = np.nan
+    else:
+        result = 100 - 100 / (1. + smma_u / smma_d)
+
+    return result, (
+        close_series[-1] if len(close_series) else prev_close,
+        smma_u_state,
+        smma_d_state
+    )
 
 
 def lookback_rsi(period: int) -> int:
     # period - 1 + 1 (diff)
-    return period
+    return max(period, 1 + ewm_lookback(1. / period))
 
 
 BUILTIN_COMMANDS['rsi'] = CommandDefinition(
@@ -403,6 +581,8 @@ BUILTIN_COMMANDS['rsi'] = CommandDefinition(
         formula=rsi,
         lookback=lookback_rsi,
         args=[arg_period_14],
-        series=series_close
+        series=series_close,
+        native='rsi',
+        stateful_formula=rsi_stateful
     )
 )
@@ -13,6 +13,8 @@ from stock_pandas.common import (
     rolling_calc
 )
 
+from stock_pandas.math.prefix_sums import Rolling
+
 from stock_pandas.directive.command import CommandDefinition
 from stock_pandas.directive.types import (
     ReturnType,
@@ -92,6 +94,25 @@ def boll_band(
         return np.subtract(ma_series, np.multiply(times, mstd))
 
 
+def boll_prefix(period: int, rolling: Rolling) -> ReturnType:
+    return rolling.mean(period)
+
+
+def boll_band_prefix(
+    upper: bool,
+    period: int,
+    times: float,
+    rolling: Rolling
+) -> ReturnType:
+    ma_series = rolling.mean(period)
+    mstd = rolling.std(period)
+
+    if upper:
+        return ma_series + times * mstd
+    else:
+        return ma_series - times * mstd
+
+
 arg_boll_period = CommandArg(20, period_to_int)
 args_boll = [
     arg_boll_period
@@ -106,20 +127,26 @@ BUILTIN_COMMANDS['boll'] = CommandDefinition(
         formula=boll,
         lookback=lookback_period,
         args=args_boll,
-        series=series_close
+        series=series_close,
+        native='boll',
+        prefix_formula=boll_prefix
     ),
     {
         'upper': CommandPreset(
             formula=partial[ReturnType](boll_band, True),
             lookback=lookback_period,
             args=args_boll_band,
-            series=series_close
+            series=series_close,
+            native='boll.upper',
+            prefix_formula=partial[ReturnType](boll_band_prefix, True)
         ),
         'lower': CommandPreset(
             formula=partial[ReturnType](boll_band, False),
             lookback=lookback_period,
             args=args_boll_band,
-            series=series_close
+            series=series_close,
+            native='boll.lower',
+            prefix_formula=partial[ReturnType](boll_band_prefix, False)
         )
     },
     {
@@ -147,12 +174,18 @@ def bbw(
     )
 
 
+def bbw_prefix(period: int, rolling: Rolling) -> ReturnType:
+    return 4 * rolling.std(period) / rolling.mean(period)
+
+
 BUILTIN_COMMANDS['bbw'] = CommandDefinition(
     CommandPreset(
         formula=bbw,
         lookback=lookback_period,
         args=args_boll,
-        series=series_close
+        series=series_close,
+        native='bbw',
+        prefix_formula=bbw_prefix
     )
 )
 
@@ -229,6 +262,7 @@ BUILTIN_COMMANDS['hv'] = CommandDefinition(
             CommandArg(DAY_MINUTES, time_frame_to_minutes),
             CommandArg(252, trading_days_to_int)
         ],
-        series=series_close
+        series=series_close,
+        native='hv'
     )
 )
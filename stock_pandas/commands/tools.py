@@ -23,13 +23,19 @@ from stock_pandas.directive.command import (
 from stock_pandas.directive.types import (
     ReturnType,
     CommandPreset,
-    CommandArg
+    CommandArg,
+    COMMAND_TIME_FRAME_NAME
+)
+from stock_pandas.meta.time_frame import (
+    TimeFrame,
+    ensure_time_frame
 )
 from .base import BUILTIN_COMMANDS
 
 from .common import (
     lookback_period,
     create_series_args,
+    series_close,
     series_required
 )
 
@@ -93,7 +99,8 @@ BUILTIN_COMMANDS['increase'] = CommandDefinition(
             arg_repeat,
             CommandArg(1, to_direction)
         ],
-        series=series_required
+        series=series_required,
+        native='increase'
     )
 )
 
@@ -125,7 +132,8 @@ BUILTIN_COMMANDS['style'] = CommandDefinition(
         args=[
             CommandArg(coerce=style_enums)
         ],
-        series=create_series_args(['open', 'close'])
+        series=create_series_args(['open', 'close']),
+        native='style'
     )
 )
 
@@ -161,7 +169,8 @@ BUILTIN_COMMANDS['repeat'] = CommandDefinition(
         formula=repeat,
         lookback=lookback_period,
         args=[arg_repeat],
-        series=series_required
+        series=series_required,
+        native='repeat'
     )
 )
 
@@ -189,6 +198,27 @@ BUILTIN_COMMANDS['change'] = CommandDefinition(
         formula=change,
         lookback=lookback_period,
         args=[CommandArg(2, period_to_int)],
-        series=series_required
+        series=series_required,
+        native='change'
+    )
+)
+
+
+def time_frame(
+    _: TimeFrame,
+    series: ReturnType
+) -> ReturnType:
+    """Gets the series which has been calculated on the higher time frame and aligned to the rows
+    """
+
+    return series
+
+
+BUILTIN_COMMANDS[COMMAND_TIME_FRAME_NAME] = CommandDefinition(
+    CommandPreset(
+        formula=time_frame,
+        lookback=lookback_zero,
+        args=[CommandArg(coerce=ensure_time_frame)],
+        series=series_close
     )
 )
@@ -2,6 +2,11 @@
 # Trend-following momentum indicators
 # ----------------------------------------------------
 
+from typing import (
+    Optional,
+    Tuple
+)
+
 import numpy as np
 
 from stock_pandas.backend import use_rust, is_rust_available
@@ -11,9 +16,14 @@ from stock_pandas.common import (
 
 from stock_pandas.math.ma import (
     calc_ma,
-    calc_ewma
+    calc_ewma,
+    calc_ewma_state,
+    ewm_lookback,
+    EwmaState
 )
 
+from stock_pandas.math.prefix_sums import Rolling
+
 from stock_pandas.directive.command import CommandDefinition
 from stock_pandas.directive.types import (
     ReturnType,
@@ -61,6 +71,10 @@ def ma(period: int, on: ReturnType) -> ReturnType:
     return calc_ma(on, period)
 
 
+def ma_prefix(period: int, rolling: Rolling) -> ReturnType:
+    return rolling.mean(period)
+
+
 args_ma = [arg_period]
 
 BUILTIN_COMMANDS['ma'] = CommandDefinition(
@@ -68,7 +82,9 @@ BUILTIN_COMMANDS['ma'] = CommandDefinition(
         formula=ma,
         lookback=lookback_period,
         args=args_ma,
-        series=series_close
+        series=series_close,
+        native='ma',
+        prefix_formula=ma_prefix
     )
 )
 
@@ -83,12 +99,30 @@ def ema(period: int, series: ReturnType) -> ReturnType:
     return calc_ewma(series, period)
 
 
+def ema_alpha(period: int) -> float:
+    return 2. / (period + 1.)
+
+
+def lookback_ema(period: int) -> int:
+    return max(period - 1, ewm_lookback(ema_alpha(period)))
+
+
+def ema_stateful(
+    period: int,
+    series: ReturnType,
+    state: Optional[EwmaState]
+) -> Tuple[ReturnType, EwmaState]:
+    return calc_ewma_state(series, period, state)
+
+
 BUILTIN_COMMANDS['ema'] = CommandDefinition(
     CommandPreset(
         formula=ema,
-        lookback=lookback_period,
+        lookback=lookback_ema,
         args=args_ma,
-        series=series_close
+        series=series_close,
+        native='ema',
+        stateful_formula=ema_stateful
     )
 )
 
@@ -111,8 +145,29 @@ def macd(
 
     return fast - slow
 
+MacdState = Tuple[EwmaState, EwmaState]
+
+
+def macd_stateful(
+    fast_period: int,
+    slow_period: int,
+    series: ReturnType,
+    state: Optional[MacdState]
+) -> Tuple[ReturnType, MacdState]:
+    fast_state, slow_state = (None, None) if state is None else state
+
+    fast, fast_state = calc_ewma_state(series, fast_period, fast_state)
+    slow, slow_state = calc_ewma_state(series, slow_period, slow_state)
+
+    return fast - slow, (fast_state, slow_state)
+
+
 def lookback_macd(fast_period: int, slow_period: int) -> int:
-    return max(fast_period, slow_period) - 1
+    return max(
+        max(fast_period, slow_period) - 1,
+        lookback_ema(fast_period),
+        lookback_ema(slow_period)
+    )
 
 
 def macd_signal(
@@ -130,10 +185,53 @@ def macd_signal(
 
     return calc_ewma(macd_series, signal_period)
 
+MacdSignalState = Tuple[MacdState, EwmaState]
+
+
+def _macd_signal_stateful(
+    fast_period: int,
+    slow_period: int,
+    signal_period: int,
+    series: ReturnType,
+    state: Optional[MacdSignalState]
+) -> Tuple[ReturnType, ReturnType, MacdSignalState]:
+    macd_state, signal_state = (None, None) if state is None else state
+
+    macd_series, macd_state = macd_stateful(
+        fast_period, slow_period, series, macd_state
+    )
+    signal_series, signal_state = calc_ewma_state(
+        macd_series, signal_period, signal_state
+    )
+
+    return macd_series, signal_series, (macd_state, signal_state)
+
+
+def macd_signal_stateful(
+    fast_period: int,
+    slow_period: int,
+    signal_period: int,
+    series: ReturnType,
+    state: Optional[MacdSignalState]
+) -> Tuple[ReturnType, MacdSignalState]:
+    _, signal_series, state = _macd_signal_stateful(
+        fast_period, slow_period, signal_period, series, state
+    )
+
+    return signal_series, state
+
+
 def lookback_macd_signal(
     fast_period: int, slow_period: int, signal_period: int
 ) -> int:
-    return max(fast_period, slow_period) + signal_period - 2
+    signal_alpha = ema_alpha(signal_period)
+
+    return max(
+        max(fast_period, slow_period) + signal_period - 2,
+        # The EMA of the signal is applied to the EMAs of macd
+        ewm_lookback(ema_alpha(fast_period), signal_alpha),
+        ewm_lookback(ema_alpha(slow_period), signal_alpha)
+    )
 
 
 MACD_HISTOGRAM_TIMES = 2.0
@@ -158,6 +256,20 @@ def macd_histogram(
     return MACD_HISTOGRAM_TIMES * (macd_series - macd_signal_series)
 
 
+def macd_histogram_stateful(
+    fast_period: int,
+    slow_period: int,
+    signal_period: int,
+    series: ReturnType,
+    state: Optional[MacdSignalState]
+) -> Tuple[ReturnType, MacdSignalState]:
+    macd_series, signal_series, state = _macd_signal_stateful(
+        fast_period, slow_period, signal_period, series, state
+    )
+
+    return MACD_HISTOGRAM_TIMES * (macd_series - signal_series), state
+
+
 args_macd =[
     # Fast period
     CommandArg(12, period_to_int),
@@ -175,20 +287,26 @@ BUILTIN_COMMANDS['macd'] = CommandDefinition(
         formula=macd,
         lookback=lookback_macd,
         args=args_macd,
-        series=series_close
+        series=series_close,
+        native='macd',
+        stateful_formula=macd_stateful
     ),
     dict(
         signal=CommandPreset(
             formula=macd_signal,
             lookback=lookback_macd_signal,
             args=args_macd_all,
-            series=series_close
+            series=series_close,
+            native='macd.signal',
+            stateful_formula=macd_signal_stateful
         ),
         histogram=CommandPreset(
             formula=macd_histogram,
             lookback=lookback_macd_signal,
             args=args_macd_all,
-            series=series_close
+            series=series_close,
+            native='macd.histogram',
+            stateful_formula=macd_histogram_stateful
         )
     ),
     dict(
@@ -227,6 +345,21 @@ def bbi(
         + ma(d, close_series)
     ) / 4
 
+def bbi_prefix(
+    a: int,
+    b: int,
+    c: int,
+    d: int,
+    rolling: Rolling
+) -> ReturnType:
+    return (
+        rolling.mean(a)
+        + rolling.mean(b)
+        + rolling.mean(c)
+        + rolling.mean(d)
+    ) / 4
+
+
 def lookback_bbi(a: int, b: int, c: int, d: int) -> int:
     return max(a, b, c, d)
 
@@ -241,7 +374,9 @@ BUILTIN_COMMANDS['bbi'] = CommandDefinition(
             CommandArg(12, period_to_int),
             CommandArg(24, period_to_int)
         ],
-        series=series_close
+        series=series_close,
+        native='bbi',
+        prefix_formula=bbi_prefix
     )
 )
 
@@ -287,7 +422,8 @@ BUILTIN_COMMANDS['tr'] = CommandDefinition(
         formula=tr,
         lookback=lambda: 1,
         args=[],
-        series=series_hlc
+        series=series_hlc,
+        native='tr'
     )
 )
 
@@ -320,6 +456,7 @@ BUILTIN_COMMANDS['atr'] = CommandDefinition(
         formula=atr,
         lookback=lookback_atr,
         args=[arg_period_14],
-        series=series_hlc
+        series=series_hlc,
+        native='atr'
     )
 )
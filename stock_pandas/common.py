@@ -19,6 +19,7 @@ from numpy.typing import (
 )
 
 import numpy as np
+import pandas as pd
 
 
 NDArrayAny = NDArray[Any]
@@ -28,6 +29,22 @@ def set_attr(target: Any, key: str, value: Any) -> None:
     object.__setattr__(target, key, value)
 
 
+# Copy-on-write is always enabled since pandas 3.0,
+# and the option is deprecated
+_ALWAYS_COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3
+
+
+def is_copy_on_write() -> bool:
+    """Whether the copy-on-write mode of pandas is enabled, so that data frames sharing the same arrays are protected from the in-place modifications of each other
+    """
+
+    if _ALWAYS_COPY_ON_WRITE:
+        return True  # pragma: no cover
+
+    # `mode.copy_on_write` might be 'warn', or not exist before pandas 1.5
+    return getattr(pd.options.mode, 'copy_on_write', False) is True
+
+
 T = TypeVar('T', int, float)
 ReturnInt = Callable[..., int]
 ReturnFloat = Callable[..., float]
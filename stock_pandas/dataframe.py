@@ -1,8 +1,20 @@
 import os
+import re
+import asyncio
+from concurrent.futures import (
+    Executor,
+    ThreadPoolExecutor
+)
+from functools import partial
+from contextvars import ContextVar
+from threading import Lock
 
 from typing import (
     Any,
     Callable,
+    Dict,
+    Iterable,
+    Iterator,
     Tuple,
     Union,
     List,
@@ -15,12 +27,37 @@ from pandas import (
 )
 
 from numpy import (
-    nan
+    nan,
+    concatenate,
+    ndarray,
+    float64,
+    bool_,
+    column_stack,
+    empty,
+    maximum
 )
 
 from .directive.parse import parse
 from .directive.cache import DirectiveCache
-from .directive.types import Directive
+from .directive.types import (
+    Directive,
+    Command,
+    CommandSeriesType,
+    ReturnType,
+    COMMAND_COLUMN_NAME,
+    COMMAND_TIME_FRAME_NAME,
+    Expression,
+    UnaryExpression,
+    get_source_columns
+)
+from .directive.native import (
+    run_native,
+    run_kernels,
+    create_job,
+    to_buffer
+)
+from .math.prefix_sums import PrefixSums
+from .math.sweep import calc_sweep
 from .directive.command import (
     Commands,
     CommandDefinition
@@ -29,17 +66,28 @@ from .commands import BUILTIN_COMMANDS
 
 from .common import (
     rolling_calc,
+    set_attr,
+    is_copy_on_write,
     NDArrayAny
 )
+from .properties import (
+    KEY_SUBSCRIPTIONS,
+    KEY_PENDING_EXECS
+)
 
 from .meta.utils import (
     ensure_return_type,
+    copy_stock_metas,
+    copy_prefix_sums,
     ColumnInfo
 )
 
 from .meta.cumulator import (
-    MetaDataFrame
+    MetaDataFrame,
+    SubjectsToAppend
 )
+from .meta.time_frame import TimeFrame
+from .snapshot import Snapshot
 
 
 _cow = os.environ.get('STOCK_PANDAS_COW', '').lower()
@@ -53,6 +101,42 @@ elif _cow in ('0', 'off', 'false'): # pragma: no cover
     pd.options.mode.copy_on_write = False # pragma: no cover
 
 
+FULL_SLICE = slice(None)
+
+# Whether `exec()` of the current call creates columns, which is followed by
+# the nested calls of `exec()` inside command formulas. A context variable
+# rather than an attribute of the data frame, so that a data frame could be
+# read by several threads at the same time
+_create_column: ContextVar[bool] = ContextVar(
+    'stock_create_column',
+    default=False
+)
+
+_PREFIX_SUMS_LOCK = Lock()
+
+# A single command, such as "boll.upper:20,3@open", of which the first
+# argument could be omitted, such as "ma" and "macd.signal:,26"
+SWEEP_COMMAND = re.compile(r'\s*([\w.]+)\s*(?::([\w\s.,+-]*))?(@.*)?$', re.S)
+
+
+def _iter_commands(directive: Any) -> Iterator[Command]:
+    """Iterates the commands of the directive, including the nested ones
+    """
+
+    if isinstance(directive, Command):
+        yield directive
+
+        for series in directive.series:
+            yield from _iter_commands(series)
+
+    elif isinstance(directive, Expression):
+        yield from _iter_commands(directive.left)
+        yield from _iter_commands(directive.right)
+
+    elif isinstance(directive, UnaryExpression):
+        yield from _iter_commands(directive.expression)
+
+
 class StockDataFrame(MetaDataFrame):
     """The wrapper class for `pandas.DataFrame`
 
@@ -65,6 +149,29 @@ class StockDataFrame(MetaDataFrame):
     # so declare as static property
     DIRECTIVES_CACHE: DirectiveCache = DirectiveCache()
 
+    # The executor of `aexec()` and `aappend()`.
+    # `None` indicates the default executor of the event loop
+    EXECUTOR: Optional[Executor] = None
+
+    def __init__(
+        self,
+        *args: Any,
+        subscriptions: Optional[Iterable[str]] = None,
+        **kwargs: Any
+    ) -> None:
+        """
+        Creates a stock data frame
+
+        Args:
+            subscriptions (:obj:`Iterable[str]`, optional): the directives to subscribe, see `StockDataFrame.subscribe()`
+            *args, **kwargs: see `MetaDataFrame`
+        """
+
+        super().__init__(*args, **kwargs)
+
+        if subscriptions is not None:
+            self.subscribe(subscriptions)
+
     # Class methods, which should not be used as self.xxx()
     # --------------------------------------------------------------------
 
@@ -180,26 +287,32 @@ class StockDataFrame(MetaDataFrame):
         loc = self.columns.get_loc(name)
         return self._ixs(loc, axis=1)
 
-    _stock_create_column: bool = False
-
     def exec(
         self,
         directive_str: str, /,
-        create_column: Optional[bool] = None
+        create_column: Optional[bool] = None,
+        tail: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None
     ) -> NDArrayAny:
         """
         Executes the given directive and returns a numpy ndarray according to the directive.
 
-        This method is **NOT** Thread-safe.
+        This method is thread-safe, so that several threads could read the same data frame at the same time, and a column is created only once. However, the data frame should not be changed, such as by setting values, during the calls.
 
         Args:
             directive_str (str): directive
             create_column (`bool`, optional): whether we should create a column for the calculated series.
+            tail (`int`, optional): if specified, only the last `tail` rows are calculated, along with the rows of the lookback, and no column is created
+            start (`int`, optional): the position of the first row to calculate, which could be negative as the start of a slice
+            end (`int`, optional): the position after the last row to calculate, which could be negative as the stop of a slice
 
         Returns:
-            ndarray
+            ndarray: the series of all rows, or only the rows of the window if `tail`, `start` or `end` is specified
         """
 
+        window = self._exec_window(tail, start, end)
+
         potential_column = (
             self._stock_aliases_map[directive_str]
             if directive_str in self._stock_aliases_map
@@ -207,24 +320,275 @@ class StockDataFrame(MetaDataFrame):
         )
 
         if self._is_normal_column(potential_column):
-            return self._get_column(potential_column).to_numpy()
+            array = self._get_column(potential_column).to_numpy()
+
+            return array if window is None else array[window]
+
+        if window is not None:
+            if create_column:
+                raise ValueError(
+                    'a column could not be created for a window of rows'
+                )
+
+            return self._calc_window(directive_str, window)
+
+        if not isinstance(create_column, bool):
+            # We should call self.exec() without `create_column`
+            # inside command formulas, which follows the outer call
+            return self._calc(directive_str)
+
+        token = _create_column.set(create_column)
+
+        try:
+            return self._calc(directive_str)
+        finally:
+            # Set back, since we complete calculating
+            _create_column.reset(token)
+
+    async def aexec(
+        self,
+        directive_str: str, /,
+        create_column: Optional[bool] = None,
+        tail: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None
+    ) -> NDArrayAny:
+        """
+        The awaitable version of `exec()`, which executes the directive on `StockDataFrame.EXECUTOR` without blocking the event loop.
 
-        # We should call self.exec() without `create_column`
-        # inside command formulas
-        explicit_create_column = isinstance(create_column, bool)
-        original_create_column = self._stock_create_column
+        The concurrent calls with the same arguments on the same data frame are coalesced, so that the directive is executed only once, and all of them get the same ndarray which should not be changed.
 
-        if explicit_create_column:
-            # We've already checked that create_column is a bool in this case
-            self._stock_create_column = bool(create_column)
+        Usage::
+
+            ma = await stock.aexec('ma:5')
+        """
+
+        loop = asyncio.get_running_loop()
+        key = (loop, directive_str, create_column, tail, start, end)
+        pending: Dict[
+            Tuple[Any, ...],
+            asyncio.Future[NDArrayAny]
+        ] = self._stock_meta(KEY_PENDING_EXECS, dict)
+
+        future = pending.get(key)
+
+        if future is None:
+            future = loop.run_in_executor(
+                self.EXECUTOR,
+                partial(
+                    self.exec,
+                    directive_str,
+                    create_column,
+                    tail=tail,
+                    start=start,
+                    end=end
+                )
+            )
+
+            pending[key] = future
+            future.add_done_callback(lambda _: pending.pop(key, None))
+
+        # Cancelling one of the calls should not cancel the others
+        return await asyncio.shield(future)
+
+    async def aappend(
+        self,
+        other: SubjectsToAppend,
+        *args: Any, **kwargs: Any
+    ) -> 'StockDataFrame':
+        """
+        The awaitable version of `append()`, which appends the rows and fulfills the subscribed directives on `StockDataFrame.EXECUTOR` without blocking the event loop.
+
+        Usage::
+
+            stock = await stock.aappend(rows)
+        """
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self.EXECUTOR,
+            partial(self.append, other, *args, **kwargs)
+        )
+
+    def _exec_window(
+        self,
+        tail: Optional[int],
+        start: Optional[int],
+        end: Optional[int]
+    ) -> Optional[slice]:
+        if tail is None:
+            if start is None and end is None:
+                return None
+
+            start, stop, _ = slice(start, end).indices(len(self))
+
+            return slice(start, max(start, stop))
+
+        if start is not None or end is not None:
+            raise ValueError('`tail` could not be used with `start` or `end`')
 
-        series = self._calc(directive_str)
+        if tail < 0:
+            raise ValueError(f'tail must not be negative, but got `{tail}`')
 
-        if explicit_create_column:
-            # Set back to default value, since we complete calculating
-            self._stock_create_column = original_create_column
+        return slice(max(len(self) - tail, 0), len(self))
+
+    def _calc_window(self, directive_str: str, window: slice) -> NDArrayAny:
+        """Calculates the rows of `window` for the directive, with only the rows of the lookback before the window
+        """
+
+        directive = self._parse_directive(directive_str)
+        name = str(directive)
+
+        column_info = self._stock_columns_info_map.get(name)
+
+        if column_info is not None and column_info.size >= window.stop:
+            # The rows of the window have been calculated
+            return self.get_column(name).to_numpy()[window]
+
+        array = self._result_cache.get(name, len(self))
+
+        if array is not None:
+            # The cached series is read-only and shared by other readers
+            return array[window].copy()
+
+        if window.start == window.stop:
+            if not len(self):
+                return empty(0)
+
+            # Calculate a row next to the window for the dtype,
+            # since some formulas could not handle empty series
+            stop = max(window.stop, 1)
+
+            return self._calc_window(
+                directive_str,
+                slice(stop - 1, stop)
+            )[:0]
+
+        calc_start = max(window.start - directive.cumulative_lookback, 0)
+
+        array = self._run_directive(
+            directive,
+            slice(calc_start, window.stop),
+            False
+        )
+
+        return array[window.start - calc_start:]
+
+    def sweep(
+        self,
+        directive_str: str, /,
+        periods: Iterable[int]
+    ) -> ndarray:
+        """
+        Calculates the command of `directive_str` for each of `periods`, which replaces the first argument (the period) of the command, without creating any columns.
 
-        return series
+        The work that does not depend on the period is shared by all periods, such as the prefix sums of the source column for `ma` and `boll`, and the single pass over the rows for `ema` and `rsi` with the Rust backend.
+
+        Args:
+            directive_str (str): a command directive, of which the first argument is the period
+            periods (Iterable[int]): the periods
+
+        Returns:
+            ndarray: of shape `(len(self), len(periods))`, of which the column `j` is the series of `periods[j]`
+
+        Usage::
+
+            stock.sweep('ma', range(2, 200))
+            # The column 3 equals to
+            stock.exec('ma:5')
+
+            stock.sweep('boll.upper:20,3@open', [10, 20, 30])
+        """
+
+        match = SWEEP_COMMAND.match(directive_str)
+
+        if match is None:
+            raise ValueError(
+                f'directive "{directive_str}" is not a command with a period argument'
+            )
+
+        periods = [*periods]
+
+        if not periods:
+            return empty((len(self), 0))
+
+        name, args_str, series_str = match.groups()
+
+        # Replace the first argument, or insert it if it is omitted
+        rest = (
+            args_str.partition(',')[1:]
+            if args_str is not None
+            else ()
+        )
+
+        directive = self._parse_directive(''.join([
+            name, ':', str(periods[0]), *rest, series_str or ''
+        ]))
+
+        if not isinstance(directive, Command) or not directive.preset.args:
+            raise ValueError(
+                f'directive "{directive_str}" is not a command with a period argument'
+            )
+
+        preset = directive.preset
+        coerce = preset.args[0].coerce
+        periods = [int(coerce(period)) for period in periods]
+        args = directive.args[1:]
+
+        series = directive.series
+
+        if (
+            preset.prefix_formula is not None
+            and len(series) == 1
+            and isinstance(series[0], str)
+        ):
+            prefix_sums = self._get_prefix_sums(series[0])
+
+            if prefix_sums is not None:
+                rolling = prefix_sums.rolling(0, len(self))
+
+                return column_stack([
+                    preset.prefix_formula(period, *args, rolling)
+                    for period in periods
+                ])
+
+        arrays = [
+            (
+                self.get_column(s).to_numpy()
+                if isinstance(s, str)
+                else self._run_directive(s, FULL_SLICE)
+            )
+            for s in series
+        ]
+
+        native = preset.native
+
+        if native is not None:
+            if len(arrays) == 1:
+                result = calc_sweep(native, arrays[0], periods, args)
+
+                if result is not None:
+                    return result
+
+            buffers = [
+                buffer
+                for buffer in map(to_buffer, arrays)
+                if buffer is not None
+            ]
+
+            # Every array could be converted
+            if len(buffers) == len(arrays):
+                results = run_kernels([
+                    (native, (period, *args), buffers)
+                    for period in periods
+                ])
+
+                if results is not None:
+                    return column_stack(results)
+
+        return column_stack([
+            preset.formula(period, *args, *arrays)
+            for period in periods
+        ])
 
     def alias(
         self,
@@ -290,15 +654,89 @@ class StockDataFrame(MetaDataFrame):
             not forward
         )
 
-    def fulfill(self) -> 'StockDataFrame':
+    def fulfill(self, workers: Optional[int] = None) -> 'StockDataFrame':
         """
         Fulfill all the stock columns in the dataframe
 
+        Args:
+            workers (:obj:`int`, optional): if greater than 1, the new rows of the columns are calculated concurrently on a pool of `workers` threads, and then written back at once. A column which reads from another column of a directive is calculated after the other column is fulfilled. The results are the same whatever `workers` is.
+
         Returns:
             self
         """
-        for column in self._stock_columns_info_map.keys():
-            self._fulfill_series(column)
+        with self._lock:
+            self._fulfill_natively()
+
+            if workers is not None and workers > 1:
+                self._fulfill_concurrently(workers)
+                return self
+
+            for column in self._stock_columns_info_map.keys():
+                self._fulfill_series(column)
+
+        return self
+
+    def snapshot(self) -> Snapshot:
+        """
+        Captures the rows of the data frame and the versions of the columns of directives, so that the snapshot could be read by several threads while the data frame is appended or changed by another thread.
+
+        The data is not copied if the copy-on-write mode of pandas is enabled, otherwise the snapshot holds a copy of the data.
+
+        Usage::
+
+            snapshot = stock.snapshot()
+            snapshot.exec('ma:5')
+
+        Returns:
+            Snapshot
+        """
+
+        with self._lock:
+            # Without copy-on-write, a shallow copy shares the arrays which
+            # the in-place modifications of the data frame write to
+            frame = self.copy(deep=not is_copy_on_write())
+
+            # Neither the columns info, which is changed in place once the
+            # columns are fulfilled, nor the derived frames, which are
+            # cumulated in place, should be shared
+            copy_stock_metas(self, frame)
+
+            # The prefix sums are append-only
+            copy_prefix_sums(self, frame, FULL_SLICE)
+
+        return Snapshot(frame)
+
+    def subscribe(self, directives: Iterable[str], /) -> 'StockDataFrame':
+        """
+        Subscribes the directives, of which the columns are created at once, and are fulfilled eagerly in one batch by `append()` and `cum_append()`, so that reading them never calculates.
+
+        The subscriptions are inherited by the data frames created by `append()`, `cum_append()` and slicing.
+
+        Args:
+            directives (Iterable[str]): the directives to subscribe, of which the duplicated ones are subscribed once
+
+        Returns:
+            self
+        """
+
+        subscriptions = list(self._stock_subscriptions)
+
+        for directive_str in directives:
+            name = str(self._parse_directive(directive_str))
+
+            if name not in subscriptions:
+                subscriptions.append(name)
+
+        with self._lock:
+            original = self._stock_subscriptions
+            set_attr(self, KEY_SUBSCRIPTIONS, tuple(subscriptions))
+
+            try:
+                self._fulfill_subscriptions()
+            except Exception:
+                # Such as a column which does not exist
+                set_attr(self, KEY_SUBSCRIPTIONS, original)
+                raise
 
         return self
 
@@ -369,70 +807,590 @@ class StockDataFrame(MetaDataFrame):
 
         name = str(directive)
 
+        if create_column or name in self._stock_columns_info_map:
+            # The columns are created and fulfilled by one thread at a time
+            with self._lock:
+                return self._get_or_create_series(
+                    directive,
+                    name,
+                    create_column
+                )
+
+        return name, self._run_directive(directive, FULL_SLICE)
+
+    def _get_or_create_series(
+        self,
+        directive: Directive,
+        name: str,
+        create_column: bool
+    ) -> Tuple[str, NDArrayAny]:
         if name in self._stock_columns_info_map:
             return name, self._fulfill_series(name)
 
         lookback = directive.cumulative_lookback
 
-        array = directive.run(
-            self,
-            # create the whole series
-            slice(None)
+        stateful = (
+            # Keep the state of the kernel,
+            # so that appended rows could be calculated without lookback
+            self._calc_stateful(directive, FULL_SLICE, None)
+            if create_column
+            else None
         )
 
+        if stateful is None:
+            state = prev_state = None
+            array = self._run_directive(
+                directive,
+                # create the whole series
+                FULL_SLICE,
+                # The column itself will be the cache
+                not create_column
+            )
+        else:
+            array, state, prev_state = stateful
+
         if create_column:
             self._stock_columns_info_map[name] = ColumnInfo(
                 len(self),
                 directive,
-                lookback
+                lookback,
+                state,
+                prev_state
             )
 
             self.loc[:, name] = array
 
         return name, array
 
+    def _run_directive(
+        self,
+        directive: Directive,
+        s: slice,
+        cache: bool = True
+    ) -> ReturnType:
+        """Calculates the series of rows `s` for `directive`
+
+        The series of the whole data frame is looked up from and saved into the result cache, unless `cache` is False
+        """
+
+        if (
+            s != FULL_SLICE
+            or (
+                isinstance(directive, Command)
+                and directive.name == COMMAND_COLUMN_NAME
+            )
+        ):
+            return self._calc_directive(directive, s)
+
+        result_cache = self._result_cache
+        name = str(directive)
+        size = len(self)
+
+        array = result_cache.get(name, size)
+
+        if array is not None:
+            return array
+
+        array = self._calc_directive(directive, s, self._lookup_result)
+
+        if cache and isinstance(array, ndarray):
+            aliases_map = self._stock_aliases_map
+
+            result_cache.set(name, size, array, [
+                aliases_map.get(column, column)
+                for column in get_source_columns(directive)
+            ])
+
+        return array
+
+    def _lookup_result(self, directive: Directive) -> Optional[ndarray]:
+        array = self._result_cache.get(str(directive), len(self))
+
+        if array is None:
+            # The result could be cheap with prefix sums
+            array = self._calc_prefix(directive, FULL_SLICE)
+
+        return array
+
+    def _calc_directive(
+        self,
+        directive: Directive,
+        s: slice,
+        lookup: Optional[Callable[[Directive], Optional[ndarray]]] = None
+    ) -> ReturnType:
+        array = self._calc_prefix(directive, s)
+
+        if array is not None:
+            return array
+
+        # Hand the whole directive over to the Rust backend if possible,
+        # so that the directive tree is calculated in one go
+        array = run_native(directive, self, s, lookup)
+
+        if array is None:
+            array = directive.run(self, s)
+
+        return array
+
+    def _calc_prefix(
+        self,
+        directive: Directive,
+        s: slice
+    ) -> Optional[ndarray]:
+        """Calculates the command with the prefix sums of its source column if possible
+        """
+
+        if not isinstance(directive, Command):
+            return None
+
+        formula = directive.preset.prefix_formula
+
+        if (
+            formula is None
+            or len(directive.series) != 1
+            or not isinstance(directive.series[0], str)
+        ):
+            return None
+
+        prefix_sums = self._get_prefix_sums(directive.series[0])
+
+        if prefix_sums is None:
+            return None
+
+        start, stop, _ = s.indices(len(self))
+
+        return formula(*directive.args, prefix_sums.rolling(start, stop))
+
+    def _get_prefix_sums(self, column: str) -> Optional[PrefixSums]:
+        """Gets the prefix sums of the column, which are extended with the newly appended rows
+        """
+
+        column = self._stock_aliases_map.get(column, column)
+        prefix_sums_map = self._prefix_sums_map
+        prefix_sums = prefix_sums_map.get(column)
+
+        size = len(self)
+
+        if prefix_sums is not None and prefix_sums.size == size:
+            return prefix_sums
+
+        # The buffer of prefix sums is shared by the data frames of appended
+        # rows, which might extend it in different threads
+        with _PREFIX_SUMS_LOCK:
+            return self._extend_prefix_sums(column)
+
+    def _extend_prefix_sums(self, column: str) -> Optional[PrefixSums]:
+        prefix_sums_map = self._prefix_sums_map
+        prefix_sums = prefix_sums_map.get(column)
+
+        size = len(self)
+
+        if prefix_sums is not None and prefix_sums.size == size:
+            # Extended by another thread
+            return prefix_sums
+
+        array = self._get_column(column).to_numpy()
+
+        if array.dtype != float64:
+            try:
+                array = array.astype(float)
+            except (TypeError, ValueError):
+                return None
+
+        if prefix_sums is None or prefix_sums.size > size:
+            prefix_sums = PrefixSums.create(array)
+        else:
+            prefix_sums = prefix_sums.extend(array[prefix_sums.size:])
+
+        if prefix_sums is not None:
+            prefix_sums_map[column] = prefix_sums
+
+        return prefix_sums
+
+    def _calc_on_time_frame(
+        self,
+        time_frame: TimeFrame,
+        series: CommandSeriesType,
+        s: slice
+    ) -> NDArrayAny:
+        """Calculates `series` on the higher `time_frame` derived from the data frame, and aligns it to the rows `s`.
+
+        Each row gets the value of the last bar of `time_frame` which has closed before the row, so that there is no look-ahead bias, and the values never change when rows are appended.
+        """
+
+        if isinstance(series, Command) and series.name == COMMAND_COLUMN_NAME:
+            series = series.series[0]
+
+        # The derived frame is cumulated in place
+        with self._lock:
+            derived = self._stock_derive(time_frame)
+
+            values = (
+                derived.get_column(series).to_numpy()
+                if isinstance(series, str)
+                # A column of the derived frame,
+                # so that only the new bars will be calculated the next time
+                else derived._get_or_calc_series(series, True)[1]
+            )
+
+        # The bar before the one which each row belongs to
+        previous = derived.index.searchsorted(
+            self.index[s], side='right'
+        ) - 2
+
+        result = values[maximum(previous, 0)]
+        missing = previous < 0
+
+        if missing.any():
+            if result.dtype != bool_:
+                result = result.astype(float)
+
+            result[missing] = False if result.dtype == bool_ else nan
+
+        return result
+
     def _fulfill_series(self, column_name: str) -> NDArrayAny:
         # Since `column_name` always exists logically,
         #   we could safely get by dict[key]
         column_info = self._stock_columns_info_map[column_name]
 
+        if len(self) == column_info.size:
+            # Already fulfilled
+            return self.get_column(column_name).to_numpy()
+
+        (
+            calc_slice,
+            partial,
+            column_info.state,
+            column_info.prev_state
+        ) = self._calc_fulfill(column_info)
+
+        return self._set_fulfilled(column_name, calc_slice, partial)
+
+    def _calc_fulfill(
+        self,
+        column_info: ColumnInfo
+    ) -> Tuple[slice, NDArrayAny, Any, Any]:
+        """Calculates the rows to fulfill the column, without changing the data frame
+
+        Returns:
+            Tuple[slice, ndarray, Any, Any]: the calculated rows, the series of the rows, and the new states of the kernel after the last row and before it
+        """
+
+        if column_info.state is not None:
+            # Only calculate the new rows
+            calc_slice = slice(column_info.size - len(self), None)
+
+            stateful = self._calc_stateful(
+                column_info.directive,
+                calc_slice,
+                column_info.state
+            )
+
+            if stateful is not None:
+                return (calc_slice, *stateful)
+
+        calc_slice = self._fulfill_calc_slice(column_info)
+
+        return (
+            calc_slice,
+            self._run_directive(column_info.directive, calc_slice),
+            None,
+            None
+        )
+
+    def _calc_stateful(
+        self,
+        directive: Directive,
+        s: slice,
+        state: Any
+    ) -> Optional[Tuple[NDArrayAny, Any, Any]]:
+        """Calculates the rows `s` of the command with its stateful formula, which continues from `state`
+
+        Returns:
+            Optional[Tuple[ndarray, Any, Any]]: the series, the new state after the last row and the one before the last row, or `None` if the directive has no stateful formula
+        """
+
+        if not isinstance(directive, Command):
+            return None
+
+        formula = directive.preset.stateful_formula
+
+        if formula is None:
+            return None
+
+        columns = [
+            series
+            for series in directive.series
+            if isinstance(series, str)
+        ]
+
+        # Any series which is a directive
+        if len(columns) != len(directive.series):
+            return None
+
+        arrays = [
+            self.get_column(column)[s].to_numpy()
+            for column in columns
+        ]
+
+        args = directive.args
+
+        if len(arrays[0]) < 2:
+            return (*formula(*args, *arrays, state), state)
+
+        # Keep the state before the last row, with which the last row could
+        # be calculated again if it is replaced, such as by `cum_append()`
+        head, prev_state = formula(
+            *args, *[array[:-1] for array in arrays], state
+        )
+        last, state = formula(
+            *args, *[array[-1:] for array in arrays], prev_state
+        )
+
+        return concatenate((head, last)), state, prev_state
+
+    def _fulfill_natively(
+        self,
+        columns: Optional[Iterable[str]] = None
+    ) -> None:
+        """Fulfills the columns of built-in commands on columns with one batch of native kernel jobs
+
+        Args:
+            columns (:obj:`Iterable[str]`, optional): the columns of directives to fulfill. Defaults to all columns of directives
+        """
+
         size = len(self)
+        columns_info_map = self._stock_columns_info_map
 
-        array = self.get_column(column_name).to_numpy()
+        names = []
+        slices = []
+        jobs = []
 
-        if size == column_info.size:
-            # Already fulfilled
-            return array
+        for name in columns_info_map if columns is None else columns:
+            column_info = columns_info_map[name]
+            directive = column_info.directive
+
+            if (
+                size == column_info.size
+                or not isinstance(directive, Command)
+                # The state of the kernel is even better
+                or column_info.state is not None
+            ):
+                continue
+
+            calc_slice = self._fulfill_calc_slice(column_info)
+            job = create_job(directive, self, calc_slice)
+
+            if job is not None:
+                names.append(name)
+                slices.append(calc_slice)
+                jobs.append(job)
+
+        results = run_kernels(jobs)
+
+        if results is None:
+            return
 
-        neg_delta = column_info.size - size
+        for name, calc_slice, calculated in zip(names, slices, results):
+            self._set_fulfilled(name, calc_slice, calculated)
+
+    def _fulfill_concurrently(self, workers: int) -> None:
+        size = len(self)
+        columns_info_map = self._stock_columns_info_map
+        aliases_map = self._stock_aliases_map
+
+        pending = [
+            name
+            for name, column_info in columns_info_map.items()
+            if column_info.size < size
+        ]
+
+        with ThreadPoolExecutor(workers) as executor:
+            while pending:
+                waiting = set(pending)
+
+                # The columns which read from no column to be fulfilled
+                ready = [
+                    name
+                    for name in pending
+                    if waiting.isdisjoint(
+                        aliases_map.get(column, column)
+                        for column in get_source_columns(
+                            columns_info_map[name].directive
+                        )
+                    )
+                ] or pending
+
+                concurrent = []
+
+                for name in ready:
+                    directive = columns_info_map[name].directive
+
+                    if any(
+                        command.name == COMMAND_TIME_FRAME_NAME
+                        for command in _iter_commands(directive)
+                    ):
+                        # The derived frame of the time frame is cumulated
+                        # in place, so it is calculated in this thread
+                        self._fulfill_series(name)
+                    else:
+                        self._prepare_prefix_sums(directive)
+                        concurrent.append(name)
+
+                results = executor.map(
+                    lambda name: self._calc_fulfill(columns_info_map[name]),
+                    concurrent
+                )
+
+                self._set_all_fulfilled(concurrent, list(results))
+
+                pending = [name for name in pending if name not in ready]
+
+    def _prepare_prefix_sums(self, directive: Directive) -> None:
+        """Extends the prefix sums which the directive uses in advance, so that the directive could be calculated in other threads without changing the data frame
+        """
+
+        for command in _iter_commands(directive):
+            if (
+                command.preset.prefix_formula is not None
+                and len(command.series) == 1
+                and isinstance(command.series[0], str)
+            ):
+                self._get_prefix_sums(command.series[0])
+
+    def _set_all_fulfilled(
+        self,
+        names: List[str],
+        results: List[Tuple[slice, NDArrayAny, Any, Any]]
+    ) -> None:
+        """Writes the calculated rows of the columns back, of which the ones that could not be written to the storage in place are set at once
+        """
+
+        columns_info_map = self._stock_columns_info_map
+        size = len(self)
+
+        to_set = {}
+
+        for name, (_, calculated, _, _) in zip(names, results):
+            array, written = self._merge_fulfilled(name, calculated)
+
+            if not written:
+                to_set[name] = array
+
+        if to_set:
+            self[list(to_set)] = pd.DataFrame(to_set, index=self.index)
+
+        for name, (_, _, state, prev_state) in zip(names, results):
+            column_info = columns_info_map[name]
+            column_info.size = size
+            column_info.state = state
+            column_info.prev_state = prev_state
+
+    def _fulfill_calc_slice(self, column_info: ColumnInfo) -> slice:
+        """Gets the rows to calculate to fulfill the column, including the lookback rows
+        """
+
+        neg_delta = column_info.size - len(self)
 
         # Sometimes, there is not enough items to calculate
-        calc_delta = max(
-            neg_delta - column_info.lookback,
-            - size
+        return slice(
+            max(neg_delta - column_info.lookback, - len(self)),
+            None
         )
 
-        calc_slice = slice(calc_delta, None)
+    def _set_fulfilled(
+        self,
+        column_name: str,
+        calc_slice: slice,
+        partial: NDArrayAny
+    ) -> NDArrayAny:
+        array, written = self._merge_fulfilled(column_name, partial)
+
+        if not written:
+            self.loc[:, column_name] = array
+
+        self._stock_columns_info_map[column_name].size = len(self)
+
+        return array
+
+    def _merge_fulfilled(
+        self,
+        column_name: str,
+        partial: NDArrayAny
+    ) -> Tuple[NDArrayAny, bool]:
+        """Merges the newly calculated rows into the column, which are written to the storage in place if possible
+
+        Returns:
+            Tuple[ndarray, bool]: the whole column, and whether it has been written to the storage
+        """
+
+        column_info = self._stock_columns_info_map[column_name]
+
+        neg_delta = column_info.size - len(self)
+
+        span = self._stock_span()
+
+        if span is not None:
+            current = self.get_column(column_name).to_numpy()
+
+            # Write the new rows to the storage in place,
+            # instead of replacing the whole column
+            if span.storage.write_column(
+                column_name,
+                span.start + column_info.size,
+                partial[neg_delta:],
+                current
+            ):
+                self._stock_invalidate({column_name})
+
+                return current, True
+
+        if column_info.size == 0:
+            return partial, False
+
+        # #27
+        # With `pd.options.mode.copy_on_write = True`,
+        # Series.to_numpy() will returns the
+        #   read-only underlying numpy array of the Series
+        # so we need to copy it before modifying
+        array = self.get_column(column_name).to_numpy().copy()
         fulfill_slice = slice(neg_delta, None)
+        array[fulfill_slice] = partial[fulfill_slice]
 
-        partial = column_info.directive.run(self, calc_slice)
+        return array, False
 
-        if neg_delta == calc_delta:
-            array = partial
-        else:
-            # #27
-            # With `pd.options.mode.copy_on_write = True`,
-            # Series.to_numpy() will returns the
-            #   read-only underlying numpy array of the Series
-            # so we need to copy it before modifying
-            array = array.copy()
-            array[fulfill_slice] = partial[fulfill_slice]
+    def _stock_after_append(self) -> 'StockDataFrame':
+        self._fulfill_subscriptions()
 
-        self.loc[:, column_name] = array
+        return self
 
-        column_info.size = size
+    def _fulfill_subscriptions(self) -> None:
+        subscriptions = self._stock_subscriptions
 
-        return array
+        if not subscriptions or not len(self):
+            # There is no source column to calculate
+            return
+
+        columns_info_map = self._stock_columns_info_map
+
+        # The columns of subscriptions that have been created
+        created = [name for name in subscriptions if name in columns_info_map]
+
+        self._fulfill_natively(created)
+
+        for name in subscriptions:
+            if name in columns_info_map:
+                self._fulfill_series(name)
+            elif not self._is_normal_column(name):
+                self._get_or_calc_series(self._parse_directive(name), True)
+
+    def _stock_before_drop(self, count: int) -> None:
+        for column_name, column_info in self._stock_columns_info_map.items():
+            if column_info.size - column_info.lookback <= count:
+                # The rows to fulfill the column, or the rows of its state,
+                # would be dropped, so fulfill it while they are still here
+                self._fulfill_series(column_name)
 
     def _is_normal_column(self, column_name: str) -> bool:
         return (
@@ -443,12 +1401,17 @@ class StockDataFrame(MetaDataFrame):
     def _calc(self, directive_str: str) -> NDArrayAny:
         directive = self._parse_directive(directive_str)
 
-        _, series = self._get_or_calc_series(
+        name, series = self._get_or_calc_series(
             directive,
-            self._stock_create_column
+            _create_column.get()
         )
 
-        return series
+        if name in self._stock_columns_info_map or series.flags.writeable:
+            return series
+
+        # The series of the result cache is read-only and shared by other
+        # readers, so that the caller gets a copy of it
+        return series.copy()
 
 METHODS_TO_ENSURE_RETURN_TYPE = [
     # TODO:
@@ -0,0 +1,302 @@
+"""
+Native evaluation of a whole directive.
+
+A parsed directive is compiled into a plan of nested tuples, which is handed
+to `stock_pandas_rs.evaluate_directive` together with the source column
+buffers, so that built-in commands and operators are calculated without
+crossing the Python boundary for every node of the directive tree.
+
+Independent built-in commands, such as the columns to fulfill and the
+periods of a sweep, are handed to `stock_pandas_rs.run_kernels` as a batch
+of jobs at once.
+"""
+
+from __future__ import annotations
+from typing import (
+    Optional,
+    Callable,
+    Dict,
+    List,
+    Set,
+    Tuple,
+    Any,
+    TYPE_CHECKING
+)
+
+import numpy as np
+
+from stock_pandas.backend import use_rust, is_rust_available
+from stock_pandas.common import NDArrayAny
+
+from .types import (
+    Command,
+    Expression,
+    UnaryExpression,
+    Directive,
+    OperandType,
+    PrimativeType,
+    COMMAND_COLUMN_NAME,
+    COMMAND_TIME_FRAME_NAME
+)
+
+if TYPE_CHECKING:
+    from stock_pandas.dataframe import StockDataFrame # pragma: no cover
+
+# Import Rust evaluator if available
+if is_rust_available():
+    from stock_pandas_rs import (
+        evaluate_directive as _rs_evaluate_directive,
+        run_kernels as _rs_run_kernels
+    )
+
+
+Plan = Tuple[Any, ...]
+
+# (kernel id, command args, input series)
+Job = Tuple[str, Tuple[PrimativeType, ...], List[NDArrayAny]]
+
+# Gets the cached series of a sub directive, if any
+Lookup = Callable[[Directive], Optional[NDArrayAny]]
+
+# The prefix of the buffer names of cached sub directives,
+# which never conflicts with a column name inside a directive
+CACHED_PREFIX = '#'
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class _Compiler:
+    columns: Set[str]
+    cached: Dict[str, NDArrayAny]
+    kernels: int
+
+    def __init__(self, lookup: Optional[Lookup] = None) -> None:
+        self.columns = set()
+        self.cached = {}
+        self.kernels = 0
+        self._lookup = lookup
+
+    def lookup(self, node: Directive) -> Optional[Plan]:
+        if self._lookup is None:
+            return None
+
+        array = self._lookup(node)
+
+        # Only float series could be handed over as buffers
+        if array is None or array.dtype != np.float64:
+            return None
+
+        name = CACHED_PREFIX + str(node)
+        self.cached[name] = array
+
+        return ('column', name)
+
+    def compile(
+        self,
+        node: OperandType | str,
+        root: bool = False
+    ) -> Plan:
+        if isinstance(node, (int, float)):
+            return ('scalar', float(node))
+
+        if isinstance(node, str):
+            self.columns.add(node)
+            return ('column', node)
+
+        if isinstance(node, Command):
+            if node.name == COMMAND_COLUMN_NAME:
+                return self.compile(node.series[0])
+
+            if not root and (cached := self.lookup(node)) is not None:
+                return cached
+
+            if node.name == COMMAND_TIME_FRAME_NAME:
+                # The series is not of the rows of the data frame
+                raise _Unsupported
+
+            series = tuple(self.compile(s) for s in node.series)
+            native = node.preset.native
+
+            if native is None:
+                return ('formula', node.preset.formula, tuple(node.args), series)
+
+            self.kernels += 1
+            return ('kernel', native, tuple(node.args), series)
+
+        if isinstance(node, Expression):
+            if (
+                isinstance(node.left, (int, float))
+                and isinstance(node.right, (int, float))
+            ):
+                # Let Python handle the operation of two scalars
+                raise _Unsupported
+
+            if not root and (cached := self.lookup(node)) is not None:
+                return cached
+
+            return (
+                'binary',
+                node.operator.name,
+                self.compile(node.left),
+                self.compile(node.right)
+            )
+
+        if isinstance(node, UnaryExpression):
+            if not root and (cached := self.lookup(node)) is not None:
+                return cached
+
+            return (
+                'unary',
+                node.operator.name,
+                self.compile(node.expression)
+            )
+
+        raise _Unsupported
+
+
+def compile_directive(
+    directive: Directive
+) -> Optional[Tuple[Plan, Set[str]]]:
+    """Compiles the directive into a native plan
+
+    Returns:
+        Optional[Tuple[Plan, Set[str]]]: the plan and the names of the source columns it needs, or `None` if the directive would not benefit from native evaluation, i.e. it contains no built-in command
+    """
+
+    compiled = _compile(directive)
+
+    if compiled is None:
+        return None
+
+    plan, compiler = compiled
+
+    return plan, compiler.columns
+
+
+def _compile(
+    directive: Directive,
+    lookup: Optional[Lookup] = None
+) -> Optional[Tuple[Plan, _Compiler]]:
+    compiler = _Compiler(lookup)
+
+    try:
+        plan = compiler.compile(directive, True)
+    except _Unsupported:
+        return None
+
+    if not compiler.kernels:
+        return None
+
+    return plan, compiler
+
+
+def run_native(
+    directive: Directive,
+    df: StockDataFrame,
+    s: slice,
+    lookup: Optional[Lookup] = None
+) -> Optional[NDArrayAny]:
+    """Calculates the directive natively with `stock_pandas_rs`
+
+    Args:
+        lookup (:obj:`Lookup`, optional): the function to get the cached series of sub directives, which will be handed over instead of being calculated again
+
+    Returns:
+        Optional[ndarray]: `None` if the Rust backend is not in use or the directive could not be calculated natively, in which case `directive.run()` should be used instead.
+    """
+
+    if not use_rust():
+        return None
+
+    compiled = _compile(directive, lookup)
+
+    if compiled is None:
+        return None
+
+    plan, compiler = compiled
+
+    columns = compiler.cached
+
+    for name in compiler.columns:
+        array = to_buffer(df.get_column(name)[s].to_numpy())
+
+        if array is None:
+            return None
+
+        columns[name] = array
+
+    return np.asarray(_rs_evaluate_directive(plan, columns))
+
+
+def to_buffer(array: NDArrayAny) -> Optional[NDArrayAny]:
+    """Converts the series of a column into a float64 buffer for `stock_pandas_rs`, or returns `None` if it could not
+    """
+
+    if array.dtype == np.bool_:
+        # Bitwise operators apply to bool columns only
+        return None
+
+    if array.dtype != np.float64:
+        try:
+            array = array.astype(float)
+        except (TypeError, ValueError):
+            # Non-numeric columns are left to the Python formulas
+            return None
+
+    return array
+
+
+def create_job(
+    command: Command,
+    df: StockDataFrame,
+    s: slice
+) -> Optional[Job]:
+    """Creates the job for `run_kernels` which calculates the rows `s` of a built-in command on columns
+
+    Returns:
+        Optional[Job]: `None` if the command could not be calculated as a single kernel
+    """
+
+    native = command.preset.native
+
+    if native is None:
+        return None
+
+    inputs = []
+
+    for series in command.series:
+        if not isinstance(series, str):
+            return None
+
+        array = to_buffer(df.get_column(series)[s].to_numpy())
+
+        if array is None:
+            return None
+
+        inputs.append(array)
+
+    return native, tuple(command.args), inputs
+
+
+def run_kernels(
+    jobs: List[Job],
+    parallel: bool = True
+) -> Optional[List[NDArrayAny]]:
+    """Runs the kernel jobs with `stock_pandas_rs` in one call
+
+    Args:
+        parallel (:obj:`bool`, optional): whether the jobs could be run on several threads. Defaults to `True`
+
+    Returns:
+        Optional[List[ndarray]]: the results in the order of `jobs`, or `None` if the Rust backend is not in use
+    """
+
+    if not use_rust() or not jobs:
+        return None
+
+    return [
+        np.asarray(result)
+        for result in _rs_run_kernels(jobs, parallel)
+    ]
@@ -1,13 +1,16 @@
 from __future__ import annotations
 from typing import (
+    Any,
     Optional,
+    Tuple,
     Union,
     List,
+    Set,
     TYPE_CHECKING,
-    Protocol,
     Generic,
     Callable,
-    Literal
+    Literal,
+    cast
 )
 from dataclasses import dataclass, field
 
@@ -15,6 +18,7 @@ from stock_pandas.common import (
     join_args,
     EMPTY
 )
+from stock_pandas.precision import get_lookback_tolerance
 
 from .operator import (
     OperatorArgType,
@@ -27,6 +31,7 @@ from .operator import (
 
 if TYPE_CHECKING:
     from stock_pandas.dataframe import StockDataFrame # pragma: no cover
+    from stock_pandas.meta.time_frame import TimeFrame # pragma: no cover
 
 
 def _run_expression(
@@ -37,7 +42,7 @@ def _run_expression(
     if isinstance(expression, (float, int)):
         return expression
 
-    return expression.run(df, s)
+    return df._run_directive(expression, s)
 
 
 def _get_cumulative_lookback(expression: OperandType) -> int:
@@ -47,11 +52,54 @@ def _get_cumulative_lookback(expression: OperandType) -> int:
     return expression.cumulative_lookback
 
 
+def get_source_columns(expression: OperandType) -> Set[str]:
+    """Gets the names of the columns that the expression reads from
+    """
+
+    if isinstance(expression, Command):
+        columns = set()
+
+        for series in expression.series:
+            if isinstance(series, str):
+                columns.add(series)
+            else:
+                columns |= get_source_columns(series)
+
+        return columns
+
+    if isinstance(expression, Expression):
+        return (
+            get_source_columns(expression.left)
+            | get_source_columns(expression.right)
+        )
+
+    if isinstance(expression, UnaryExpression):
+        return get_source_columns(expression.expression)
+
+    return set()
+
+
 @dataclass
 class Lookback:
-    cumulative_lookback: int = field(init=False)
+    # The lookback tolerance and the cumulative lookback with it
+    _lookback: Tuple[float, int] = field(init=False, repr=False)
     _str: Optional[str] = field(init=False, repr=False)
 
+    @property
+    def cumulative_lookback(self) -> int:
+        tolerance = get_lookback_tolerance()
+        lookback = self._lookback
+
+        if lookback[0] != tolerance:
+            # The lookbacks of exponential filters depend on the tolerance
+            lookback = (tolerance, self._cumulative_lookback())
+            self._lookback = lookback
+
+        return lookback[1]
+
+    def _cumulative_lookback(self) -> int:
+        raise NotImplementedError # pragma: no cover
+
     # Use __str__ instead of __repr__,
     # for better debugging experience
     # - __str__ for user method invocation
@@ -60,7 +108,10 @@ class Lookback:
         return self._str
 
     def __post_init__(self):
-        self.cumulative_lookback = self._cumulative_lookback()
+        self._lookback = (
+            get_lookback_tolerance(),
+            self._cumulative_lookback()
+        )
         self._str = self._stringify()
 
 
@@ -132,7 +183,7 @@ class UnaryExpression(Lookback):
         return self.expression.cumulative_lookback
 
     def run(self, df: StockDataFrame, s: slice) -> ReturnType:
-        return self.operator.formula(self.expression.run(df, s))
+        return self.operator.formula(df._run_directive(self.expression, s))
 
 
 
@@ -141,6 +192,9 @@ _StringifyPrefix = Literal[':', '@']
 
 COMMAND_COLUMN_NAME = '__close__'
 
+# The command which calculates its series on a higher time frame
+COMMAND_TIME_FRAME_NAME = 'tf'
+
 
 @dataclass(slots=True)
 class Command(Lookback):
@@ -198,7 +252,14 @@ class Command(Lookback):
         ]
 
         # There might be no series lookback
-        series_lb = max(series_lbs) if series_lbs else 0
+        series_lb = (
+            max(series_lbs)
+            if series_lbs
+            # The lookback of the series is of the rows of the higher time
+            # frame, which are cached and never calculated again
+            and self.name != COMMAND_TIME_FRAME_NAME
+            else 0
+        )
 
         # Since the current command calcuates based on the series,
         # the lookback increases
@@ -209,14 +270,24 @@ class Command(Lookback):
         df: StockDataFrame,
         s: slice
     ) -> ReturnType:
-        arrays = [
-            (
-                df.get_column(series)[s].to_numpy()
-                if isinstance(series, str)
-                else series.run(df, s)
-            )
-            for series in self.series
-        ]
+        if self.name == COMMAND_TIME_FRAME_NAME:
+            arrays = [
+                df._calc_on_time_frame(
+                    # The arg is coerced by `ensure_time_frame`
+                    cast('TimeFrame', self.args[0]),
+                    self.series[0],
+                    s
+                )
+            ]
+        else:
+            arrays = [
+                (
+                    df.get_column(series)[s].to_numpy()
+                    if isinstance(series, str)
+                    else df._run_directive(series, s)
+                )
+                for series in self.series
+            ]
 
         return self.preset.formula(*self.args, *arrays)
 
@@ -236,20 +307,17 @@ CommandArgInputType = Union[NumberType, str]
 PrimativeType = Union[CommandArgInputType, bool]
 
 
-class CommandFormula(Protocol):
-    def __call__(
-        self,
-        # df: 'StockDataFrame',
-        # s: slice,
-        *args: Union[PrimativeType, ReturnType]
-    ) -> ReturnType: ...
+# formula(*args, *series) -> ReturnType
+CommandFormula = Callable[..., ReturnType]
 
+# prefix_formula(*args, rolling) -> ReturnType
+CommandPrefixFormula = Callable[..., ReturnType]
 
-class CommandLookback(Protocol):
-    def __call__(
-        self,
-        *args: PrimativeType
-    ) -> int: ...
+# stateful_formula(*args, *series, state) -> (ReturnType, state)
+CommandStatefulFormula = Callable[..., Tuple[ReturnType, Any]]
+
+# lookback(*args) -> int
+CommandLookback = Callable[..., int]
 
 
 def DEFAULT_ARG_COERCE(x: PrimativeType) -> PrimativeType:
@@ -266,7 +334,7 @@ class CommandArg:
     """
 
     default: Optional[PrimativeType] = None
-    coerce: Callable[[CommandArgInputType], PrimativeType] = field(
+    coerce: Callable[..., Any] = field(
         default=DEFAULT_ARG_COERCE,
         repr=False
     )
@@ -280,12 +348,24 @@ class CommandPreset:
     Args:
         formula (CommandFormula): The formula of the command
         args (List[CommandArg]): The arguments of the command
+        native (Optional[str] = None): The id of the equivalent kernel of `stock_pandas_rs`, with which the command could be calculated natively along with the whole directive. `None` indicates that the formula should always be called, which is the case for user-defined commands.
+        prefix_formula (Optional[CommandPrefixFormula] = None): The formula which calculates the command with the args and a `Rolling` based on the cached prefix sums of the source column. It is only used if the only series of the command is a column.
+        stateful_formula (Optional[CommandStatefulFormula] = None): The formula which calculates the command with the args, the series of some rows and the state of the kernel after the previous rows (`None` for the first row), and returns the result along with the state after the last row. It is used to fulfill the column of the command with only the newly appended rows, if all series of the command are columns. The result should be bit-identical to the one of `formula` on all rows.
     """
 
     formula: CommandFormula = field(repr=False)
     lookback: CommandLookback = field(repr=False)
     args: List[CommandArg] = field(default_factory=list)
     series: List[CommandArg] = field(default_factory=list)
+    native: Optional[str] = None
+    prefix_formula: Optional[CommandPrefixFormula] = field(
+        default=None,
+        repr=False
+    )
+    stateful_formula: Optional[CommandStatefulFormula] = field(
+        default=None,
+        repr=False
+    )
 
 
 Directive = Union[Expression, UnaryExpression, Command]
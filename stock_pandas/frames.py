@@ -0,0 +1,158 @@
+"""Multiple time frames of the same stock.
+
+A `MultiTimeFrame` holds a stock data frame for each of several time frames.
+Rows are only `cum_append()`ed to the frame of the lowest time frame, and
+each higher time frame is derived from the one right below it, by
+`cum_append()`ing the bars of the lower frame which have changed, i.e. the
+updated unclosed bar and the new bars. So the rows are parsed and cumulated
+only once, and a higher time frame cumulates a few bars instead of all rows.
+"""
+
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple
+)
+
+from pandas import DataFrame
+
+from .dataframe import StockDataFrame
+from .meta.cumulator import (
+    Cumulators,
+    SubjectsToAppend
+)
+from .meta.time_frame import (
+    TimeFrame,
+    TimeFrameArg,
+    ensure_time_frame
+)
+
+
+class MultiTimeFrame:
+    """Stock data frames of several time frames, of which the higher ones are derived from the lower ones incrementally
+
+    Args:
+        time_frames (Iterable[str | TimeFrame]): the time frames from the lowest to the highest, each of which should be a multiple of the one below it, such as `['1m', '5m', '15m', '1h', '1d']`
+        directives (:obj:`Mapping[str | TimeFrame, Iterable[str]]`, optional): the directives of the columns to keep updated for each time frame
+        date_col (:obj:`str`, optional): the date column of the rows to append
+        to_datetime_kwargs (dict): see `StockDataFrame`
+        cumulators (:obj:`Cumulators`, optional): see `StockDataFrame`
+        max_rows (:obj:`int`, optional): the max rows of each frame
+
+    Usage::
+
+        frames = MultiTimeFrame(
+            ['1m', '5m', '1h'],
+            directives={'5m': ['ma:20'], '1h': ['macd']}
+        )
+
+        frames.cum_append(rows)
+
+        frames['1h']['macd']
+    """
+
+    def __init__(
+        self,
+        time_frames: Iterable[TimeFrameArg],
+        directives: Optional[Mapping[TimeFrameArg, Iterable[str]]] = None,
+        date_col: Optional[str] = None,
+        to_datetime_kwargs: Dict[str, Any] = {},
+        cumulators: Optional[Cumulators] = None,
+        max_rows: Optional[int] = None
+    ) -> None:
+        self._time_frames: List[TimeFrame] = [
+            ensure_time_frame(time_frame)  # type: ignore
+            for time_frame in time_frames
+        ]
+
+        if not self._time_frames:
+            raise ValueError('at least one time frame is required')
+
+        for lower, higher in zip(self._time_frames, self._time_frames[1:]):
+            if lower.minutes >= higher.minutes:
+                raise ValueError(f'time frames must be from the lowest to the highest, but got "{lower}" before "{higher}"')
+
+            # Otherwise, a bar of the lower time frame might span two bars
+            # of the higher one
+            if higher.minutes % lower.minutes:
+                raise ValueError(f'each time frame must be a multiple of the one below it, but got "{higher}" after "{lower}"')
+
+        subscriptions: List[List[str]] = [[] for _ in self._time_frames]
+
+        if directives is not None:
+            for time_frame, directive_strs in directives.items():
+                subscriptions[self._position(time_frame)] = list(
+                    directive_strs
+                )
+
+        self._frames: List[StockDataFrame] = [
+            StockDataFrame(
+                # Only the rows of the lowest time frame are given
+                date_col=date_col if i == 0 else None,
+                to_datetime_kwargs=to_datetime_kwargs,
+                time_frame=time_frame,
+                cumulators=cumulators,
+                max_rows=max_rows,
+                # The columns are kept updated by `cum_append()`
+                subscriptions=subscriptions[i]
+            )
+            for i, time_frame in enumerate(self._time_frames)
+        ]
+
+    @property
+    def time_frames(self) -> List[TimeFrame]:
+        return self._time_frames.copy()
+
+    def __getitem__(self, time_frame: TimeFrameArg) -> StockDataFrame:
+        """Gets the stock data frame of a time frame
+        """
+
+        return self._frames[self._position(time_frame)]
+
+    def items(self) -> List[Tuple[TimeFrame, StockDataFrame]]:
+        return list(zip(self._time_frames, self._frames))
+
+    def cum_append(self, other: SubjectsToAppend) -> 'MultiTimeFrame':
+        """Cumulates the rows of `other` into the lowest time frame, and updates the higher time frames from the changed bars of the lower ones, as well as the columns of the directives
+
+        Returns:
+            MultiTimeFrame: the container itself
+        """
+
+        frames = self._frames
+        changed: Any = other
+
+        for i, previous in enumerate(frames):
+            frame = previous.cum_append(changed)
+            frames[i] = frame
+
+            changed = _changed_bars(previous, frame)
+
+        return self
+
+    def _position(self, time_frame: TimeFrameArg) -> int:
+        target = ensure_time_frame(time_frame)  # type: ignore
+
+        for i, current in enumerate(self._time_frames):
+            if current is target:
+                return i
+
+        raise KeyError(f'time frame "{target}" is not in the container')
+
+
+def _changed_bars(
+    previous: StockDataFrame,
+    current: StockDataFrame
+) -> DataFrame:
+    """
+    Gets the bars of `current` from the last bar of `previous`, which might be updated, without the columns of directives
+    """
+
+    return current._stock_raw_rows(
+        current.index.searchsorted(previous.index[-1])
+        if len(previous) else 0
+    )
@@ -0,0 +1,103 @@
+"""Tick-to-bar aggregation and bar keys.
+
+Bins trades into OHLCV bars in a single pass with the Rust backend. A bar
+begins wherever the period key changes, the same as `cum_append()`, and
+trades of the same timestamp are all cumulated, because they are different
+trades rather than updates of a record.
+
+The keys of volume, dollar and tick bars come from a running sum of the
+measure of the rows, which is computed in a single pass as well.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+from stock_pandas.backend import use_rust, is_rust_available
+
+# Import Rust implementations if available
+if is_rust_available():
+    from stock_pandas_rs import (
+        aggregate_ticks as _rs_aggregate_ticks,
+        threshold_keys as _rs_threshold_keys
+    )
+
+
+# (starts, open, high, low, close, volume)
+Bars = Tuple[
+    np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray
+]
+
+
+def aggregate_ticks(
+    keys: np.ndarray,
+    price: np.ndarray,
+    size: np.ndarray
+) -> Bars:
+    """Aggregates trades into bars by the period keys of the trades
+
+    Args:
+        keys (ndarray): int64 period keys of `TimeFrame.unify_many()`
+        price (ndarray): float64 prices
+        size (ndarray): float64 sizes
+
+    Returns:
+        Bars: the index of the first trade of each bar, and the open, high, low, close and volume of each bar
+    """
+
+    if use_rust():
+        return tuple(  # type: ignore
+            np.asarray(array)
+            for array in _rs_aggregate_ticks(keys, price, size)
+        )
+
+    if not len(keys):
+        empty = np.empty(0)
+        return np.empty(0, dtype=np.int64), empty, empty, empty, empty, empty
+
+    starts = np.concatenate((
+        [0],
+        np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    ))
+    lasts = np.append(starts[1:], len(keys)) - 1
+
+    return (
+        starts,
+        price[starts],
+        np.maximum.reduceat(price, starts),
+        np.minimum.reduceat(price, starts),
+        price[lasts],
+        np.add.reduceat(size, starts)
+    )
+
+
+def threshold_keys(
+    measure: np.ndarray,
+    offset: float,
+    threshold: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Gets the bar keys of rows of which a bar closes every `threshold` of the cumulative measure
+
+    Args:
+        measure (ndarray): float64 measure of each row, such as the volume. NaN is counted as 0
+        offset (float): the cumulative measure before the first row
+        threshold (float): the threshold of the cumulative measure
+
+    Returns:
+        Tuple[ndarray, ndarray]: the int64 key of each row, which is the count of thresholds reached before the row, and the cumulative measure through each row
+    """
+
+    if use_rust():
+        keys, cumulative = _rs_threshold_keys(measure, offset, threshold)
+        return np.asarray(keys), np.asarray(cumulative)
+
+    # Sums up from left to right, so that the cumulative measure is the same
+    # whether the rows are cumulated at once or not
+    cumulative = np.cumsum(
+        np.concatenate(([offset], np.nan_to_num(measure, nan=0.)))
+    )
+
+    return (
+        np.floor(cumulative[:-1] / threshold).astype(np.int64),
+        cumulative[1:]
+    )
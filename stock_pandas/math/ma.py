@@ -4,7 +4,14 @@ This module provides moving average implementations that use the Rust backend
 for optimal performance, with fallback to pure Python implementations.
 """
 
+from typing import (
+    Optional,
+    Tuple
+)
+from functools import lru_cache
+
 from stock_pandas.backend import use_rust, is_rust_available
+from stock_pandas.precision import get_lookback_tolerance
 from stock_pandas.common import rolling_calc
 
 import numpy as np
@@ -14,10 +21,17 @@ if is_rust_available():
     from stock_pandas_rs import (
         calc_ma as _rs_calc_ma,
         calc_ewma as _rs_calc_ewma,
-        calc_smma as _rs_calc_smma
+        calc_smma as _rs_calc_smma,
+        calc_ewm_state as _rs_calc_ewm_state
     )
 
 
+# The state of an EWMA after some values:
+# the weighted average, the weight of the previous values (only used by the
+# Rust backend), and the count of observations
+EwmaState = Tuple[float, float, int]
+
+
 def calc_ewma(
     array: np.ndarray,
     period: int
@@ -39,16 +53,72 @@ def calc_ewma(
     if use_rust():
         return np.asarray(_rs_calc_ewma(array.astype(float), period))
 
+    return _ewm_state(array, 2.0 / (period + 1.0), period, None)[0]
+
+
+def calc_ewma_state(
+    array: np.ndarray,
+    period: int,
+    state: Optional[EwmaState]
+) -> Tuple[np.ndarray, EwmaState]:
+    """Calculates EWMA which continues from `state`, the same as `calc_ewma()` on all values
+
+    Args:
+        state (:obj:`EwmaState`, optional): the state after the previous values, or `None` to start from the first value
+
+    Returns:
+        Tuple[ndarray, EwmaState]: the averages of `array`, and the state after the last value
+    """
+
+    if use_rust():
+        return _rs_ewm_state(array, (period - 1.) / 2., period, state)
+
+    return _ewm_state(array, 2.0 / (period + 1.0), period, state)
+
+
+def calc_smma_state(
+    array: np.ndarray,
+    period: int,
+    state: Optional[EwmaState]
+) -> Tuple[np.ndarray, EwmaState]:
+    """Calculates SMMA which continues from `state`, the same as `calc_smma()` on all values
+    """
+
+    if use_rust():
+        return _rs_ewm_state(array, period - 1., period, state)
+
+    return _ewm_state(array, 1.0 / period, period, state)
+
+
+def _rs_ewm_state(
+    array: np.ndarray,
+    com: float,
+    min_periods: int,
+    state: Optional[EwmaState]
+) -> Tuple[np.ndarray, EwmaState]:
+    result, state = _rs_calc_ewm_state(
+        array.astype(float), com, min_periods, state
+    )
+
+    return np.asarray(result), state
+
+
+def _ewm_state(
+    array: np.ndarray,
+    alpha: float,
+    period: int,
+    state: Optional[EwmaState]
+) -> Tuple[np.ndarray, EwmaState]:
     # Pure Python fallback
     n = len(array)
     result = np.empty(n)
     result[:] = np.nan
 
-    alpha = 2.0 / (period + 1.0)
     one_minus_alpha = 1.0 - alpha
 
-    ewma_val = np.nan
-    count = 0
+    ewma_val, weight, count = (
+        (np.nan, 1., 0) if state is None else state
+    )
 
     for i in range(n):
         val = float(array[i])
@@ -62,7 +132,7 @@ def calc_ewma(
         if count >= period:
             result[i] = ewma_val
 
-    return result
+    return result, (ewma_val, weight, count)
 
 
 def calc_smma(
@@ -81,30 +151,41 @@ def calc_smma(
     if use_rust():  # pragma: no cover
         return np.asarray(_rs_calc_smma(array.astype(float), period))
 
-    # Pure Python fallback
-    n = len(array)
-    result = np.empty(n)
-    result[:] = np.nan
+    return _ewm_state(array, 1.0 / period, period, None)[0]
 
-    alpha = 1.0 / period
-    one_minus_alpha = 1.0 - alpha
 
-    smma_val = np.nan
+def ewm_lookback(*alphas: float) -> int:
+    """Gets the count of the previous rows needed to calculate a row of cascaded EWMs, i.e. the EWM with `alphas[1]` of the EWM with `alphas[0]`, and so on, so that the weight of the truncated history, which is replaced by the first value, is less than the lookback tolerance
+
+    Returns:
+        int: the lookback, which does not count the rows needed for the min periods
+    """
+
+    return _ewm_lookback(alphas, get_lookback_tolerance())
+
+
+@lru_cache(maxsize=256)
+def _ewm_lookback(
+    alphas: Tuple[float, ...],
+    tolerance: float
+) -> int:
+    # The error of each EWM relative to the error of the truncated history
+    errors = [1.] * len(alphas)
     count = 0
 
-    for i in range(n):
-        val = float(array[i])
-        if not np.isnan(val):
-            count += 1
-            if np.isnan(smma_val):
-                smma_val = val
-            else:
-                smma_val = alpha * val + one_minus_alpha * smma_val
+    while max(errors, default=0.) >= tolerance:
+        error = 0.
 
-        if count >= period:
-            result[i] = smma_val
+        for i, alpha in enumerate(alphas):
+            # The error is diluted by the new value, which carries the error
+            # of the EWM before it
+            error = (1. - alpha) * errors[i] + alpha * error
+            errors[i] = error
+
+        count += 1
 
-    return result
+    # The first value is the row of the lookback
+    return max(count - 1, 0)
 
 
 def calc_ma(
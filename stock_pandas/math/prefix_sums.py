@@ -0,0 +1,302 @@
+"""Prefix sums of source columns.
+
+With the prefix sums (and prefix sums of squares) of a column, the rolling
+sum, mean and variance of any period are calculated by two lookups for each
+row, so that `ma:5`, `ma:10`, ..., `ma:250` on the same column share one pass.
+
+The sums are compensated (Neumaier summation) to keep the drift bounded over
+long histories, and the values are shifted by the first value of the column
+to reduce the cancellation of the variance.
+"""
+
+from __future__ import annotations
+from typing import (
+    Optional,
+    Tuple
+)
+
+import numpy as np
+
+from stock_pandas.backend import use_rust, is_rust_available
+from stock_pandas.common import NDArrayAny
+
+# Import Rust implementations if available
+if is_rust_available():
+    from stock_pandas_rs import calc_prefix_sums as _rs_calc_prefix_sums
+
+
+def calc_prefix_sums(
+    array: np.ndarray,
+    hi: float,
+    lo: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Calculates compensated prefix sums of `array`, which continue from the running sum `hi` and its compensation `lo`
+
+    Returns:
+        Tuple[ndarray, ndarray]: the running sums and the compensations after each item
+    """
+    if use_rust():
+        sums, comps = _rs_calc_prefix_sums(array.astype(float), hi, lo)
+        return np.asarray(sums), np.asarray(comps)
+
+    # Pure Python fallback
+    n = len(array)
+    sums = np.empty(n)
+    comps = np.empty(n)
+
+    for i in range(n):
+        x = float(array[i])
+        t = hi + x
+
+        if abs(hi) >= abs(x):
+            lo += (hi - t) + x
+        else:
+            lo += (x - t) + hi
+
+        hi = t
+        sums[i] = hi
+        comps[i] = lo
+
+    return sums, comps
+
+
+class _Buffer:
+    """
+    The growable storage of prefix sums, which could be shared by the `PrefixSums` of several data frames, such as a data frame and the new data frames appended from it.
+
+    Index `i` of each array is the prefix sum of the first `i` values.
+    """
+
+    __slots__ = (
+        'offset',
+        'size',
+        '_sums',
+        '_comps',
+        '_sq_sums',
+        '_sq_comps',
+        '_nans'
+    )
+
+    offset: float
+    # The count of values that have been summed
+    size: int
+
+    def __init__(self, offset: float, capacity: int) -> None:
+        self.offset = offset
+        self.size = 0
+
+        self._sums = np.zeros(capacity + 1)
+        self._comps = np.zeros(capacity + 1)
+        self._sq_sums = np.zeros(capacity + 1)
+        self._sq_comps = np.zeros(capacity + 1)
+        self._nans = np.zeros(capacity + 1, dtype=np.int64)
+
+    def copy(self, start: int, stop: int, capacity: int) -> _Buffer:
+        """Copies the prefix sums of values [start, stop) to a new buffer
+        """
+
+        buffer = _Buffer(self.offset, max(capacity, stop - start))
+
+        count = stop - start + 1
+        for name in (
+            '_sums', '_comps', '_sq_sums', '_sq_comps', '_nans'
+        ):
+            getattr(buffer, name)[:count] = getattr(self, name)[start:stop + 1]
+
+        buffer.size = stop - start
+
+        return buffer
+
+    def push(self, array: np.ndarray) -> None:
+        n = len(array)
+        size = self.size
+        end = size + n + 1
+
+        if end > len(self._sums):
+            self._grow(max(end, 2 * len(self._sums)))
+
+        nans = np.isnan(array)
+        shifted = np.where(nans, 0., array - self.offset)
+
+        new = slice(size + 1, end)
+
+        self._sums[new], self._comps[new] = calc_prefix_sums(
+            shifted, self._sums[size], self._comps[size]
+        )
+        self._sq_sums[new], self._sq_comps[new] = calc_prefix_sums(
+            shifted * shifted, self._sq_sums[size], self._sq_comps[size]
+        )
+        self._nans[new] = self._nans[size] + np.cumsum(nans)
+
+        self.size += n
+
+    def _grow(self, length: int) -> None:
+        for name in (
+            '_sums', '_comps', '_sq_sums', '_sq_comps', '_nans'
+        ):
+            old = getattr(self, name)
+            new = np.zeros(length, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def window(
+        self,
+        start: NDArrayAny,
+        stop: NDArrayAny
+    ) -> Tuple[NDArrayAny, NDArrayAny, NDArrayAny]:
+        """Gets the sums, sums of squares, and nan counts of the values [start, stop)
+        """
+
+        return (
+            (self._sums[stop] - self._sums[start])
+            + (self._comps[stop] - self._comps[start]),
+            (self._sq_sums[stop] - self._sq_sums[start])
+            + (self._sq_comps[stop] - self._sq_comps[start]),
+            self._nans[stop] - self._nans[start]
+        )
+
+
+class PrefixSums:
+    """
+    The prefix sums of a column of a data frame, which is a view of the underlying buffer
+
+    Args:
+        size (int): the count of rows of the data frame covered
+    """
+
+    __slots__ = ('_buffer', '_start', 'size')
+
+    _buffer: _Buffer
+    _start: int
+    size: int
+
+    def __init__(
+        self,
+        buffer: _Buffer,
+        start: int,
+        size: int
+    ) -> None:
+        self._buffer = buffer
+        self._start = start
+        self.size = size
+
+    @classmethod
+    def create(cls, array: np.ndarray) -> Optional[PrefixSums]:
+        """Creates the prefix sums of `array`, or returns `None` if `array` contains infinite values, which could not be subtracted from the sums.
+        """
+
+        if np.isinf(array).any():
+            return None
+
+        finite = array[~ np.isnan(array)]
+        offset = float(finite[0]) if len(finite) else 0.
+
+        buffer = _Buffer(offset, len(array))
+        buffer.push(array)
+
+        return cls(buffer, 0, len(array))
+
+    def extend(self, array: np.ndarray) -> Optional[PrefixSums]:
+        """Creates the prefix sums with the new rows `array` appended, which shares the underlying buffer if possible, or returns `None` if `array` contains infinite values.
+        """
+
+        if np.isinf(array).any():
+            return None
+
+        buffer = self._buffer
+        start = self._start
+        stop = start + self.size
+
+        if (
+            # The buffer has been extended by another data frame,
+            # so we could not write to it
+            stop != buffer.size
+            # Most of the buffer is for the rows that have been dropped,
+            # such as by `max_rows`
+            or start > self.size
+        ):
+            buffer = buffer.copy(start, stop, 2 * (self.size + len(array)))
+            start = 0
+
+        buffer.push(array)
+
+        return PrefixSums(buffer, start, self.size + len(array))
+
+    def slice(self, start: int, stop: int) -> PrefixSums:
+        """Gets the prefix sums of rows [start, stop)
+        """
+
+        stop = min(stop, self.size)
+        start = min(start, stop)
+
+        return PrefixSums(self._buffer, self._start + start, stop - start)
+
+    def rolling(self, start: int, stop: int) -> Rolling:
+        """Gets the rolling calculator of which the results are for rows [start, stop)
+        """
+
+        return Rolling(self, start, stop)
+
+
+class Rolling:
+    """
+    Rolling calculations of a column for rows [start, stop), based on the prefix sums. Each result is `nan` if the window is not full or contains `nan` values.
+    """
+
+    __slots__ = ('_sums', '_rows')
+
+    def __init__(
+        self,
+        sums: PrefixSums,
+        start: int,
+        stop: int
+    ) -> None:
+        self._sums = sums
+        self._rows = np.arange(start, stop)
+
+    def _window(
+        self,
+        period: int
+    ) -> Tuple[NDArrayAny, NDArrayAny, NDArrayAny]:
+        sums = self._sums
+        rows = self._rows
+
+        # Only the windows inside the data frame are full
+        full = rows + 1 >= period
+        stop = np.where(full, rows + 1, 0)
+        start = np.where(full, stop - period, 0)
+
+        total, sq_total, nans = sums._buffer.window(
+            start + sums._start,
+            stop + sums._start
+        )
+
+        return total, sq_total, full & (nans == 0)
+
+    def sum(self, period: int) -> NDArrayAny:
+        total, _, valid = self._window(period)
+
+        total += period * self._sums._buffer.offset
+
+        return np.where(valid, total, np.nan)
+
+    def mean(self, period: int) -> NDArrayAny:
+        total, _, valid = self._window(period)
+
+        mean = total / period + self._sums._buffer.offset
+
+        return np.where(valid, mean, np.nan)
+
+    def var(self, period: int, ddof: int = 0) -> NDArrayAny:
+        if period <= ddof:
+            return np.full(len(self._rows), np.nan)
+
+        total, sq_total, valid = self._window(period)
+
+        var = (sq_total - total * total / period) / (period - ddof)
+
+        # Rounding errors might make it slightly negative
+        return np.where(valid, np.maximum(var, 0.), np.nan)
+
+    def std(self, period: int, ddof: int = 0) -> NDArrayAny:
+        return np.sqrt(self.var(period, ddof))
@@ -0,0 +1,47 @@
+"""Parameter sweeps.
+
+Calculates a command for many periods in one call with the Rust backend,
+which shares the work that does not depend on the period, such as the prefix
+sums of `ma`, the single pass of the EWMA states of `ema` and `rsi`, and the
+sparse table of `hhv` and `llv`.
+"""
+
+from typing import (
+    List,
+    Optional
+)
+
+import numpy as np
+
+from stock_pandas.backend import use_rust, is_rust_available
+from stock_pandas.directive.types import PrimativeType
+
+# Import Rust implementations if available
+if is_rust_available():
+    from stock_pandas_rs import calc_sweep as _rs_calc_sweep
+
+
+# The kernel ids of `CommandPreset.native` that could be swept natively
+SWEEP_KERNELS = frozenset({
+    'ma', 'boll', 'boll.upper', 'boll.lower', 'ema', 'rsi', 'hhv', 'llv'
+})
+
+
+def calc_sweep(
+    kernel: str,
+    array: np.ndarray,
+    periods: List[int],
+    args: List[PrimativeType]
+) -> Optional[np.ndarray]:
+    """Calculates the kernel for each of `periods` with the other command arguments `args`
+
+    Returns:
+        Optional[ndarray]: the matrix of shape `(len(array), len(periods))`, or `None` if the kernel could not be swept natively
+    """
+
+    if not use_rust() or kernel not in SWEEP_KERNELS:
+        return None
+
+    result = _rs_calc_sweep(kernel, array.astype(float), periods, args)
+
+    return None if result is None else np.asarray(result)
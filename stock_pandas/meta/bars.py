@@ -0,0 +1,124 @@
+"""Bars which close every N shares, N notional or N trades.
+
+A `ThresholdBars` could be used as the `time_frame` of a stock data frame,
+so that `cumulate()` and `cum_append()` bucket rows by the running sum of a
+measure of the rows instead of by time. A bar closes at the row where the
+running sum reaches the next multiple of the threshold, and the exceeding
+part is counted towards the next bar, so that the bars are the same however
+the rows are appended.
+"""
+
+from typing import (
+    Any,
+    Tuple
+)
+
+import numpy as np
+from numpy import ndarray
+from pandas import DataFrame
+
+from stock_pandas.math.bars import threshold_keys
+
+
+class ThresholdBars:
+    """
+    The base class of bars which close every `threshold` of the measure of the rows. Sub classes should implement `measure()`
+    """
+
+    __slots__ = ('threshold',)
+
+    threshold: float
+
+    def __init__(self, threshold: float) -> None:
+        if not threshold > 0:
+            raise ValueError(
+                f'threshold must be positive, but got `{threshold}`'
+            )
+
+        self.threshold = threshold
+
+    def __str__(self) -> str:
+        return f'{self.__class__.__name__}({self.threshold})'
+
+    def measure(self, rows: DataFrame) -> ndarray:
+        """
+        Gets the measure of each row
+        """
+
+        raise NotImplementedError
+
+    def bucket(
+        self,
+        rows: DataFrame,
+        offset: float
+    ) -> Tuple[ndarray, ndarray]:
+        """
+        Gets the bar keys of `rows`
+
+        Args:
+            rows (DataFrame): the rows to be bucketed
+            offset (float): the running sum of the measure before `rows`
+
+        Returns:
+            Tuple[ndarray, ndarray]: the int64 key of each row, and the running sum through each row
+        """
+
+        return threshold_keys(
+            np.asarray(self.measure(rows), dtype=float),
+            float(offset),
+            float(self.threshold)
+        )
+
+
+class TickBars(ThresholdBars):
+    """
+    Bars of every `threshold` rows, i.e. trades
+    """
+
+    __slots__ = ()
+
+    def measure(self, rows: DataFrame) -> ndarray:
+        return np.ones(len(rows))
+
+
+class VolumeBars(ThresholdBars):
+    """
+    Bars of every `threshold` shares of the column `volume`
+    """
+
+    __slots__ = ('volume',)
+
+    def __init__(self, threshold: float, volume: str = 'volume') -> None:
+        super().__init__(threshold)
+        self.volume = volume
+
+    def measure(self, rows: DataFrame) -> ndarray:
+        return _column(rows, self.volume)
+
+
+class DollarBars(ThresholdBars):
+    """
+    Bars of every `threshold` notional, i.e. the sum of `price * volume`
+    """
+
+    __slots__ = ('price', 'volume')
+
+    def __init__(
+        self,
+        threshold: float,
+        price: str = 'close',
+        volume: str = 'volume'
+    ) -> None:
+        super().__init__(threshold)
+        self.price = price
+        self.volume = volume
+
+    def measure(self, rows: DataFrame) -> ndarray:
+        return _column(rows, self.price) * _column(rows, self.volume)
+
+
+def _column(rows: DataFrame, name: Any) -> ndarray:
+    if name not in rows.columns:
+        raise KeyError(f'column "{name}" is required by the bars')
+
+    return rows[name].to_numpy(dtype=float)
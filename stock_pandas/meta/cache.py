@@ -0,0 +1,128 @@
+from typing import (
+    Optional,
+    Iterable,
+    FrozenSet,
+    Tuple
+)
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+
+from stock_pandas.common import NDArrayAny
+
+
+ResultKey = Tuple[str, int]
+
+
+@dataclass(frozen=True, slots=True)
+class _Entry:
+    array: NDArrayAny
+    # The source columns that the result depends on
+    columns: FrozenSet[str]
+
+
+class ResultCache:
+    """
+    A bounded LRU cache of the calculated series of a data frame which are not created as columns, such as the result of `exec(directive, create_column=False)` and nested series inside other directives.
+
+    The cache is keyed by the canonical directive string and the length of the data frame. Every data frame owns its cache, so `append()` and `cum_append()`, which create new data frames, start with an empty one. The cache is thread-safe.
+
+    Args:
+        max_bytes (int): the byte budget of all cached arrays. `0` disables the cache
+    """
+
+    _store: OrderedDict[ResultKey, _Entry]
+    _nbytes: int
+    _lock: Lock
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._store = OrderedDict()
+        self._nbytes = 0
+        self._lock = Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def get(
+        self,
+        name: str,
+        size: int
+    ) -> Optional[NDArrayAny]:
+        key = (name, size)
+
+        with self._lock:
+            entry = self._store.get(key)
+
+            if entry is None:
+                return None
+
+            self._store.move_to_end(key)
+            return entry.array
+
+    def set(
+        self,
+        name: str,
+        size: int,
+        array: NDArrayAny,
+        columns: Iterable[str]
+    ) -> None:
+        nbytes = array.nbytes
+
+        if nbytes > self.max_bytes:
+            return
+
+        key = (name, size)
+
+        # The array is shared by every reader of the cache,
+        # so that it should never be changed
+        array.flags.writeable = False
+
+        entry = _Entry(array, frozenset(columns))
+
+        with self._lock:
+            self._remove(key)
+
+            self._store[key] = entry
+            self._nbytes += nbytes
+
+            while self._nbytes > self.max_bytes:
+                self._remove(next(iter(self._store)))
+
+    def invalidate(
+        self,
+        columns: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        Removes the results which depend on any of `columns`
+
+        Args:
+            columns (:obj:`Iterable[str]`, optional): the changed columns. `None` indicates that the whole data frame might be changed
+        """
+
+        with self._lock:
+            if columns is None:
+                self._store.clear()
+                self._nbytes = 0
+                return
+
+            changed = set(columns)
+
+            stale = [
+                key
+                for key, entry in self._store.items()
+                if not changed.isdisjoint(entry.columns)
+            ]
+
+            for key in stale:
+                self._remove(key)
+
+    def _remove(self, key: ResultKey) -> None:
+        entry = self._store.pop(key, None)
+
+        if entry is not None:
+            self._nbytes -= entry.array.nbytes
@@ -9,25 +9,68 @@ from typing import (
     Union,
     Self,
     Type,
-    TypeVar
+    TypeVar,
+    cast
 )
 
+from dataclasses import (
+    dataclass,
+    replace
+)
+from contextvars import ContextVar
+from threading import Lock, RLock
+
+import numpy as np
 from numpy import ndarray
 from pandas import (
     DataFrame,
+    DatetimeIndex,
+    Index,
     Series,
     concat
 )
 from pandas._libs.tslibs import Timestamp
-
-from stock_pandas.properties import KEY_CUMULATOR
-from stock_pandas.common import set_attr
+from pandas.core.dtypes.cast import find_common_type  # type: ignore
+
+from stock_pandas.properties import (
+    KEY_COLUMNS_INFO_MAP,
+    KEY_CUMULATOR,
+    KEY_RESULT_CACHE,
+    KEY_PREFIX_SUMS,
+    KEY_STORAGE,
+    KEY_DERIVED_FRAMES,
+    KEY_LOCK
+)
+from stock_pandas.common import (
+    set_attr,
+    is_copy_on_write
+)
+from stock_pandas.directive.types import get_source_columns
+from stock_pandas.math.prefix_sums import PrefixSums
+from stock_pandas.math.bars import aggregate_ticks
 
 from .utils import (
     ColumnInfo,
+    DerivedFrame,
     init_stock_metas,
     copy_stock_metas,
-    copy_clean_stock_metas
+    copy_clean_stock_metas,
+    copy_prefix_sums,
+    copy_derived_frames
+)
+
+from .cache import ResultCache
+from .storage import (
+    Storage,
+    Span
+)
+from .indexing import (
+    ChangedColumns,
+    labels_to_columns,
+    _StockLocIndexer,
+    _StockILocIndexer,
+    _StockAtIndexer,
+    _StockIAtIndexer
 )
 
 from .date import (
@@ -38,18 +81,32 @@ from .date import (
 from .time_frame import (
     TimeFrame,
     TimeFrameArg,
-    ensure_time_frame
+    Dates,
+    ensure_time_frame,
+    to_datetime64
 )
+from .bars import ThresholdBars
 
 
 Cumulator = Callable[[ndarray], float]
 Cumulators = Dict[str, Cumulator]
-ToAppend = List[Series]
 
 SubjectToAppend = Union[DataFrame, Series, dict]
 SubjectsToAppend = Union[SubjectToAppend, List[SubjectToAppend]]
 
 MetaDataFrameType = TypeVar('MetaDataFrameType', bound='MetaDataFrame')
+T = TypeVar('T')
+
+# The data frame being sliced by the current call, and the slice and axis,
+# which `__finalize__()` of the sliced data frame uses to copy the metas.
+# A context variable, so that a data frame could be sliced in several threads
+_indexer: ContextVar[Optional[Tuple[Any, slice, int]]] = ContextVar(
+    'stock_indexer',
+    default=None
+)
+
+# Guards the lazy creation of the metas of all data frames
+_META_LOCK = Lock()
 
 
 def first(array: ndarray) -> float:
@@ -81,6 +138,75 @@ cumulators: Cumulators = {
 }
 
 
+# Reducer = (array, starts, lasts) -> cumulated values of each time period
+Reducer = Callable[[ndarray, ndarray, ndarray], ndarray]
+
+# The built-in cumulators reduce all time periods at once
+REDUCERS: Dict[Cumulator, Reducer] = {
+    first: lambda array, starts, lasts: array[starts],
+    high: lambda array, starts, lasts: np.maximum.reduceat(array, starts),
+    low: lambda array, starts, lasts: np.minimum.reduceat(array, starts),
+    last: lambda array, starts, lasts: array[lasts],
+    add: lambda array, starts, lasts: np.add.reduceat(array, starts)
+}
+
+# Combiner = (cumulated value of the former rows, of the latter rows)
+#   -> cumulated value of all rows
+Combiner = Callable[[Any, Any], Any]
+
+COMBINERS: Dict[Cumulator, Combiner] = {
+    first: lambda former, latter: former,
+    high: np.maximum,
+    low: np.minimum,
+    last: lambda former, latter: latter,
+    add: np.add
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Cumulated:
+    """
+    The cumulated values of consecutive rows of the same time period.
+
+    The value of a column of a custom cumulator is the array of the values of all rows, because a custom cumulator could not be combined
+    """
+
+    # The index of the first row
+    label: Any
+    count: int
+    values: List[Any]
+
+
+@dataclass(frozen=True, slots=True)
+class UnclosedBar:
+    """
+    The rows of the latest time period which is not closed yet.
+
+    The rows except the last one are kept as cumulated values, so that a new row of the time period is folded in constant time. The last row is kept alone, because it is replaced by a new row of the same timestamp
+    """
+
+    key: int
+    columns: Index
+    head: Optional[Cumulated]
+    last: Cumulated
+
+    # The running sums of the measure of `ThresholdBars`
+    # through the last row, and before the last row
+    cumulative: Optional[float] = None
+    cumulative_before_last: Optional[float] = None
+
+
+def _infer(array: ndarray) -> ndarray:
+    """
+    Infers the dtype of the object array of the values returned by cumulators
+    """
+
+    return Series(array.tolist()).to_numpy()
+
+
+TICK_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
 def cum_append_type_error(date_col: Optional[str] = None) -> ValueError:
     message = 'the target to be `cum_append()`ed must have a DatetimeIndex'
 
@@ -92,26 +218,31 @@ def cum_append_type_error(date_col: Optional[str] = None) -> ValueError:
 
 def cum_append(
     df: MetaDataFrameType,
-    other: ToAppend
+    other: DataFrame
 ) -> Tuple[DataFrame, MetaDataFrameType]:
     """
     Returns:
         Tuple[DataFrame, StockDataFrame]: this method does not ensure that the return type is MetaDataFrame due to the limitation of DataFrame.append
     """
 
-    name = other[0].name
-    other = DataFrame(other)
+    name = other.index[0]
 
     if (df.columns.get_indexer(other.columns) >= 0).all():  # type: ignore
         other = other.reindex(columns=df.columns)  # type: ignore
 
-    length = len(df[name:]) if len(df) else 0
+    index = df.index
+
+    length = (
+        len(index) - index.searchsorted(name)
+        if index.is_monotonic_increasing
+        else len(df[name:])
+    ) if len(index) else 0
     if length:
         # Do not drop duplicates, because for now
         # StockDataFrame will loose column info if drop rows
         df = df._slice(slice(0, - length))
 
-    return concat([df, other]), df
+    return df._stock_concat([other]), df
 
 
 def ensure_type(
@@ -121,23 +252,56 @@ def ensure_type(
     if isinstance(df, MetaDataFrame):
         df._cumulator.update(df, source)
         copy_stock_metas(source, df)
+        # The rows of `source` are retained,
+        # so the prefix sums and the derived frames could be extended
+        copy_prefix_sums(source, df)
+        copy_derived_frames(source, df)
     else:
         df = source._constructor(df, source=source)
 
     return df
 
 
-class _Cumulator:
-    _to_append: ToAppend
+def ensure_bucketing(
+    value: Union[str, TimeFrame, ThresholdBars]
+) -> Union[TimeFrame, ThresholdBars]:
+    if isinstance(value, ThresholdBars):
+        return value
+
+    return ensure_time_frame(value)  # type: ignore
+
+
+def bucket(
+    time_frame: Union[TimeFrame, ThresholdBars],
+    rows: DataFrame,
+    offset: Optional[float]
+) -> Tuple[ndarray, Optional[ndarray]]:
+    """
+    Gets the bar keys of `rows`, and the running sums of the measure of `ThresholdBars` if any
+    """
+
+    if isinstance(time_frame, ThresholdBars):
+        return time_frame.bucket(rows, offset or 0.)
+
+    return time_frame.unify_many(
+        cast(DatetimeIndex, rows.index)
+    ), None
+
+
+def ensure_max_rows(max_rows: Any) -> int:
+    if not isinstance(max_rows, int) or max_rows < 1:
+        raise ValueError(f'max_rows must be a positive int, but got `{max_rows}`')
 
+    return max_rows
+
+
+class _Cumulator:
     _date_col: Optional[str] = None
     _to_datetime_kwargs: Dict[str, Any] = {}
-    _time_frame: Optional[TimeFrame] = None
-    _unclosed: Optional[DataFrame] = None
+    _time_frame: Optional[Union[TimeFrame, ThresholdBars]] = None
+    _unclosed: Optional[UnclosedBar] = None
     _cumulators: Cumulators = cumulators.copy()
-
-    def __init__(self) -> None:
-        self._to_append = []
+    _max_rows: Optional[int] = None
 
     def update(
         self,
@@ -146,25 +310,24 @@ class _Cumulator:
         source_cumulator: Optional['_Cumulator'] = None,
         date_col: Optional[str] = None,
         to_datetime_kwargs: Dict[str, Any] = {},
-        time_frame: Optional[TimeFrameArg] = None,
-        cumulators: Optional[Cumulators] = None
+        time_frame: Union[TimeFrameArg, ThresholdBars] = None,
+        cumulators: Optional[Cumulators] = None,
+        max_rows: Optional[int] = None
     ) -> None:
         """
         Update the cumulator settings of the current data frame or copy from `source`
         """
 
-        is_meta_frame = isinstance(source, MetaDataFrame)
-
-        if is_meta_frame and source_cumulator is None:
+        if not isinstance(source, MetaDataFrame):
+            source_cumulator = None
+        elif source_cumulator is None:
             source_cumulator = source._cumulator
 
-        has_source_cumulator = is_meta_frame and source_cumulator is not None
-
         if date_col is not None:
             self._date_col = date_col
             self._to_datetime_kwargs = to_datetime_kwargs
 
-            if has_source_cumulator:
+            if source_cumulator is not None:
                 if source_cumulator._date_col is None:
                     # Which means the source stock data frame has no date column, so we have to apply it
                     apply_date_to_df(
@@ -183,26 +346,32 @@ class _Cumulator:
                     check=True
                 )
         else:
-            if has_source_cumulator:
+            if source_cumulator is not None:
                 # We should copy the source's cumulator settings
                 self._copy_date_col(source_cumulator)
             else:
                 self._date_col = None
 
         if time_frame is None:
-            if has_source_cumulator:
+            if source_cumulator is not None:
                 self._copy_time_frame(source_cumulator)
                 self._copy_unclosed(source_cumulator, df, source)
         else:
-            self._time_frame = ensure_time_frame(time_frame)
+            self._time_frame = ensure_bucketing(time_frame)
 
         if cumulators is None:
-            if has_source_cumulator:
+            if source_cumulator is not None:
                 self._cumulators = source_cumulator._cumulators
         else:
             # StockDataFrame(stockdataframe, cumulators=cumulators)
             self._cumulators = cumulators
 
+        if max_rows is None:
+            if source_cumulator is not None:
+                self._max_rows = source_cumulator._max_rows
+        else:
+            self._max_rows = ensure_max_rows(max_rows)
+
     def _copy_date_col(self, source_cumulator: '_Cumulator') -> None:
         self._date_col = source_cumulator._date_col
 
@@ -230,7 +399,7 @@ class _Cumulator:
         if unclosed is None or not len(df) or not len(source):
             return
 
-        if df.iloc[-1].name == source.iloc[-1].name:
+        if df.index[-1] == source.index[-1]:
             self._unclosed = unclosed
 
     def apply_date_col(self, other: Any) -> Any:
@@ -248,168 +417,344 @@ class _Cumulator:
         self,
         to: MetaDataFrameType,
         other: DataFrame
-    ) -> Tuple[DataFrame, Optional[DataFrame], MetaDataFrameType]:
+    ) -> Tuple[DataFrame, UnclosedBar, MetaDataFrameType]:
         """
         Returns:
-            Tuple[DataFrame, Optional[DataFrame], MetaDataFrame]: the new cumulated and concated data frame, the unclosed rows (data frame), and the source
+            Tuple[DataFrame, UnclosedBar, MetaDataFrame]: the new cumulated and concated data frame, the unclosed rows, and the source
         """
 
         # It is allowed to have a None date_col,
         # but `other` must have a DatetimeIndex
-        if self._time_frame is None:
+        time_frame = self._time_frame
+
+        if time_frame is None:
             raise ValueError('refuse to cum_append() a stock data frame without time_frame specified')
 
         if not len(other):
             raise ValueError('the data frame to be appended is empty')
 
-        current_unclosed = self._unclosed
+        if not isinstance(other.index, DatetimeIndex):
+            if not all(isinstance(label, Timestamp) for label in other.index):
+                raise cum_append_type_error(self._date_col)
 
-        # The last timestamp processed in the current dataframe
-        last_timestamp: Optional[Timestamp] = None
-        if self._unclosed is not None:
-            last_timestamp = self._unclosed.iloc[-1].name
+            other = other.set_axis(DatetimeIndex(other.index))
 
-        # Next round, we will append items from timestamp `start`,
-        # `start` is the beginning timestamp of the new time period
-        start = None
+        timestamps = other.index.to_numpy()
 
-        # The previous timestamp tested with the dataframe to append
-        last = None
-        self._to_append = []
+        # If there are records of the same timestamp,
+        # we do not cumulate them but use the last one
+        retain = np.empty(len(timestamps), dtype=bool)
+        retain[:-1] = timestamps[1:] != timestamps[:-1]
+        retain[-1] = True
 
-        for timestamp in other.index:
-            if not isinstance(timestamp, Timestamp):
-                raise cum_append_type_error(self._date_col)
+        if not retain.all():
+            other = other[retain]
 
-            if start is None:
-                start = timestamp
+        unclosed = self._unclosed
 
-            if last_timestamp is None:
-                last_timestamp = timestamp
-                last = timestamp
-                continue
+        # The last row of the unclosed bar is replaced by the one of
+        # the same timestamp
+        replaced = (
+            unclosed is not None
+            and unclosed.last.label == other.index[0]
+        )
 
-            if (
-                self._time_frame is not None and
-                self._time_frame.unify(last_timestamp)
-                != self._time_frame.unify(timestamp)
-            ):
-                # Which means it enters a new time period,
-                # we should cumulate previous unclosed items before this one
+        offset = None if unclosed is None else (
+            unclosed.cumulative_before_last if replaced
+            else unclosed.cumulative
+        )
 
-                if last is not None:
-                    # For a data frame of TimestampIndex,
-                    # indexing are performed in a close range
-                    self._cumulate(other[start:last])
-                # else
-                #     it means the first item is from a new time period
+        # The bar keys of all rows to cumulate
+        keys, cumulative = bucket(time_frame, other, offset)
+
+        if unclosed is not None:
+            if keys[0] != unclosed.key:
+                # The unclosed time period is closed by `other`,
+                # and it has already been appended
+                unclosed = None
+            elif not other.columns.equals(unclosed.columns):
+                # The same columns as `concat`
+                other = other.reindex(
+                    columns=unclosed.columns.append(
+                        other.columns.difference(
+                            unclosed.columns, sort=False
+                        )
+                    )
+                )
 
-                # The data records must be closed at index `last`,
-                # so we will clean `unclosed`
-                self._pre_append(True)
+        columns = other.columns
+        cumulators = [self._cumulators.get(column) for column in columns]
+        arrays = [other.iloc[:, i].to_numpy() for i in range(len(columns))]
 
-                start = timestamp
-                last_timestamp = timestamp
+        # The first row of each time period
+        starts = np.concatenate((
+            [0],
+            np.flatnonzero(keys[1:] != keys[:-1]) + 1
+        ))
+        stops = np.append(starts[1:], len(other))
 
-            last = timestamp
+        cumulated = self._cumulate(arrays, cumulators, starts, stops)
+        labels = other.index[starts]
 
-        # Append remaining rows of `other`
-        if start is not None:
-            self._cumulate(other[start:])
-            # Append the rows even the latest time frame is not closed
-            self._pre_append()
+        # The cumulated rows of the time period before `other`
+        prior: Optional[Cumulated] = None
 
-        new, source = cum_append(to, self._to_append)
-        self._to_append.clear()
+        if unclosed is not None:
+            if len(unclosed.columns) != len(columns):
+                unclosed = _reindex_unclosed(unclosed, columns, cumulators)
 
-        unclosed = self._unclosed
+            prior = (
+                unclosed.head if replaced
+                else _combine(unclosed.head, unclosed.last, cumulators)
+            )
+
+        if prior is not None:
+            values = _finalize(
+                _combine(
+                    prior,
+                    _cumulated(
+                        arrays, cumulators, labels[0], starts[0], stops[0]
+                    ),
+                    cumulators
+                ),
+                cumulators
+            )
+
+            cumulated = [
+                _replace_first(array, value)
+                for array, value in zip(cumulated, values)
+            ]
+            labels = labels.delete(0).insert(0, prior.label)
 
-        # .cum_append() will create a new data frame,
-        # so we need to restore `self._unclosed`
-        self._unclosed = current_unclosed
+        # The rows of the latest time period, which are appended
+        # even if the time period is not closed
+        start = starts[-1]
+        stop = len(other)
+
+        head = (
+            _cumulated(
+                arrays, cumulators, other.index[start], start, stop - 1
+            )
+            if stop - 1 > start
+            else None
+        )
+
+        if len(starts) == 1:
+            head = prior if head is None else _combine(prior, head, cumulators)
+
+        unclosed = UnclosedBar(
+            keys[-1],
+            columns,
+            head,
+            _cumulated(
+                arrays, cumulators, other.index[stop - 1], stop - 1, stop
+            ),
+            *_cumulative_of_last(cumulative, offset)
+        )
+
+        new, source = cum_append(to, _to_frame(cumulated, labels, columns))
 
         return new, unclosed, source
 
     def _cumulate(
         self,
-        to_cumulate: DataFrame
-    ) -> None:
+        arrays: List[ndarray],
+        cumulators: List[Optional[Cumulator]],
+        starts: ndarray,
+        stops: ndarray
+    ) -> List[ndarray]:
         """
-        Concat the givin data frame to self._unclosed
+        Cumulates the rows of each time period into one row, which uses the values of the last row except the columns of self._cumulators
         """
 
-        # Logically, at least one of unclosed and to_cumulate is not None.
-        unclosed = self._unclosed
+        counts = stops - starts
+        lasts = stops - 1
 
-        if unclosed is None:
-            self._unclosed = to_cumulate
-            return
+        cumulated = []
 
-        self._unclosed = concat([unclosed, to_cumulate])
+        for array, cumulator in zip(arrays, cumulators):
+            if cumulator is None:
+                cumulated.append(array[lasts])
+                continue
 
-    def _pre_append(
-        self,
-        clean: bool = False
-    ) -> None:
-        """
-        Cumulate self._unclosed and append to self._to_append
+            reduce = REDUCERS.get(cumulator)
 
-        Args:
-            clean (:obj:`bool`, optional): True then clean self._unclosed
-        """
-        # if self._unclosed is None:
-        #     return
+            if reduce is not None:
+                cumulated.append(reduce(array, starts, lasts))
+                continue
 
-        unclosed = self._unclosed
+            # We do not need to cumulate a single row
+            values = array[lasts]
 
-        has_duplicates = False
-        last = None
-        retain = []
-        index = unclosed.index
+            if (counts > 1).any():
+                values = values.astype(object)
 
-        for timestamp in index:
-            if last is None:
-                last = timestamp
-                continue
+                for i in np.flatnonzero(counts > 1):
+                    values[i] = cumulator(array[starts[i]:stops[i]])
 
-            if timestamp == last:
-                # Which means there is a record of the same timestamp,
-                # we do not cumulate them but update it.
-                has_duplicates = True
-                retain.append(False)
-            else:
-                retain.append(True)
+                values = _infer(values)
 
-            last = timestamp
+            cumulated.append(values)
 
-        retain.append(True)
+        return cumulated
 
-        if has_duplicates:
-            unclosed = unclosed[Series(retain, index=index)]
 
-        if clean:
-            self._unclosed = None
+def _cumulated(
+    arrays: List[ndarray],
+    cumulators: List[Optional[Cumulator]],
+    label: Any,
+    start: int,
+    stop: int
+) -> Cumulated:
+    """
+    Cumulates the rows [start, stop)
+    """
 
-        if len(unclosed) == 1:
-            # We do not need to cumulate
-            self._to_append.append(unclosed.iloc[0])
-            return
+    values = []
+
+    for array, cumulator in zip(arrays, cumulators):
+        if cumulator is None:
+            values.append(array[stop - 1])
+            continue
 
-        # Use the values of the last row except columns of self._cumulators
-        cumulated = unclosed.iloc[-1].copy()
+        reduce = REDUCERS.get(cumulator)
 
-        # Use the index of the first row
-        cumulated.rename(unclosed.iloc[0].name, inplace=True)
+        values.append(
+            array[start:stop].copy() if reduce is None
+            else reduce(
+                array[start:stop], np.array([0]), np.array([stop - start - 1])
+            )[0]
+        )
 
-        for column_name in cumulated.index:
-            cumulator = self._cumulators.get(column_name)
+    return Cumulated(label, stop - start, values)
 
-            if cumulator is not None:
-                cumulated[column_name] = cumulator(
-                    unclosed[column_name].to_numpy()
-                )
 
-        self._to_append.append(cumulated)
+def _combine(
+    former: Optional[Cumulated],
+    latter: Cumulated,
+    cumulators: List[Optional[Cumulator]]
+) -> Cumulated:
+    """
+    Combines the cumulated values of consecutive rows
+    """
+
+    if former is None:
+        return latter
+
+    values = []
+
+    for cumulator, a, b in zip(cumulators, former.values, latter.values):
+        if cumulator is None:
+            values.append(b)
+            continue
+
+        combine = COMBINERS.get(cumulator)
+
+        values.append(
+            np.concatenate((a, b)) if combine is None
+            else combine(a, b)
+        )
+
+    return Cumulated(
+        former.label,
+        former.count + latter.count,
+        values
+    )
+
+
+def _finalize(
+    cumulated: Cumulated,
+    cumulators: List[Optional[Cumulator]]
+) -> List[Any]:
+    """
+    Gets the values of the row of the cumulated rows
+    """
+
+    return [
+        (
+            value[-1] if cumulated.count == 1 else cumulator(value)
+        ) if (
+            cumulator is not None and cumulator not in COMBINERS
+        ) else value
+        for cumulator, value in zip(cumulators, cumulated.values)
+    ]
+
+
+def _reindex_unclosed(
+    unclosed: UnclosedBar,
+    columns: Index,
+    cumulators: List[Optional[Cumulator]]
+) -> UnclosedBar:
+    """
+    Appends the new columns of `columns` of which the values are nan, the same as `concat`
+    """
+
+    def reindex(cumulated: Cumulated) -> Cumulated:
+        values = cumulated.values.copy()
+
+        for cumulator in cumulators[len(values):]:
+            values.append(
+                np.full(cumulated.count, np.nan)
+                if cumulator is not None and cumulator not in COMBINERS
+                else np.nan
+            )
+
+        return Cumulated(cumulated.label, cumulated.count, values)
+
+    return replace(
+        unclosed,
+        columns=columns,
+        head=None if unclosed.head is None else reindex(unclosed.head),
+        last=reindex(unclosed.last)
+    )
+
+
+def _cumulative_of_last(
+    cumulative: Optional[ndarray],
+    offset: Optional[float]
+) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Gets the running sums through the last row and before the last row
+    """
+
+    if cumulative is None:
+        return None, None
+
+    return (
+        cumulative[-1],
+        cumulative[-2] if len(cumulative) > 1 else (offset or 0.)
+    )
+
+
+def _replace_first(array: ndarray, value: Any) -> ndarray:
+    return np.concatenate((
+        np.array([value], dtype=object if array.dtype == object else None),
+        array[1:]
+    ))
+
+
+def _to_frame(
+    arrays: List[ndarray],
+    index: Index,
+    columns: Index
+) -> DataFrame:
+    # The same dtype as the rows (Series) of the data frame
+    dtype = find_common_type([array.dtype for array in arrays])
+
+    if dtype == np.dtype(object):
+        return DataFrame(
+            np.column_stack(arrays).astype(object),
+            index=index,
+            columns=columns
+        ).infer_objects()
+
+    return DataFrame(
+        {
+            i: array.astype(dtype, copy=False)
+            for i, array in enumerate(arrays)
+        },
+        index=index
+    ).set_axis(columns, axis=1)
 
 
 class MetaDataFrame(DataFrame):
@@ -417,12 +762,16 @@ class MetaDataFrame(DataFrame):
     The subclass of pandas.DataFrame which ensures return type of all kinds methods to be MetaDataFrame
     """
 
-    _stock_indexer_slice: Optional[slice] = None
-    _stock_indexer_axis: int = 0
-
     _stock_aliases_map: Dict[str, str]
     _stock_columns_info_map: Dict[str, ColumnInfo]
 
+    # The names of the directives to keep up to date once rows are appended
+    _stock_subscriptions: Tuple[str, ...] = ()
+
+    # The byte budget of the cache of calculated series
+    # which are not created as columns. `0` disables the cache
+    RESULT_CACHE_BYTES: int = 64 * 1024 * 1024
+
     # Methods that used by pandas and sub classes
     # --------------------------------------------------------------------
 
@@ -455,13 +804,18 @@ class MetaDataFrame(DataFrame):
 
             # concat:
             # Inside pandas.concat, other is `_Concatenator`
-            copy_clean_stock_metas(
-                other,
-                self,
-                other._stock_indexer_slice,
-                other._stock_indexer_axis
+            indexer = _indexer.get()
+
+            slice_obj, axis = (
+                indexer[1:]
+                # Only if other is the data frame being sliced by the current
+                # call, since there might be other slicings in other threads
+                if indexer is not None and indexer[0] is other
+                else (None, 0)
             )
 
+            copy_clean_stock_metas(other, self, slice_obj, axis)
+
             self._cumulator.update(self, other)
 
         return self
@@ -484,18 +838,12 @@ class MetaDataFrame(DataFrame):
         We mark the slice and axis here to prevent extra calculations
         """
 
-        self._stock_indexer_slice = slice_obj
-        self._stock_indexer_axis = axis
+        token = _indexer.set((self, slice_obj, axis))
 
         try:
-            result = super()._slice(slice_obj, axis)
-        except Exception as e:
-            raise e
+            return super()._slice(slice_obj, axis)
         finally:
-            self._stock_indexer_slice = None
-            self._stock_indexer_axis = 0
-
-        return result
+            _indexer.reset(token)
 
     # --------------------------------------------------------------------
 
@@ -505,9 +853,10 @@ class MetaDataFrame(DataFrame):
         # from_constructor: Optional[bool] = bool,
         date_col: Optional[str] = None,
         to_datetime_kwargs: Dict[str, Any] = {},
-        time_frame: Optional[TimeFrameArg] = None,
+        time_frame: Union[TimeFrameArg, ThresholdBars] = None,
         cumulators: Optional[Cumulators] = None,
         source: Optional[Self] = None,
+        max_rows: Optional[int] = None,
         *args: Any,
         **kwargs: Any
     ) -> None:
@@ -518,13 +867,26 @@ class MetaDataFrame(DataFrame):
             data (ndarray, Iterable, dict, DataFrame, StockDataFrame): data
             date_col (:obj:`str`, optional): If set, then the column named `date_col` will convert and set as the DateTimeIndex of the data frame
             to_datetime_kwargs (dict): the keyworded arguments to be passed to `pandas.to_datetime()`. It only takes effect if `date_col` is specified.
-            time_frame (str, TimeFrame): defines the time frame of the stock
+            time_frame (str, TimeFrame, ThresholdBars): defines the time frame of the stock, or the volume, dollar or tick bars to cumulate rows into
             source (:obj:`StockDataFrame`, optional): the source to copy meta data from if the source is a StockDataFrame. Defaults to `data`
             cumulators (:obj:`Cumulators`, optional): a dict of `Cumulator`s for each column name. A `Cumulator` is a function that accepts an `np.ndarray` as the only parameter and returns a float.
+            max_rows (:obj:`int`, optional): if set, only the latest `max_rows` rows are retained, and the oldest rows are dropped when new rows are appended.
             *args: other pandas.DataFrame arguments
             **kwargs: other pandas.DataFrame keyworded arguments
         """
 
+        if max_rows is not None:
+            if not isinstance(data, DataFrame):
+                data = DataFrame(data, *args, **kwargs)
+                args, kwargs = (), {}
+
+            if len(data) > ensure_max_rows(max_rows):
+                if source is data:
+                    source = None
+
+                # Slicing keeps the meta data of a stock data frame valid
+                data = data.iloc[- max_rows:]
+
         DataFrame.__init__(self, data, *args, **kwargs)
 
         if self.columns.nlevels > 1:
@@ -548,6 +910,7 @@ class MetaDataFrame(DataFrame):
             not is_meta_frame
             and date_col is None
             and time_frame is None
+            and max_rows is None
         ):
             # Cases
             # 1.
@@ -569,18 +932,204 @@ class MetaDataFrame(DataFrame):
             date_col=date_col,
             to_datetime_kwargs=to_datetime_kwargs,
             time_frame=time_frame,
-            cumulators=cumulators
+            cumulators=cumulators,
+            max_rows=max_rows
         )
 
+    def _stock_meta(self, key: str, create: Callable[[], T]) -> T:
+        """
+        Gets the meta of `key`, which is created by `create()` lazily
+
+        The meta is created only once even if the data frame is read by several threads at the same time
+        """
+
+        meta = getattr(self, key, None)
+
+        if meta is None:
+            with _META_LOCK:
+                meta = getattr(self, key, None)
+
+                if meta is None:
+                    meta = create()
+                    set_attr(self, key, meta)
+
+        return meta
+
+    @property
+    def _lock(self) -> RLock:
+        """
+        The lock of the data frame, which should be held to create or fulfill the columns
+        """
+
+        return self._stock_meta(KEY_LOCK, RLock)
+
     @property
     def _cumulator(self) -> _Cumulator:
-        cumulator = getattr(self, KEY_CUMULATOR, None)
+        return self._stock_meta(KEY_CUMULATOR, _Cumulator)
 
-        if cumulator is None:
-            cumulator = _Cumulator()
-            set_attr(self, KEY_CUMULATOR, cumulator)
+    @property
+    def _result_cache(self) -> ResultCache:
+        return self._stock_meta(
+            KEY_RESULT_CACHE,
+            lambda: ResultCache(self.RESULT_CACHE_BYTES)
+        )
+
+    @property
+    def _prefix_sums_map(self) -> Dict[str, PrefixSums]:
+        return self._stock_meta(KEY_PREFIX_SUMS, dict)
+
+    @property
+    def _derived_frames_map(self) -> Dict[TimeFrame, DerivedFrame]:
+        return self._stock_meta(KEY_DERIVED_FRAMES, dict)
+
+    def _stock_changed(
+        self,
+        columns: ChangedColumns = None,
+        start: Optional[int] = 0
+    ) -> None:
+        """
+        Invalidates the calculated results which depend on the changed `columns`, `None` indicates that any column might be changed
+
+        Args:
+            start (:obj:`int`, optional): the position of the first changed row. `None` indicates that no value is changed, such as renaming the columns
+        """
+
+        # The rows differ from the storage now
+        set_attr(self, KEY_STORAGE, None)
+
+        self._stock_invalidate(columns, start)
+
+    def _stock_invalidate(
+        self,
+        columns: ChangedColumns = None,
+        start: Optional[int] = None
+    ) -> None:
+
+        cache = getattr(self, KEY_RESULT_CACHE, None)
+
+        if cache is not None:
+            cache.invalidate(columns)
 
-        return cumulator
+        prefix_sums_map = getattr(self, KEY_PREFIX_SUMS, None)
+
+        if prefix_sums_map:
+            for column in (
+                list(prefix_sums_map) if columns is None else columns
+            ):
+                prefix_sums = prefix_sums_map.pop(column, None)
+
+                if prefix_sums is not None and start:
+                    # The prefix sums of the rows before are still valid
+                    prefix_sums_map[column] = prefix_sums.slice(0, start)
+
+        columns_info_map = getattr(self, KEY_COLUMNS_INFO_MAP, None) or {}
+
+        # The columns which are not the columns of directives,
+        # such as the source columns
+        changed = None if columns is None else {
+            column
+            for column in columns
+            if column not in columns_info_map
+        }
+
+        if changed is not None and not changed:
+            # Only the columns of directives are set, by fulfilling them
+            return
+
+        derived_frames_map = getattr(self, KEY_DERIVED_FRAMES, None)
+
+        if derived_frames_map:
+            derived_frames_map.clear()
+
+        if start is not None:
+            self._stock_dirty(changed, start)
+
+    def _stock_dirty(
+        self,
+        columns: ChangedColumns,
+        start: int
+    ) -> None:
+        """
+        Marks the columns of directives which read from the changed `columns` to be calculated again from the row `start`, so that only the rows from `start` and the lookback rows before will be calculated when they are fulfilled.
+
+        The columns of directives which read from other marked ones, such as by aliases, are marked either
+        """
+
+        columns_info_map = self._stock_columns_info_map
+        aliases_map = self._stock_aliases_map
+
+        changed = None if columns is None else set(columns)
+        unchecked = dict(columns_info_map)
+
+        while unchecked:
+            dirty = [
+                name
+                for name, info in unchecked.items()
+                if changed is None or not changed.isdisjoint(
+                    aliases_map.get(column, column)
+                    for column in get_source_columns(info.directive)
+                )
+            ]
+
+            if not dirty:
+                break
+
+            for name in dirty:
+                info = unchecked.pop(name)
+
+                if info.size > start:
+                    # The state after the last calculated row is invalid
+                    # either
+                    columns_info_map[name] = info.update(start)
+
+            if changed is not None:
+                changed.update(dirty)
+
+    # Methods that change the data frame in place
+    # --------------------------------------------------------------------
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        super().__setitem__(key, value)
+        self._stock_changed(labels_to_columns(key))
+
+    def __delitem__(self, key: Any) -> None:  # type: ignore
+        super().__delitem__(key)
+        self._stock_changed(labels_to_columns(key), None)
+
+    def _update_inplace(self, *args: Any, **kwargs: Any) -> None:
+        super()._update_inplace(*args, **kwargs)  # type: ignore
+        self._stock_changed()
+
+    def _iset_item(self, loc: int, *args: Any, **kwargs: Any) -> None:
+        # Such as `replace({column: ...}, inplace=True)`
+        super()._iset_item(loc, *args, **kwargs)  # type: ignore
+        self._stock_changed({self.columns[loc]})
+
+    def _maybe_cache_changed(self, item: Any, *args: Any, **kwargs: Any) -> None:
+        # Chained assignments without copy-on-write, such as
+        # `df['close'].iloc[i] = x`, which change the values in place
+        super()._maybe_cache_changed(item, *args, **kwargs)  # type: ignore
+        self._stock_changed({item})
+
+    def _set_axis(self, *args: Any, **kwargs: Any) -> None:
+        super()._set_axis(*args, **kwargs)  # type: ignore
+        self._stock_changed(None, None)
+
+    @property
+    def loc(self) -> _StockLocIndexer:  # type: ignore
+        return _StockLocIndexer('loc', self)
+
+    @property
+    def iloc(self) -> _StockILocIndexer:  # type: ignore
+        return _StockILocIndexer('iloc', self)
+
+    @property
+    def at(self) -> _StockAtIndexer:  # type: ignore
+        return _StockAtIndexer('at', self)
+
+    @property
+    def iat(self) -> _StockIAtIndexer:  # type: ignore
+        return _StockIAtIndexer('iat', self)
 
     # Public Methods of stock-pandas
     # --------------------------------------------------------------------
@@ -608,9 +1157,13 @@ class MetaDataFrame(DataFrame):
 
         others = self._standardize_other(other)
 
-        appended = concat([self, *others], *args, **kwargs)
+        appended = (
+            concat([self, *others], *args, **kwargs)
+            if args or kwargs
+            else self._stock_concat(others)
+        )
 
-        return ensure_type(appended, self)
+        return ensure_type(appended, self)._stock_trim()._stock_after_append()
 
     def cum_append(
         self,
@@ -635,8 +1188,223 @@ class MetaDataFrame(DataFrame):
         df = ensure_type(concatenated, source)
         df._cumulator._unclosed = unclosed
 
+        return df._stock_trim()._stock_after_append()
+
+    @classmethod
+    def from_ticks(
+        cls,
+        ts: Dates,
+        price: Any,
+        size: Any,
+        time_frame: Union[str, TimeFrame, ThresholdBars],
+        **kwargs: Any
+    ) -> Self:
+        """
+        Creates a stock data frame of the open, high, low, close and volume bars of trades by the time frame, and the latest bar is unclosed, so that the trades after could be `cum_append()`ed
+
+        Args:
+            ts (DatetimeIndex, ndarray): the timestamps of the trades, or int64 nanoseconds since epoch
+            price (array-like): the prices of the trades
+            size (array-like): the sizes of the trades
+            time_frame (str, TimeFrame, ThresholdBars): the time frame of the bars, or volume, dollar or tick bars
+            **kwargs: other keyworded arguments of the constructor, such as `max_rows`
+        """
+
+        time_frame = ensure_bucketing(time_frame)
+
+        index = ts if isinstance(ts, DatetimeIndex) else DatetimeIndex(
+            to_datetime64(ts)
+        )
+        price = np.asarray(price, dtype=float)
+        size = np.asarray(size, dtype=float)
+
+        length = len(index)
+
+        if len(price) != length or len(size) != length:
+            raise ValueError('ts, price and size must have the same length')
+
+        # Each trade is a row of which open, high, low and close are the price
+        arrays = [price, price, price, price, size]
+
+        keys, cumulative = bucket(
+            time_frame,
+            DataFrame(
+                dict(zip(TICK_COLUMNS, arrays)),
+                index=index
+            ) if isinstance(time_frame, ThresholdBars) else DataFrame(
+                index=index
+            ),
+            None
+        )
+        starts, *bars = aggregate_ticks(keys, price, size)
+
+        df = cls(
+            DataFrame(
+                dict(zip(TICK_COLUMNS, bars)),
+                index=index[starts]
+            ),
+            time_frame=time_frame,
+            **kwargs
+        )
+
+        if not length:
+            return df
+
+        cumulator = df._cumulator
+        columns = df.columns
+        cumulators = [cumulator._cumulators.get(column) for column in columns]
+
+        start = starts[-1]
+        stop = length - 1
+
+        cumulator._unclosed = UnclosedBar(
+            keys[-1],
+            columns,
+            _cumulated(
+                arrays, cumulators, index[start], start, stop
+            ) if stop > start else None,
+            _cumulated(arrays, cumulators, index[stop], stop, length),
+            *_cumulative_of_last(cumulative, None)
+        )
+
+        return df
+
+    def _stock_trim(self) -> Self:
+        """
+        Drops the oldest rows which exceed `max_rows`.
+
+        The rows are dropped by slicing, which shares the data of the retained rows and keeps the sizes and the states of the columns of directives
+        """
+
+        max_rows = self._cumulator._max_rows
+
+        if max_rows is None or len(self) <= max_rows:
+            return self
+
+        count = len(self) - max_rows
+
+        self._stock_before_drop(count)
+
+        span = self._stock_span()
+
+        if span is None:
+            return self.iloc[- max_rows:]  # type: ignore
+
+        trimmed = self._stock_view(
+            Span(span.storage, span.start + count, span.stop)
+        )
+
+        # The same as `__finalize__()` of `self.iloc[- max_rows:]`
+        copy_clean_stock_metas(self, trimmed, slice(count, None))
+        trimmed._cumulator.update(trimmed, self)
+
+        return trimmed
+
+    def _stock_concat(self, others: List[DataFrame]) -> DataFrame:
+        """
+        Concatenates `others` after the rows of the data frame, which appends the rows to the storage in amortized constant time if possible
+        """
+
+        # Without copy-on-write, the in-place modifications of a view would
+        # write to the arrays shared by other data frames
+        if not is_copy_on_write():
+            return concat([self, *others])
+
+        span = self._stock_span()
+
+        if span is None:
+            created = Storage.create(self, others)
+            span = None if created is None else created[1]
+        else:
+            span = span.storage.append(span, others)
+
+        if span is None:
+            return concat([self, *others])
+
+        return self._stock_view(span)
+
+    def _stock_span(self) -> Optional[Span]:
+        """
+        Gets the span of the rows of the data frame in the storage, if rows could be appended to the storage in place
+        """
+
+        span = getattr(self, KEY_STORAGE, None)
+
+        return span if span is not None and span.is_tip(self) else None
+
+    def _stock_view(self, span: Span) -> Self:
+        """
+        Creates the data frame of the rows of `span` without copying, of which the meta data should be copied afterwards
+        """
+
+        df = self._constructor(span.storage.frame(span.start, span.stop))
+        set_attr(df, KEY_STORAGE, span)
+
         return df
 
+    def _stock_raw_rows(self, start: int) -> DataFrame:
+        """
+        Gets the rows from `start` on, without the columns of directives
+        """
+
+        columns_info_map = self._stock_columns_info_map
+
+        return DataFrame(
+            {
+                column: self._ixs(i, axis=1).to_numpy()[start:]  # type: ignore
+                for i, column in enumerate(self.columns)
+                if column not in columns_info_map
+            },
+            index=self.index[start:]
+        )
+
+    def _stock_derive(self, time_frame: TimeFrame) -> Self:
+        """
+        Gets the stock data frame of the higher `time_frame` cumulated from the rows, which is cached, and only the newly appended rows are cumulated the next time
+        """
+
+        derived_frames_map = self._derived_frames_map
+        derived = derived_frames_map.get(time_frame)
+        size = len(self)
+
+        if derived is not None and (
+            # The row to replace the last cumulated row
+            size > derived.size and self.index[derived.size] == derived.last
+            if derived.replace
+            else size >= derived.size
+        ):
+            frame = derived.frame
+            start = derived.size
+        else:
+            frame = self._constructor(
+                time_frame=time_frame,
+                cumulators=self._cumulator._cumulators,
+                max_rows=self._cumulator._max_rows
+            )
+            start = 0
+
+        if size == start:
+            return frame
+
+        frame = frame.cum_append(self._stock_raw_rows(start))
+        derived_frames_map[time_frame] = DerivedFrame(
+            frame, size, self.index[-1]
+        )
+
+        return frame
+
+    def _stock_before_drop(self, count: int) -> None:
+        """
+        Called before the first `count` rows are dropped by `max_rows`
+        """
+
+    def _stock_after_append(self) -> Self:
+        """
+        Called with the data frame created by `append()` or `cum_append()`, which returns the data frame
+        """
+
+        return self
+
     def _standardize_other(self, other: Any) -> List[DataFrame]:
         other = self._cumulator.apply_date_col(other)
 
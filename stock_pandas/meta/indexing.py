@@ -0,0 +1,206 @@
+from __future__ import annotations
+from typing import (
+    Any,
+    Optional,
+    Set,
+    TYPE_CHECKING
+)
+
+import numpy as np
+from pandas.api.types import (
+    is_bool_dtype,
+    is_list_like,
+    is_integer
+)
+from pandas.core.indexing import (
+    _LocIndexer,
+    _iLocIndexer,
+    _AtIndexer,
+    _iAtIndexer
+)
+
+if TYPE_CHECKING:
+    from .cumulator import MetaDataFrame # pragma: no cover
+
+
+ChangedColumns = Optional[Set[str]]
+
+
+def labels_to_columns(labels: Any) -> ChangedColumns:
+    """
+    Gets the names of the columns that are set by column label(s) `labels`, or `None` if it could not be determined
+    """
+
+    if isinstance(labels, str):
+        return {labels}
+
+    if is_list_like(labels) and all(isinstance(x, str) for x in labels):
+        return set(labels)
+
+    return None
+
+
+def positions_to_columns(
+    df: MetaDataFrame,
+    positions: Any
+) -> ChangedColumns:
+    """
+    Gets the names of the columns that are set by column position(s) `positions`, or `None` if it could not be determined
+    """
+
+    if is_integer(positions):
+        positions = [positions]
+
+    if is_list_like(positions) and all(is_integer(x) for x in positions):
+        columns = df.columns
+        return {columns[i] for i in positions}
+
+    return None
+
+
+def _first_position(loc: Any, length: int) -> int:
+    """
+    Gets the first position of `loc`, which is an integer, a slice, a boolean mask or an array of integers
+    """
+
+    if is_integer(loc):
+        return loc + length if loc < 0 else loc
+
+    if isinstance(loc, slice):
+        if loc.step is not None and loc.step < 0:
+            return 0
+
+        return loc.indices(length)[0]
+
+    array = np.asarray(loc)
+
+    if not len(array):
+        return length
+
+    if is_bool_dtype(array):
+        return int(array.argmax()) if array.any() else length
+
+    if array.dtype.kind in 'iu':
+        array = np.where(array < 0, array + length, array)
+        return int(array.min())
+
+    raise TypeError(f'unknown location {loc!r}')
+
+
+def labels_to_start(
+    df: MetaDataFrame,
+    labels: Any
+) -> int:
+    """
+    Gets the position of the first row that is set by row label(s) `labels`, or `0` if it could not be determined
+    """
+
+    index = df.index
+    length = len(index)
+    loc: Any
+
+    try:
+        if isinstance(labels, slice):
+            loc = index.slice_indexer(labels.start, labels.stop, labels.step)
+        elif not is_list_like(labels):
+            loc = index.get_loc(labels)
+        elif is_bool_dtype(np.asarray(labels)):
+            # A boolean mask
+            loc = labels
+        else:
+            loc = index.get_indexer(labels)
+
+            if (loc < 0).any():
+                return 0
+
+        return _first_position(loc, length)
+    except Exception:
+        return 0
+
+
+def positions_to_start(
+    df: MetaDataFrame,
+    positions: Any
+) -> int:
+    """
+    Gets the position of the first row that is set by row position(s) `positions`, or `0` if it could not be determined
+    """
+
+    try:
+        return _first_position(positions, len(df))
+    except Exception:
+        return 0
+
+
+def _column_key(key: Any) -> Any:
+    # df.loc[rows, columns]
+    if isinstance(key, tuple) and len(key) == 2:
+        return key[1]
+
+    return None
+
+
+def _row_key(key: Any) -> Any:
+    if isinstance(key, tuple) and len(key) == 2:
+        return key[0]
+
+    # df.loc[rows]
+    return key
+
+
+class _StockLocIndexer(_LocIndexer):
+    obj: MetaDataFrame
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        super().__setitem__(key, value)  # type: ignore
+
+        column_key = _column_key(key)
+
+        self.obj._stock_changed(
+            None if column_key is None else labels_to_columns(column_key),
+            labels_to_start(self.obj, _row_key(key))
+        )
+
+
+class _StockILocIndexer(_iLocIndexer):
+    obj: MetaDataFrame
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        super().__setitem__(key, value)  # type: ignore
+
+        column_key = _column_key(key)
+
+        self.obj._stock_changed(
+            None if column_key is None
+            else positions_to_columns(self.obj, column_key),
+            positions_to_start(self.obj, _row_key(key))
+        )
+
+
+class _StockAtIndexer(_AtIndexer):
+    obj: MetaDataFrame
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        super().__setitem__(key, value)
+
+        column_key = _column_key(key)
+
+        self.obj._stock_changed(
+            None if column_key is None else labels_to_columns(column_key),
+            labels_to_start(self.obj, _row_key(key))
+        )
+
+
+class _StockIAtIndexer(_iAtIndexer):
+    obj: MetaDataFrame
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        super().__setitem__(key, value)
+
+        column_key = _column_key(key)
+
+        self.obj._stock_changed(
+            None if column_key is None
+            else positions_to_columns(self.obj, column_key),
+            positions_to_start(self.obj, _row_key(key))
+        )
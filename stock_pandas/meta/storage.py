@@ -0,0 +1,333 @@
+"""Over-allocated storage of the rows of stock data frames.
+
+`append()` and `cum_append()` create new data frames, and `pandas.concat`
+copies all rows of the data frame, including the columns of directives, each
+time. Instead, the rows could be kept in over-allocated arrays whose capacity
+doubles when they are full, and the data frame after the appended rows is a
+view of the arrays, so that appending rows costs amortized constant time.
+
+The views are sliced from a data frame of the whole arrays, so that the
+copy-on-write of pandas protects the arrays from in-place modifications of
+the views. Therefore, the storage is only used if copy-on-write is enabled. The capacity and the dtypes of a storage never change; if the
+rows do not fit, a new storage is created, so that the rows seen by any view
+are never overwritten by appending rows.
+"""
+
+from __future__ import annotations
+from typing import (
+    Any,
+    List,
+    Optional,
+    Tuple
+)
+from dataclasses import dataclass
+
+import numpy as np
+from pandas import (
+    DataFrame,
+    Index,
+    MultiIndex
+)
+
+from stock_pandas.common import NDArrayAny
+
+
+# The kinds of dtypes which could be promoted to each other,
+# the same as `pandas.concat`
+NUMERIC_KINDS = 'iuf'
+FLOAT = np.dtype(float)
+
+
+def _promote(dtype: np.dtype, other: Any) -> Optional[np.dtype]:
+    if not isinstance(other, np.dtype):
+        return None
+
+    if dtype == other or dtype.kind == 'O':
+        return dtype
+
+    if dtype.kind in NUMERIC_KINDS and other.kind in NUMERIC_KINDS:
+        return np.result_type(dtype, other)
+
+    return None
+
+
+class Storage:
+    """
+    The arrays of the columns and the index of the rows of data frames, of which the first `size` rows are written.
+    """
+
+    __slots__ = (
+        'columns',
+        'dtypes',
+        'capacity',
+        'size',
+        '_arrays',
+        '_index',
+        '_index_name',
+        '_positions',
+        '_base'
+    )
+
+    columns: Index
+    dtypes: List[np.dtype]
+    capacity: int
+    size: int
+
+    def __init__(
+        self,
+        columns: Index,
+        dtypes: List[np.dtype],
+        index_dtype: np.dtype,
+        index_name: Any,
+        capacity: int
+    ) -> None:
+        self.columns = columns
+        self.dtypes = dtypes
+        self.capacity = capacity
+        self.size = 0
+
+        self._arrays = [np.empty(capacity, dtype=dtype) for dtype in dtypes]
+        self._index = np.empty(capacity, dtype=index_dtype)
+        self._index_name = index_name
+        self._positions = {
+            column: i for i, column in enumerate(columns)
+        }
+        self._base: Optional[DataFrame] = None
+
+    @classmethod
+    def create(
+        cls,
+        df: DataFrame,
+        others: List[DataFrame]
+    ) -> Optional[Tuple[Storage, Span]]:
+        """Creates the storage of the rows of `df` with the capacity for `others` to be appended, or returns `None` if `df` is not supported
+        """
+
+        columns = df.columns
+        index = df.index
+
+        if (
+            not len(columns)
+            or not columns.is_unique
+            or isinstance(columns, MultiIndex)
+            or isinstance(index, MultiIndex)
+            or not isinstance(index.dtype, np.dtype)
+        ):
+            return None
+
+        dtypes = df.dtypes.tolist()
+
+        if not all(isinstance(dtype, np.dtype) for dtype in dtypes):
+            return None
+
+        storage = cls(columns, dtypes, index.dtype, index.name, 0)
+
+        return storage._reserve(
+            [df.iloc[:, i].to_numpy() for i in range(len(columns))],
+            index.to_numpy(),
+            others
+        )
+
+    def append(
+        self,
+        span: Span,
+        others: List[DataFrame]
+    ) -> Optional[Span]:
+        """Appends the rows of `others` after the rows of `span`
+
+        Returns:
+            Optional[Span]: the span of the rows along with the appended rows, which might be in a new storage, or `None` if any of `others` is not supported
+        """
+
+        dtypes = self._dtypes_after(others)
+
+        if dtypes is None:
+            return None
+
+        start, stop = span.start, span.stop
+        count = sum(len(other) for other in others)
+
+        if (
+            # Another data frame has appended rows after `span`
+            stop != self.size
+            or stop + count > self.capacity
+            or dtypes != self.dtypes
+            # Most of the rows have been dropped, such as by `max_rows`
+            or start > stop - start
+        ):
+            created = self._reserve(
+                [array[start:stop] for array in self._arrays],
+                self._index[start:stop],
+                others
+            )
+
+            return None if created is None else created[1]
+
+        self._write(others)
+
+        return Span(self, start, stop + count)
+
+    def frame(self, start: int, stop: int) -> DataFrame:
+        """Gets the view of rows [start, stop) as a data frame
+        """
+
+        base = self._base
+
+        if base is None:
+            base = DataFrame(
+                dict(zip(range(len(self._arrays)), self._arrays)),
+                index=Index(self._index, name=self._index_name, copy=False),
+                copy=False
+            )
+            base.columns = self.columns
+            self._base = base
+
+        return base.iloc[start:stop]
+
+    def write_column(
+        self,
+        column: Any,
+        start: int,
+        values: NDArrayAny,
+        current: NDArrayAny
+    ) -> bool:
+        """Writes `values` to the rows from `start` of `column` in place, if the column of the data frame, whose values are `current`, is a view of the storage
+
+        Returns:
+            bool: whether the values are written
+        """
+
+        position = self._positions.get(column)
+
+        if position is None:
+            return False
+
+        array = self._arrays[position]
+
+        if (
+            array.dtype != values.dtype
+            # The data frame might have copied the column,
+            # such as by consolidating the blocks
+            or not np.may_share_memory(array, current)
+        ):
+            return False
+
+        array[start:start + len(values)] = values
+
+        return True
+
+    def _dtypes_after(
+        self,
+        others: List[DataFrame]
+    ) -> Optional[List[np.dtype]]:
+        """Gets the dtypes of the columns after `others` are appended, or `None` if the result could be different from `pandas.concat`
+        """
+
+        dtypes = self.dtypes
+        positions = self._positions
+        index_dtype = self._index.dtype
+
+        for other in others:
+            columns = other.columns
+
+            if (
+                not len(other)
+                or other.index.dtype != index_dtype
+                or isinstance(other.index, MultiIndex)
+                or not columns.is_unique
+                # `pandas.concat` would create new columns
+                or not all(column in positions for column in columns)
+            ):
+                return None
+
+            other_dtypes = dict(zip(columns, other.dtypes))
+
+            promoted = []
+
+            for column, dtype in zip(self.columns, dtypes):
+                new_dtype = _promote(dtype, other_dtypes.get(column, FLOAT))
+
+                if new_dtype is None:
+                    return None
+
+                promoted.append(new_dtype)
+
+            dtypes = promoted
+
+        return dtypes
+
+    def _reserve(
+        self,
+        arrays: List[NDArrayAny],
+        index: NDArrayAny,
+        others: List[DataFrame]
+    ) -> Optional[Tuple[Storage, Span]]:
+        """Creates a new storage with the same columns, which contains `arrays` and `index` along with `others`
+        """
+
+        dtypes = self._dtypes_after(others)
+
+        if dtypes is None:
+            return None
+
+        size = len(index)
+        count = sum(len(other) for other in others)
+
+        storage = Storage(
+            self.columns,
+            dtypes,
+            self._index.dtype,
+            self._index_name,
+            2 * (size + count)
+        )
+
+        for target, array in zip(storage._arrays, arrays):
+            target[:size] = array
+
+        storage._index[:size] = index
+        storage.size = size
+
+        storage._write(others)
+
+        return storage, Span(storage, 0, size + count)
+
+    def _write(self, others: List[DataFrame]) -> None:
+        positions = self._positions
+
+        for other in others:
+            start = self.size
+            stop = start + len(other)
+
+            written = set()
+
+            for column in other.columns:
+                position = positions[column]
+                written.add(position)
+                self._arrays[position][start:stop] = other[column].to_numpy()
+
+            for position, array in enumerate(self._arrays):
+                if position not in written:
+                    array[start:stop] = np.nan
+
+            self._index[start:stop] = other.index.to_numpy()
+            self.size = stop
+
+
+@dataclass(frozen=True, slots=True)
+class Span:
+    """The rows [start, stop) of the storage, which is a data frame
+    """
+
+    storage: Storage
+    start: int
+    stop: int
+
+    def is_tip(self, df: DataFrame) -> bool:
+        """Whether `df` could append rows to the storage in place, i.e. `df` is the span of the latest rows of the storage
+        """
+
+        return (
+            self.stop == self.storage.size
+            and len(df) == self.stop - self.start
+            and df.columns.equals(self.storage.columns)
+        )
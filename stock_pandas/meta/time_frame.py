@@ -1,4 +1,5 @@
 from typing import (
+    Any,
     Callable,
     Dict,
     List,
@@ -8,13 +9,20 @@ from typing import (
 
 from functools import partial
 
+import numpy as np
+from numpy import ndarray
 from pandas import (
+    DatetimeIndex,
     Timestamp
 )
 
 
 TimeFrameUnifier = Callable[[Timestamp], int]
 
+# Dates = DatetimeIndex | ndarray of datetime64 or int64 nanoseconds
+Dates = Union[DatetimeIndex, ndarray]
+TimeFrameManyUnifier = Callable[[Dates], ndarray]
+
 class TimeFrame:
     s1: 'TimeFrame'
     m1: 'TimeFrame'
@@ -39,6 +47,7 @@ class TimeFrame:
     Y1: 'TimeFrame'
 
     _unify: TimeFrameUnifier
+    _unify_many: TimeFrameManyUnifier
     _str: str
     _minutes: int
 
@@ -61,6 +70,18 @@ class TimeFrame:
         """
         return self._unify(date)
 
+    def unify_many(self, dates: Dates) -> ndarray:
+        """
+        Unify timestamps to integers at once, which is the same as `unify()` for each timestamp
+
+        Args:
+            dates (DatetimeIndex | ndarray): the timestamps to be unified, or an array of int64 nanoseconds since epoch
+
+        Returns:
+            ndarray: of int64
+        """
+        return self._unify_many(dates)
+
 
 TimeFrameArg = Union[str, TimeFrame, None]
 
@@ -90,17 +111,116 @@ MAGNITUDE_MONTH  = 100000000
 MAGNITUDE_YEAR   = 10000000000
 
 
+def to_datetime64(dates: Dates) -> ndarray:
+    if isinstance(dates, DatetimeIndex):
+        if dates.tz is not None:
+            # The same as the attributes of a Timestamp with timezone,
+            # fields are of the local time
+            dates = dates.tz_localize(None)
+
+        return dates.to_numpy()
+
+    dates = np.asarray(dates)
+
+    if dates.dtype.kind == 'M':
+        return dates
+
+    if dates.dtype.kind in 'iu':
+        return dates.astype(np.int64, copy=False).view('M8[ns]')
+
+    return DatetimeIndex(dates).to_numpy()
+
+
+class DateFields:
+    """
+    The fields of an array of datetime64 which are the same as the attributes of `Timestamp`, so that a unifier could unify all the dates at once
+    """
+
+    __slots__ = ('_dates',)
+
+    def __init__(self, dates: ndarray) -> None:
+        self._dates = dates
+
+    def _diff(self, unit: str, parent_unit: str) -> ndarray:
+        return (
+            self._dates.astype(f'M8[{unit}]')
+            - self._dates.astype(f'M8[{parent_unit}]')
+        ).astype(np.int64)
+
+    @property
+    def year(self) -> ndarray:
+        return self._dates.astype('M8[Y]').astype(np.int64) + 1970
+
+    @property
+    def month(self) -> ndarray:
+        return self._dates.astype('M8[M]').astype(np.int64) % 12 + 1
+
+    @property
+    def day(self) -> ndarray:
+        return self._diff('D', 'M') + 1
+
+    @property
+    def hour(self) -> ndarray:
+        return self._diff('h', 'D')
+
+    @property
+    def minute(self) -> ndarray:
+        return self._diff('m', 'h')
+
+    @property
+    def second(self) -> ndarray:
+        return self._diff('s', 'm')
+
+
+def vectorize(unify: TimeFrameUnifier) -> TimeFrameManyUnifier:
+    """
+    Creates the unifier of many dates from `unify`.
+
+    A unifier which only uses the attributes of the timestamp and integer arithmetics, such as the built-in ones, is applied to the fields of all dates at once. Otherwise, it is applied to each timestamp.
+    """
+
+    def unify_many(dates: Dates) -> ndarray:
+        dates = to_datetime64(dates)
+
+        try:
+            unified: Any = unify(DateFields(dates))  # type: ignore
+        except Exception:
+            unified = None
+
+        if (
+            isinstance(unified, ndarray)
+            and unified.shape == dates.shape
+            and unified.dtype.kind in 'iu'
+        ):
+            return unified.astype(np.int64, copy=False)
+
+        return np.fromiter(
+            (unify(Timestamp(date)) for date in dates),
+            dtype=np.int64,
+            count=len(dates)
+        )
+
+    return unify_many
+
+
 def define(
     suffix: str,
     name: Union[str, List[str]],
     unify: TimeFrameUnifier,
-    minutes: int
+    minutes: int,
+    unify_many: Optional[TimeFrameManyUnifier] = None
 ) -> TimeFrame:
     names = name if isinstance(name, list) else [name]
     primary_name = names[0]
 
+    many: TimeFrameManyUnifier = (
+        vectorize(unify) if unify_many is None
+        else unify_many
+    )
+
     class NewClass(TimeFrame):
         _unify = staticmethod(unify)
+        _unify_many = staticmethod(many)
         _str = primary_name
         _minutes = minutes
 
@@ -115,7 +235,7 @@ def define(
 
 
 def unify_second(n: int, date: Timestamp) -> int:
-    return int(
+    return (
         (date.second // n) * MAGNITUDE_SECOND
         + date.minute * MAGNITUDE_MINUTE
         + date.hour * MAGNITUDE_HOUR
@@ -130,7 +250,7 @@ TimeFrame.s1 = define('s1', ['1s', '1S'], partial[int](unify_second, 1), 1)
 
 def unify_minute(n: int, date: Timestamp) -> int:
     # 202501311235
-    return int(
+    return (
         (date.minute // n) * MAGNITUDE_MINUTE
         + date.hour * MAGNITUDE_HOUR
         + date.day * MAGNITUDE_DATE
@@ -147,7 +267,7 @@ TimeFrame.m30 = define('m30', '30m', partial[int](unify_minute, 30), 30)
 
 
 def unify_hour(n: int, date: Timestamp) -> int:
-    return int(
+    return (
         (date.hour // n) * MAGNITUDE_HOUR
         + date.day * MAGNITUDE_DATE
         + date.month * MAGNITUDE_MONTH
@@ -166,7 +286,7 @@ TimeFrame.H12 = define(
 
 
 def unify_date(n: int, date: Timestamp) -> int:
-    return int(
+    return (
         (date.day // n) * MAGNITUDE_DATE
         + date.month * MAGNITUDE_MONTH
         + date.year * MAGNITUDE_YEAR
@@ -179,7 +299,7 @@ TimeFrame.W1 = define('W1', ['1w', '1W'], partial[int](unify_date, 7), 10080)
 
 
 def unify_month(n: int, date: Timestamp) -> int:
-    return int(
+    return (
         (date.month // n) * MAGNITUDE_MONTH
         + date.year * MAGNITUDE_YEAR
     )
@@ -189,7 +309,7 @@ TimeFrame.M1 = define('M1', '1M', partial[int](unify_month, 1), 525600)
 
 
 def unify_year(n: int, date: Timestamp) -> int:
-    return int(
+    return (
         (date.year // n) * MAGNITUDE_YEAR
     )
 
@@ -14,34 +14,89 @@ from stock_pandas.directive.types import Directive
 from stock_pandas.common import set_attr
 from stock_pandas.properties import (
     KEY_ALIAS_MAP,
-    KEY_COLUMNS_INFO_MAP
+    KEY_COLUMNS_INFO_MAP,
+    KEY_PREFIX_SUMS,
+    KEY_DERIVED_FRAMES,
+    KEY_SUBSCRIPTIONS
 )
 
 
 @dataclass(slots=True)
 class ColumnInfo:
+    """
+    Args:
+        size (int): the count of rows that have been calculated
+        state (:obj:`Any`, optional): the state of the kernel after `size` rows, returned by `CommandPreset.stateful_formula`, with which the newly appended rows could be calculated without lookback. The state should never be changed in place, since it is shared by data frames
+        prev_state (:obj:`Any`, optional): the state of the kernel after `size - 1` rows, with which the last row could be calculated again once it is replaced, such as the unclosed bar by `cum_append()`
+    """
+
     size: int
     directive: Directive
     lookback: int
+    state: Any = None
+    prev_state: Any = None
 
     def __deepcopy__(self, _) -> 'ColumnInfo':
         return ColumnInfo(
             self.size,
             self.directive,
-            self.lookback
+            self.lookback,
+            self.state,
+            self.prev_state
         )
 
-    def update(self, size: int) -> 'ColumnInfo':
+    def update(
+        self,
+        size: int,
+        keep_state: bool = False
+    ) -> 'ColumnInfo':
         """Creates a new ColumnInfo and update the size
+
+        Args:
+            keep_state (:obj:`bool`, optional): whether the state is still the one after the last calculated row
+        """
+
+        return ColumnInfo(
+            size,
+            self.directive,
+            self.lookback,
+            self.state if keep_state else None,
+            self.prev_state if keep_state else None
+        )
+
+    def rewind(self, size: int) -> 'ColumnInfo':
+        """Creates a new ColumnInfo of which the last calculated row is dropped, so that the state is the one before the row
+
+        Args:
+            size (int): the count of the calculated rows which are retained
         """
 
         return ColumnInfo(
             size,
             self.directive,
-            self.lookback
+            self.lookback,
+            self.prev_state
         )
 
 
+@dataclass(frozen=True, slots=True)
+class DerivedFrame:
+    """
+    The stock data frame of a higher time frame which is derived from the rows of a data frame
+
+    Args:
+        frame (StockDataFrame): the derived data frame, of which the unclosed bar has been cumulated with the row `last`
+        size (int): the count of rows of the data frame which have been cumulated into `frame`
+        last (Any): the label of the last row which has been cumulated
+        replace (bool): whether the row `last` has been dropped from the data frame, so that the row of the same label should be cumulated again to replace it
+    """
+
+    frame: Any
+    size: int
+    last: Any
+    replace: bool = False
+
+
 OptionalSlice = Optional[slice]
 
 
@@ -63,6 +118,11 @@ def update_info_size(
     stop = slice_obj.stop
     start = slice_obj.start
 
+    # Whether the last calculated row is kept
+    keep_state = True
+    # Whether only the last calculated row is dropped
+    rewind = False
+
     if stop is not None:
         if stop < 0:
             stop = source_length + stop
@@ -78,20 +138,31 @@ def update_info_size(
         #          size      |
         #           |        |
         # ---------------------------------
-        size = min(size, stop)
+        if stop < size:
+            rewind = stop == size - 1
+            size = stop
+            keep_state = False
 
     if start is not None:
         if start < 0:
             start = source_length + start
 
-        size -= start
+        # The calculated rows might be all dropped
+        size = max(size - start, 0)
+
+    if size == 0:
+        return info.update(0)
+
+    if rewind:
+        return info.rewind(size)
 
-    return info.update(size)
+    return info.update(size, keep_state)
 
 
 def init_stock_metas(target: Any) -> None:
     set_attr(target, KEY_ALIAS_MAP, {})
     set_attr(target, KEY_COLUMNS_INFO_MAP, {})
+    set_attr(target, KEY_SUBSCRIPTIONS, ())
 
 
 def copy_stock_metas(
@@ -109,6 +180,13 @@ def copy_stock_metas(
         copy(getattr(meta_source, KEY_ALIAS_MAP))
     )
 
+    # The tuple of subscriptions is never changed in place
+    set_attr(
+        target,
+        KEY_SUBSCRIPTIONS,
+        getattr(meta_source, KEY_SUBSCRIPTIONS)
+    )
+
     if copy_columns_info:
         set_attr(
             target,
@@ -141,6 +219,11 @@ def copy_clean_stock_metas(
             aliases_map[alias] = column
 
     set_attr(target, KEY_ALIAS_MAP, aliases_map)
+    set_attr(
+        target,
+        KEY_SUBSCRIPTIONS,
+        getattr(source, KEY_SUBSCRIPTIONS)
+    )
 
     source_length = len(source)
 
@@ -164,6 +247,105 @@ def copy_clean_stock_metas(
 
     set_attr(target, KEY_COLUMNS_INFO_MAP, columns_info_map)
 
+    if slice_obj is not None or axis == 1:
+        # Only slicing keeps the prefix sums valid
+        copy_prefix_sums(source, target, slice_obj, axis)
+        copy_derived_frames(source, target, slice_obj, axis)
+
+
+def copy_prefix_sums(
+    source: Any,
+    target: Any,
+    slice_obj: OptionalSlice = None,
+    axis: int = 0
+) -> None:
+    """
+    Copy the prefix sums of columns from source to target, which should be either
+    - `source` with rows appended, if `slice_obj` is None
+    - or the slice of `source` by `slice_obj` along `axis`
+    """
+
+    prefix_sums_map = getattr(source, KEY_PREFIX_SUMS, None)
+
+    if not prefix_sums_map:
+        return
+
+    if axis == 0 and slice_obj is not None:
+        if slice_obj.step is not None:
+            return
+
+        start, stop, _ = slice_obj.indices(len(source))
+
+        prefix_sums_map = {
+            column: prefix_sums.slice(start, stop)
+            for column, prefix_sums in prefix_sums_map.items()
+        }
+
+    columns = target.columns
+
+    set_attr(target, KEY_PREFIX_SUMS, {
+        column: prefix_sums
+        for column, prefix_sums in prefix_sums_map.items()
+        # The column might be dropped
+        if column in columns
+    })
+
+
+def copy_derived_frames(
+    source: Any,
+    target: Any,
+    slice_obj: OptionalSlice = None,
+    axis: int = 0
+) -> None:
+    """
+    Copy the derived frames of higher time frames from source to target, which should be either
+    - `source` with rows appended, if `slice_obj` is None
+    - or the slice of `source` by `slice_obj` along `axis`
+    """
+
+    derived_frames_map = getattr(source, KEY_DERIVED_FRAMES, None)
+
+    if not derived_frames_map:
+        return
+
+    if slice_obj is None:
+        set_attr(target, KEY_DERIVED_FRAMES, derived_frames_map.copy())
+        return
+
+    if axis == 1 or slice_obj.step is not None:
+        # The source columns might be dropped
+        return
+
+    start, stop, _ = slice_obj.indices(len(source))
+
+    sliced = {}
+
+    for time_frame, derived in derived_frames_map.items():
+        size = derived.size
+        replace = derived.replace
+
+        if stop < size:
+            if replace or stop < size - 1:
+                continue
+
+            # The last cumulated row is dropped, which is the case of
+            # `cum_append()` that replaces the last row
+            size = stop
+            replace = True
+
+        if start > size:
+            # Some rows are dropped before they are cumulated
+            continue
+
+        sliced[time_frame] = DerivedFrame(
+            derived.frame,
+            size - start,
+            derived.last,
+            replace
+        )
+
+    set_attr(target, KEY_DERIVED_FRAMES, sliced)
+
 
 def ensure_return_type(
     cls: Any,
@@ -0,0 +1,48 @@
+"""
+Precision configuration module for stock-pandas.
+
+Exponential filters, such as `ema`, `macd`, `kdj` and `rsi`, depend on all
+previous values, so a series recalculated from only the last rows of the
+lookback differs from the one calculated from the first row. The lookbacks of
+these commands are derived from the lookback tolerance, so that the weight of
+the truncated history in the result is less than the tolerance.
+"""
+
+# The weight of the truncated history is less than 1e-8,
+# so the error is negligible comparing with the prices
+DEFAULT_LOOKBACK_TOLERANCE = 1e-8
+
+_lookback_tolerance: float = DEFAULT_LOOKBACK_TOLERANCE
+
+
+def set_lookback_tolerance(tolerance: float) -> None:
+    """Set the max weight of the truncated history for the lookbacks of exponential filters.
+
+    A smaller tolerance results in more lookback rows to recalculate, and more precise results. The lookbacks of the directives are recalculated with the new tolerance, whereas the columns that have been created keep their lookbacks.
+
+    Args:
+        tolerance: A float which is greater than 0 and less than 1.
+
+    Raises:
+        ValueError: If tolerance is out of range.
+
+    Example:
+        >>> import stock_pandas
+        >>> stock_pandas.set_lookback_tolerance(1e-12)
+    """
+    global _lookback_tolerance
+
+    tolerance = float(tolerance)
+
+    if not 0. < tolerance < 1.:
+        raise ValueError(
+            f'lookback tolerance must be between 0 and 1, but got `{tolerance}`'
+        )
+
+    _lookback_tolerance = tolerance
+
+
+def get_lookback_tolerance() -> float:
+    """Get the max weight of the truncated history for the lookbacks of exponential filters.
+    """
+    return _lookback_tolerance
@@ -2,3 +2,11 @@ KEY_ALIAS_MAP = '_stock_aliases_map'
 KEY_COLUMNS_INFO_MAP = '_stock_columns_info_map'
 
 KEY_CUMULATOR = '_stock_cumulator'
+
+KEY_RESULT_CACHE = '_stock_result_cache'
+KEY_PREFIX_SUMS = '_stock_prefix_sums'
+KEY_STORAGE = '_stock_storage'
+KEY_DERIVED_FRAMES = '_stock_derived_frames'
+KEY_SUBSCRIPTIONS = '_stock_subscriptions'
+KEY_LOCK = '_stock_lock'
+KEY_PENDING_EXECS = '_stock_pending_execs'
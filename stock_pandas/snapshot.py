@@ -0,0 +1,130 @@
+"""Snapshots of stock data frames.
+
+A live data frame is usually appended by one thread while it is read by many
+others. `StockDataFrame.snapshot()` captures the rows and the versions of the
+columns of directives, i.e. the counts of their calculated rows, at the time,
+without copying the data if the copy-on-write mode of pandas is enabled:
+
+- the snapshot is a lazy copy of the data frame, so that the copy-on-write of
+  pandas protects it from the in-place modifications of the data frame.
+  Without copy-on-write, the snapshot is a deep copy instead
+- the appended rows are written to the shared storage after the rows of the
+  snapshot, and a data frame stops sharing the storage once its values are
+  changed in place
+- the rows of the columns that have not been calculated are calculated by the
+  snapshot itself when they are read
+
+So that the readers of a snapshot always get the values of the rows at the
+time of the snapshot, whatever the writer does to the data frame.
+"""
+
+from __future__ import annotations
+from typing import (
+    TYPE_CHECKING,
+    Optional
+)
+from types import MappingProxyType
+
+from pandas import (
+    Index,
+    Series
+)
+
+from .common import (
+    NDArrayAny,
+    is_copy_on_write
+)
+from .meta.utils import copy_stock_metas
+
+if TYPE_CHECKING:
+    from .dataframe import StockDataFrame  # pragma: no cover
+
+
+class Snapshot:
+    """
+    An immutable view of a stock data frame at the time of `StockDataFrame.snapshot()`, which could be read by several threads at the same time.
+
+    Usage::
+
+        snapshot = stock.snapshot()
+
+        # `stock` could be appended by another thread meanwhile
+        snapshot.exec('ma:5')
+    """
+
+    __slots__ = ('_frame', '_versions')
+
+    def __init__(self, frame: StockDataFrame) -> None:
+        self._frame = frame
+        self._versions = MappingProxyType({
+            column: info.size
+            for column, info in frame._stock_columns_info_map.items()
+        })
+
+    def __len__(self) -> int:
+        return len(self._frame)
+
+    def __repr__(self) -> str:
+        return f'<Snapshot of {len(self)} rows>'
+
+    @property
+    def versions(self) -> MappingProxyType[str, int]:
+        """
+        The counts of the calculated rows of the columns of directives at the time of the snapshot
+        """
+
+        return self._versions
+
+    @property
+    def index(self) -> Index:
+        return self._frame.index
+
+    @property
+    def columns(self) -> Index:
+        return self._frame.columns
+
+    def exec(
+        self,
+        directive_str: str, /,
+        tail: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None
+    ) -> NDArrayAny:
+        """
+        Executes the given directive over the rows of the snapshot, the same as `StockDataFrame.exec()` except that no column is created.
+        """
+
+        return self._frame.exec(
+            directive_str,
+            False,
+            tail=tail,
+            start=start,
+            end=end
+        )
+
+    def get_column(self, key: str) -> Series:
+        """
+        Gets the column of the snapshot, the same as `StockDataFrame.get_column()`
+        """
+
+        # The rows of a column of directive might have not been calculated
+        if self._frame._stock_aliases_map.get(key, key) in self._versions:
+            return Series(
+                self.exec(key),
+                index=self.index,
+                name=key
+            )
+
+        return self._frame.get_column(key)
+
+    def to_frame(self) -> StockDataFrame:
+        """
+        Creates a stock data frame of the rows of the snapshot, without copying the data if the copy-on-write mode of pandas is enabled
+        """
+
+        frame = self._frame.copy(deep=not is_copy_on_write())
+
+        # The columns info would be changed by the created data frame
+        copy_stock_metas(self._frame, frame)
+
+        return frame
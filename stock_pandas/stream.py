@@ -0,0 +1,499 @@
+"""Streaming evaluation of directives.
+
+A `StockStream` holds a fixed set of directives, and updates all of them with
+each appended row, or small batch of rows, from the state kept after the
+previous rows, which makes the cost of a row independent of the length of the
+history:
+
+- a command with a stateful formula continues from the state of its kernel
+- any other command is calculated over the last `lookback + 1` values of its
+  series, the same as `StockDataFrame.fulfill()`
+- an expression keeps the last values of its operands for the cross operators
+
+The unclosed bar could be evaluated on every tick with `peek()`, which
+continues from the state after the closed bars without changing it, and
+the bar is `append()`ed once it is closed.
+"""
+
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+    cast
+)
+
+import numpy as np
+from numpy import ndarray
+from pandas import (
+    DataFrame,
+    Index,
+    Series
+)
+
+from .dataframe import StockDataFrame
+from .directive.parse import parse
+from .directive.command import Commands
+from .directive.types import (
+    Command,
+    Directive,
+    Expression,
+    UnaryExpression,
+    COMMAND_COLUMN_NAME,
+    COMMAND_TIME_FRAME_NAME
+)
+from .meta.utils import ColumnInfo
+from .common import NDArrayAny
+
+
+Row = Union[Mapping[str, Any], Series]
+Rows = Union[Row, DataFrame, Iterable[Row]]
+
+Operand = Union['_Node', int, float]
+
+
+def _concat(tail: Optional[ndarray], values: ndarray) -> ndarray:
+    return values if tail is None else np.concatenate((tail, values))
+
+
+def _tail(array: ndarray, length: int) -> Optional[ndarray]:
+    return array[-length:] if length > 0 else None
+
+
+class _Node:
+    """A node of the directive tree, of which `values` are the results of
+    the rows of the latest batch
+    """
+
+    values: ndarray
+
+    def update(self, batch: Dict[str, ndarray], size: int) -> None:
+        raise NotImplementedError # pragma: no cover
+
+    def snapshot(self) -> Dict[str, Any]:
+        # The states and the tails are always replaced by `update()`
+        # rather than changed in place, so a shallow copy is enough
+        return self.__dict__.copy()
+
+    def restore(self, snapshot: Dict[str, Any]) -> None:
+        self.__dict__.clear()
+        self.__dict__.update(snapshot)
+
+
+class _ColumnNode(_Node):
+    def __init__(self, column: str) -> None:
+        self._column = column
+
+    def update(self, batch: Dict[str, ndarray], size: int) -> None:
+        try:
+            self.values = batch[self._column]
+        except KeyError:
+            raise KeyError(f'column "{self._column}" not found')
+
+
+class _CommandNode(_Node):
+    def __init__(
+        self,
+        command: Command,
+        series: List[_Node]
+    ) -> None:
+        self.command = command
+        self._series = series
+        self._lookback = command.preset.lookback(*command.args)
+
+        # The state of the stateful formula
+        self.state: Any = None
+        # Or the last `lookback` values of each series
+        self._tails: List[Optional[ndarray]] = [None] * len(series)
+
+    def update(self, batch: Dict[str, ndarray], size: int) -> None:
+        command = self.command
+        preset = command.preset
+        stateful_formula = preset.stateful_formula
+
+        if stateful_formula is not None:
+            self.values, self.state = stateful_formula(
+                *command.args,
+                *[node.values for node in self._series],
+                self.state
+            )
+            return
+
+        arrays = [
+            _concat(tail, node.values)
+            for tail, node in zip(self._tails, self._series)
+        ]
+
+        self._tails = [
+            _tail(array, self._lookback)
+            for array in arrays
+        ]
+
+        self.values = preset.formula(*command.args, *arrays)[-size:]
+
+
+class _ExpressionNode(_Node):
+    def __init__(
+        self,
+        expression: Expression,
+        left: Operand,
+        right: Operand
+    ) -> None:
+        self._formula = expression.operator.formula
+        self._operands = (left, right)
+
+        # The value of each operand of the previous row,
+        # for cross operators
+        self._tails: List[Optional[ndarray]] = [None, None]
+
+    def update(self, batch: Dict[str, ndarray], size: int) -> None:
+        arrays: List[Union[ndarray, int, float]] = []
+        tails: List[Optional[ndarray]] = []
+
+        for tail, operand in zip(self._tails, self._operands):
+            if isinstance(operand, _Node):
+                array = _concat(tail, operand.values)
+                tails.append(array[-1:])
+                arrays.append(array)
+            else:
+                tails.append(None)
+                arrays.append(operand)
+
+        self._tails = tails
+        self.values = np.asarray(self._formula(*arrays))[-size:]
+
+
+class _UnaryExpressionNode(_Node):
+    def __init__(
+        self,
+        expression: UnaryExpression,
+        node: _Node
+    ) -> None:
+        self._formula = expression.operator.formula
+        self._node = node
+
+    def update(self, batch: Dict[str, ndarray], size: int) -> None:
+        self.values = self._formula(self._node.values)
+
+
+class StockStream:
+    """Evaluates a set of directives row by row, without building a data frame
+
+    Args:
+        directives (Iterable[str]): the directives to keep updated, such as `'kdj.j'` and `'close > ma:20'`
+        commands (:obj:`Commands`, optional): the commands of the directives, defaults to the ones of `StockDataFrame`, including user-defined commands
+
+    Usage::
+
+        stream = StockStream(['ma:20', 'macd.histogram'])
+
+        for row in feed:
+            stream.append(row)
+            print(stream['macd.histogram'])
+
+        stock = stream.to_frame()
+    """
+
+    def __init__(
+        self,
+        directives: Iterable[str],
+        commands: Optional[Commands] = None
+    ) -> None:
+        self._commands = (
+            StockDataFrame.COMMANDS if commands is None else commands
+        )
+
+        # All nodes by the names of their directives,
+        # in the order of calculation
+        self._nodes: Dict[str, _Node] = {}
+
+        # The directives to keep updated, by their names
+        self._directives: Dict[str, Directive] = {}
+        # Maps the given directive strings to the names
+        self._names: Dict[str, str] = {}
+
+        for directive_str in directives:
+            directive = parse(
+                directive_str,
+                StockDataFrame.DIRECTIVES_CACHE,
+                self._commands
+            )
+
+            name = str(directive)
+
+            self._create_node(directive)
+            self._directives[name] = directive
+            self._names[directive_str] = name
+
+        self._size = 0
+
+        # The chunks of the columns, the results and the index of all rows
+        self._columns: Dict[str, List[ndarray]] = {}
+        self._results: Dict[str, List[ndarray]] = {
+            name: [] for name in self._directives
+        }
+        self._index: List[Any] = []
+
+        self._latest: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, key: str) -> Any:
+        """Gets the latest value of a directive or a column
+        """
+
+        name = self._names.get(key, key)
+
+        try:
+            return self._latest[name]
+        except KeyError:
+            raise KeyError(f'"{key}" is neither a directive nor a column of the stream, or there is no row yet')
+
+    def latest(self) -> Dict[str, Any]:
+        """Gets the latest values of the directives and the columns
+        """
+
+        return self._latest.copy()
+
+    def append(self, rows: Rows, /) -> 'StockStream':
+        """Appends a row, such as a dict or a `pandas.Series` whose name is the index, or a batch of rows, such as a `pandas.DataFrame` or a list of rows, and updates the directives.
+
+        If any of the directives fails to update, such as the rows lack a column, the stream is left unchanged.
+
+        Returns:
+            StockStream: the stream itself
+        """
+
+        columns, index = self._standardize(rows)
+
+        if not index:
+            return self
+
+        size = len(index)
+
+        nodes = list(self._nodes.values())
+        snapshots = [node.snapshot() for node in nodes]
+
+        try:
+            for node in nodes:
+                node.update(columns, size)
+        except Exception:
+            # Nodes updated before the failure should not consume the rows
+            for node, snapshot in zip(nodes, snapshots):
+                node.restore(snapshot)
+            raise
+
+        self._size += size
+        self._index.extend(index)
+
+        for column, values in columns.items():
+            self._columns.setdefault(column, []).append(values)
+
+        for name, chunks in self._results.items():
+            chunks.append(self._nodes[name].values)
+
+        self._update_latest(self._latest, columns)
+
+        return self
+
+    def peek(self, rows: Rows, /) -> Dict[str, Any]:
+        """Calculates the values of the directives for the rows as if they were appended, without appending them.
+
+        The directives continue from the state after the appended rows, so the cost is the same as `append()`, and it does not depend on how many times the unclosed bar is peeked before it is closed and appended.
+
+        Returns:
+            Dict[str, Any]: the values of the directives and the columns of the last row, the same as `latest()`
+
+        Usage::
+
+            # On each tick of the unclosed bar
+            stream.peek(bar)['macd.histogram']
+
+            # Once the bar is closed
+            stream.append(bar)
+        """
+
+        columns, index = self._standardize(rows)
+
+        latest = self._latest.copy()
+
+        if not index:
+            return latest
+
+        nodes = list(self._nodes.values())
+        snapshots = [node.snapshot() for node in nodes]
+
+        try:
+            for node in nodes:
+                node.update(columns, len(index))
+
+            self._update_latest(latest, columns)
+        finally:
+            for node, snapshot in zip(nodes, snapshots):
+                node.restore(snapshot)
+
+        return latest
+
+    def to_frame(self) -> StockDataFrame:
+        """Exports the rows and the directive columns as a `StockDataFrame`, the directive columns of which could be fulfilled after appending rows to the data frame
+        """
+
+        data = {
+            name: self._join(chunks)
+            for name, chunks in self._columns.items()
+        }
+
+        index = (
+            None
+            if all(label is None for label in self._index)
+            else Index(self._index)
+        )
+
+        indicators = {}
+
+        for name, directive in self._directives.items():
+            if name in data:
+                # A directive of a column only
+                continue
+
+            data[name] = self._join(self._results[name])
+            indicators[name] = directive
+
+        stock = StockDataFrame(data, index=index)
+
+        size = len(stock)
+        columns_info_map = stock._stock_columns_info_map
+
+        for name, directive in indicators.items():
+            node = self._nodes[name]
+
+            state = (
+                node.state
+                if (
+                    isinstance(node, _CommandNode)
+                    and all(
+                        isinstance(series, str)
+                        for series in node.command.series
+                    )
+                )
+                else None
+            )
+
+            columns_info_map[name] = ColumnInfo(
+                size,
+                directive,
+                directive.cumulative_lookback,
+                state
+            )
+
+        return stock
+
+    def _update_latest(
+        self,
+        latest: Dict[str, Any],
+        columns: Dict[str, ndarray]
+    ) -> None:
+        for column, values in columns.items():
+            latest[column] = values[-1]
+
+        for name in self._results:
+            latest[name] = self._nodes[name].values[-1]
+
+    def _join(self, chunks: List[ndarray]) -> NDArrayAny:
+        if len(chunks) > 1:
+            # Squash the chunks to keep further exports cheap
+            chunks[:] = [np.concatenate(chunks)]
+
+        return chunks[0] if chunks else np.empty(0)
+
+    def _create_node(self, directive: Directive) -> _Node:
+        name = str(directive)
+        node = self._nodes.get(name)
+
+        if node is not None:
+            return node
+
+        if isinstance(directive, Command):
+            if directive.name == COMMAND_COLUMN_NAME:
+                node = _ColumnNode(cast(str, directive.series[0]))
+            elif directive.name == COMMAND_TIME_FRAME_NAME:
+                raise ValueError(
+                    f'"{directive}" is not supported by StockStream, use StockDataFrame or MultiTimeFrame instead'
+                )
+            else:
+                node = _CommandNode(directive, [
+                    (
+                        self._column_node(series)
+                        if isinstance(series, str)
+                        else self._create_node(series)
+                    )
+                    for series in directive.series
+                ])
+
+        elif isinstance(directive, Expression):
+            node = _ExpressionNode(
+                directive,
+                self._create_operand(directive.left),
+                self._create_operand(directive.right)
+            )
+
+        else:
+            node = _UnaryExpressionNode(
+                directive,
+                self._create_node(directive.expression)
+            )
+
+        # Children are added before their parents
+        self._nodes[name] = node
+
+        return node
+
+    def _column_node(self, column: str) -> _Node:
+        node = self._nodes.get(column)
+
+        if node is None:
+            node = self._nodes[column] = _ColumnNode(column)
+
+        return node
+
+    def _create_operand(self, operand: Any) -> Operand:
+        if isinstance(operand, (int, float)):
+            return operand
+
+        return self._create_node(operand)
+
+    def _standardize(
+        self,
+        rows: Rows
+    ) -> Tuple[Dict[str, ndarray], List[Any]]:
+        if isinstance(rows, DataFrame):
+            return (
+                {
+                    column: rows[column].to_numpy()
+                    for column in rows.columns
+                },
+                list(rows.index)
+            )
+
+        if isinstance(rows, (Mapping, Series)):
+            rows = [rows]
+
+        rows = list(rows)
+
+        if not rows:
+            return {}, []
+
+        columns = {
+            column: np.asarray([row[column] for row in rows])
+            for column in rows[0].keys()
+        }
+
+        return columns, [
+            row.name if isinstance(row, Series) else None
+            for row in rows
+        ]
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 
 from pandas import (
@@ -7,7 +8,8 @@ from pandas import (
 )
 
 from stock_pandas import (
-    StockDataFrame
+    StockDataFrame,
+    DirectiveValueError
 )
 
 from .common import (
@@ -151,3 +153,98 @@ def test_append_meta(tencent: DataFrame):
 
     assert isinstance(stock, StockDataFrame)
     assert stock._cumulator._date_col == TIME_KEY
+
+
+def test_max_rows(tencent: DataFrame):
+    stock = StockDataFrame(tencent.iloc[:30], date_col=TIME_KEY, max_rows=40)
+
+    # Stateful column, column with lookback, column never read
+    stock['ema:5']
+    stock['ma:3']
+    stock['ema:10']
+
+    for i in range(30, 100):
+        stock = stock.append(tencent.iloc[i:i + 1])
+
+        assert len(stock) == min(i + 1, 40)
+        assert stock._cumulator._max_rows == 40
+
+        if i % 7 == 0:
+            stock['ema:5']
+
+    assert stock.index[0] == Timestamp(tencent[TIME_KEY].iloc[60])
+    assert stock._stock_columns_info_map['ema:5'].state is not None
+    assert stock._stock_columns_info_map['ema:10'].state is not None
+
+    full = StockDataFrame(tencent, date_col=TIME_KEY)
+
+    for directive in ['ema:5', 'ma:3', 'ema:10']:
+        assert (
+            stock[directive].to_numpy() == full[directive].to_numpy()[-40:]
+        ).all(), directive
+
+
+def test_max_rows_ctor(tencent: DataFrame):
+    stock = StockDataFrame(tencent, date_col=TIME_KEY, max_rows=10)
+
+    assert len(stock) == 10
+    assert stock.index[-1] == Timestamp(tencent[TIME_KEY].iloc[-1])
+
+    stock = StockDataFrame(StockDataFrame(tencent.to_dict('list')), max_rows=5)
+
+    assert len(stock) == 5
+    assert StockDataFrame(stock)._cumulator._max_rows == 5
+
+    with pytest.raises(ValueError, match='max_rows'):
+        StockDataFrame(tencent, max_rows=0)
+
+
+def test_subscribe(tencent: DataFrame):
+    stock = StockDataFrame(
+        tencent.iloc[:30],
+        date_col=TIME_KEY,
+        subscriptions=['ma:5', 'kdj.j']
+    )
+
+    # Duplicated ones are subscribed once
+    stock.subscribe(['ma:5', 'ma : 5', 'close > ma:10'])
+
+    assert stock._stock_subscriptions == ('ma:5', 'kdj.j', 'close>ma:10')
+    assert stock._stock_columns_info_map['close>ma:10'].size == 30
+
+    for i in range(30, 60):
+        stock = stock.append(tencent.iloc[i:i + 1])
+
+        # Fulfilled before reading
+        for info in stock._stock_columns_info_map.values():
+            assert info.size == len(stock)
+
+    full = StockDataFrame(tencent.iloc[:60], date_col=TIME_KEY)
+
+    for directive in stock._stock_subscriptions:
+        np.testing.assert_array_equal(
+            stock[directive].to_numpy(),
+            full[directive].to_numpy()
+        )
+
+    # Inherited by slicing, and the new data frames of the slices
+    assert stock.iloc[10:]._stock_subscriptions == stock._stock_subscriptions
+
+    with pytest.raises(DirectiveValueError):
+        stock.subscribe(['ma:-1'])
+
+    with pytest.raises(KeyError, match='foo'):
+        stock.subscribe(['ma:2', 'ma:2@foo'])
+
+    assert stock._stock_subscriptions == ('ma:5', 'kdj.j', 'close>ma:10')
+
+
+def test_subscribe_empty(tencent: DataFrame):
+    stock = StockDataFrame(date_col=TIME_KEY, subscriptions=['ma:2'])
+
+    assert 'ma:2' not in stock.columns
+
+    stock = stock.append(tencent.iloc[:3])
+
+    assert stock._stock_columns_info_map['ma:2'].size == 3
+    assert stock['ma:2'].iloc[-1] == tencent['close'].iloc[1:3].mean()
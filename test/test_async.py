@@ -0,0 +1,90 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from pandas import DataFrame
+
+from stock_pandas import StockDataFrame
+
+from .common import (
+    get_tencent,
+    TIME_KEY
+)
+
+
+@pytest.fixture
+def tencent() -> DataFrame:
+    return get_tencent(stock=False)
+
+
+def test_aexec(tencent: DataFrame, monkeypatch):
+    stock = StockDataFrame(tencent, date_col=TIME_KEY)
+    expected = stock.exec('kdj.j')
+
+    calls = []
+    exec_ = StockDataFrame.exec
+
+    def slow_exec(self, *args, **kwargs):
+        calls.append(args)
+        # Keeps the calls concurrent
+        time.sleep(.05)
+        return exec_(self, *args, **kwargs)
+
+    monkeypatch.setattr(StockDataFrame, 'exec', slow_exec)
+
+    async def main():
+        return await asyncio.gather(
+            *[stock.aexec('kdj.j') for _ in range(5)],
+            stock.aexec('ma:5', tail=3)
+        )
+
+    *results, ma = asyncio.run(main())
+
+    # Coalesced
+    assert len(calls) == 2
+
+    for result in results:
+        assert result is results[0]
+
+    np.testing.assert_array_equal(results[0], expected)
+    np.testing.assert_array_equal(ma, exec_(stock, 'ma:5')[-3:])
+
+    # Executed again once the previous calls are done
+    asyncio.run(main())
+    assert len(calls) == 4
+
+    with pytest.raises(ValueError, match='negative'):
+        asyncio.run(stock.aexec('ma:5', tail=-1))
+
+    assert not stock._stock_pending_execs
+
+
+def test_aappend(tencent: DataFrame, monkeypatch):
+    executor = ThreadPoolExecutor(2)
+    monkeypatch.setattr(StockDataFrame, 'EXECUTOR', executor)
+
+    stock = StockDataFrame(
+        tencent.iloc[:30],
+        date_col=TIME_KEY,
+        subscriptions=['ma:5']
+    )
+
+    async def main(stock):
+        for i in range(30, 40):
+            stock = await stock.aappend(tencent.iloc[i:i + 1])
+
+        return stock, await stock.aexec('ma:5', create_column=True)
+
+    stock, ma = asyncio.run(main(stock))
+    executor.shutdown()
+
+    assert len(stock) == 40
+    assert stock._stock_columns_info_map['ma:5'].size == 40
+
+    np.testing.assert_array_equal(
+        ma,
+        StockDataFrame(tencent.iloc[:40], date_col=TIME_KEY).exec('ma:5')
+    )
@@ -0,0 +1,161 @@
+import numpy as np
+import pytest
+from pandas import (
+    DataFrame,
+    date_range
+)
+from pandas.testing import assert_frame_equal
+
+from stock_pandas import (
+    StockDataFrame,
+    TickBars,
+    VolumeBars,
+    DollarBars,
+    is_rust_available,
+    set_backend
+)
+from stock_pandas.math.bars import threshold_keys
+
+
+LENGTH = 200
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(5)
+
+    return DataFrame({
+        'open': rng.normal(100, 1, LENGTH),
+        'high': rng.normal(101, 1, LENGTH),
+        'low': rng.normal(99, 1, LENGTH),
+        'close': rng.normal(100, 1, LENGTH),
+        'volume': rng.integers(1, 1000, LENGTH).astype(float)
+    }, index=date_range('2020-01-01', periods=LENGTH, freq='s'))
+
+
+def expected_starts(measure, threshold):
+    starts = []
+    last_key = None
+    total = 0.
+
+    for i, m in enumerate(measure):
+        key = total // threshold
+
+        if key != last_key:
+            starts.append(i)
+            last_key = key
+
+        total += m
+
+    return starts
+
+
+@pytest.mark.parametrize('bars, measure', [
+    (TickBars(7), lambda df: np.ones(len(df))),
+    (VolumeBars(3000), lambda df: df['volume'].to_numpy()),
+    (
+        DollarBars(300000),
+        lambda df: (df['close'] * df['volume']).to_numpy()
+    )
+])
+def test_threshold_bars(data, bars, measure):
+    stock = StockDataFrame(data, time_frame=bars).cumulate()
+
+    starts = expected_starts(measure(data), bars.threshold)
+
+    assert list(stock.index) == list(data.index[starts])
+    assert stock['volume'].sum() == data['volume'].sum()
+    assert stock['high'].iloc[0] == data['high'].iloc[:starts[1]].max()
+
+    # The same however the rows are appended
+    for step in (1, 3, 50):
+        appended = StockDataFrame(time_frame=bars)
+
+        for i in range(0, LENGTH, step):
+            appended = appended.cum_append(data.iloc[i:i + step])
+
+        assert_frame_equal(appended, stock, check_freq=False)
+
+
+def test_threshold_bars_update(data):
+    bars = VolumeBars(3000)
+
+    # The row of the same timestamp replaces the last one,
+    # and its volume is not counted
+    update = data.iloc[[9]].assign(volume=5000.)
+
+    stock = StockDataFrame(time_frame=bars)
+    stock = stock.cum_append(data.iloc[:10])
+    stock = stock.cum_append(update)
+    stock = stock.cum_append(data.iloc[10:])
+
+    rows = data.copy()
+    rows.iloc[9] = update.iloc[0]
+
+    expected = StockDataFrame(rows, time_frame=bars).cumulate()
+
+    assert_frame_equal(stock, expected, check_freq=False)
+
+
+def test_from_ticks_threshold_bars(data):
+    ts = data.index
+    price = data['close'].to_numpy()
+    size = data['volume'].to_numpy()
+
+    rows = DataFrame({
+        'open': price,
+        'high': price,
+        'low': price,
+        'close': price,
+        'volume': size
+    }, index=ts)
+
+    bars = DollarBars(300000)
+
+    expected = StockDataFrame(rows, time_frame=bars).cumulate()
+
+    stock = StockDataFrame.from_ticks(
+        ts[:77], price[:77], size[:77], time_frame=bars
+    ).cum_append(rows.iloc[77:])
+
+    assert_frame_equal(stock, expected, check_freq=False)
+
+
+def test_threshold_bars_invalid(data):
+    with pytest.raises(ValueError, match='positive'):
+        VolumeBars(0)
+
+    with pytest.raises(KeyError, match='amount'):
+        StockDataFrame(
+            data, time_frame=VolumeBars(100, volume='amount')
+        ).cumulate()
+
+    assert str(TickBars(5)) == 'TickBars(5)'
+
+
+@pytest.mark.skipif(
+    not is_rust_available(),
+    reason='requires stock_pandas_rs'
+)
+def test_threshold_keys_native(data):
+    measure = data['volume'].to_numpy()
+    measure[3] = np.nan
+
+    set_backend('rust')
+
+    try:
+        keys, cumulative = threshold_keys(measure, 10., 3000.)
+    finally:
+        set_backend('auto')
+
+    set_backend('python')
+
+    try:
+        expected_keys, expected_cumulative = threshold_keys(
+            measure, 10., 3000.
+        )
+    finally:
+        set_backend('auto')
+
+    np.testing.assert_array_equal(keys, expected_keys)
+    np.testing.assert_array_equal(cumulative, expected_cumulative)
@@ -2,9 +2,12 @@ import numpy as np
 import itertools
 import pytest
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 
 from stock_pandas import (
-    StockDataFrame
+    StockDataFrame,
+    set_lookback_tolerance,
+    get_lookback_tolerance
 )
 
 from .common import (
@@ -32,6 +35,108 @@ def test_exec(stock: StockDataFrame):
     assert np.all(result == close)
 
 
+@pytest.mark.parametrize('directive_str', [
+    'close', 'ma:5', 'kdj.j', 'rsi', 'macd.h', 'hv:10', 'hv:20', 'atr',
+    'repeat:2@(close > ma:20)', 'ma:5 \\ ma:10'
+])
+def test_exec_window(directive_str):
+    stock = get_tencent()
+    columns = list(stock.columns)
+    full = stock.exec(directive_str, False)
+
+    for kwargs, expected in [
+        ({'tail': 1}, full[-1:]),
+        ({'tail': 5}, full[-5:]),
+        ({'tail': 0}, full[:0]),
+        ({'start': 0, 'end': 0}, full[:0]),
+        ({'start': 10, 'end': 10}, full[:0]),
+        ({'tail': 1000}, full),
+        ({'start': 10, 'end': 30}, full[10:30]),
+        ({'start': -3}, full[-3:]),
+        ({'end': 7}, full[:7])
+    ]:
+        result = stock.exec(directive_str, **kwargs)
+
+        assert result.dtype == expected.dtype
+        np.testing.assert_allclose(
+            result.astype(float),
+            expected.astype(float),
+            rtol=1e-7,
+            equal_nan=True
+        )
+
+    # No column is created
+    assert list(stock.columns) == columns
+
+
+@pytest.mark.parametrize('directive_str', ['ma:5', 'atr', 'hv:20'])
+def test_exec_window_empty(directive_str):
+    stock = get_tencent().iloc[:0]
+
+    assert len(stock.exec(directive_str, tail=0)) == 0
+    assert len(stock.exec(directive_str, start=0, end=0)) == 0
+
+
+def test_exec_window_column():
+    stock = get_tencent()
+    ma = stock['ma:5'].to_numpy()
+
+    np.testing.assert_array_equal(stock.exec('ma:5', tail=3), ma[-3:])
+
+    with pytest.raises(ValueError, match='window'):
+        stock.exec('ma:10', True, tail=3)
+
+    with pytest.raises(ValueError, match='tail'):
+        stock.exec('ma:10', tail=3, start=1)
+
+    with pytest.raises(ValueError, match='negative'):
+        stock.exec('ma:10', tail=-1)
+
+
+THREAD_DIRECTIVES = [
+    'ma:5',
+    'boll.upper:20',
+    'macd',
+    'kdj.j',
+    'close > ma:10',
+    'ma:3@(ma:5)',
+    'tf:1w@(ma:2)'
+]
+
+
+def test_exec_threads():
+    stock = get_tencent()
+    expected = stock.copy()
+
+    def read(i):
+        directive_str = THREAD_DIRECTIVES[i % len(THREAD_DIRECTIVES)]
+
+        if i % 3 == 0:
+            # Slicing in other threads
+            return len(stock.iloc[-50:]._stock_columns_info_map)
+
+        return stock.exec(directive_str, create_column=i % 2 == 0)
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(read, range(len(THREAD_DIRECTIVES) * 6)))
+
+    for i, result in enumerate(results):
+        if i % 3 == 0:
+            continue
+
+        np.testing.assert_allclose(
+            result,
+            expected.exec(THREAD_DIRECTIVES[i % len(THREAD_DIRECTIVES)]),
+            equal_nan=True
+        )
+
+    # Each column is created only once and completely
+    for info in stock._stock_columns_info_map.values():
+        assert info.size == len(stock)
+
+    assert len(set(stock.columns)) == len(stock.columns)
+
+
 def test_get_column(stock: StockDataFrame):
     stock = stock.rename(columns={
         'open': 'Open',
@@ -206,10 +311,12 @@ def test_date_col_pollution_issue_21():
 def test_lookback():
     # (directive, expected_lookback)
     cases = [
-        # Trend-following: ma, ema (lookback = period - 1)
-        ('ma:5', 4), ('ema:5', 4),
+        # Trend-following: ma (lookback = period - 1)
+        ('ma:5', 4),
+        # EMA: the weight of the truncated history < the tolerance 1e-8
+        ('ema:5', 45),
         # MACD variants
-        ('macd', 25), ('macd.signal', 33), ('macd.histogram', 33),
+        ('macd', 239), ('macd.signal', 244), ('macd.histogram', 244),
         # BBI (lookback = max of all periods)
         ('bbi', 24),
         # TR & ATR
@@ -217,9 +324,9 @@ def test_lookback():
         # LLV, HHV, Donchian (lookback = period - 1)
         ('llv:5', 4), ('hhv:5', 4), ('donchian:5', 4),
         # RSV & KDJ
-        ('rsv:9', 8), ('kdj.k', 27), ('kdj.d', 27), ('kdj.j', 27),
-        # RSI (lookback = period, due to diff + SMMA warmup)
-        ('rsi', 14),
+        ('rsv:9', 8), ('kdj.k', 53), ('kdj.d', 60), ('kdj.j', 60),
+        # RSI (diff + SMMA warmup)
+        ('rsi', 249),
         # Bollinger Bands (lookback = period - 1)
         ('boll', 19), ('boll.upper', 19), ('boll.lower', 19), ('bbw', 19),
         # Historical Volatility (lookback = period, due to log return)
@@ -233,19 +340,19 @@ def test_lookback():
         # repeat:3@(ma:10 > ma:20) = (3-1) + max(10-1, 20-1) = 2 + 19 = 21
         ('repeat:3@(ma:10 > ma:20)', 21),
         # --- Additional cases with varying parameters ---
-        # MA/EMA: lookback = period - 1 (need N points for N-period average)
-        ('ma:10', 9), ('ma:20', 19), ('ema:12', 11), ('ema:26', 25),
-        # MACD: lookback = max(fast, slow) - 1
-        # MACD.signal: lookback = max(fast, slow) + signal - 2
-        ('macd:5,10', 9), ('macd.signal:5,10,3', 11), ('macd.histogram:8,17,5', 20),
+        # MA: lookback = period - 1 (need N points for N-period average)
+        ('ma:10', 9), ('ma:20', 19), ('ema:12', 110), ('ema:26', 239),
+        # MACD: lookback of the slower EMA
+        # MACD.signal: lookback of the EMA of the slower EMA
+        ('macd:5,10', 91), ('macd.signal:5,10,3', 93), ('macd.histogram:8,17,5', 158),
         # BBI: lookback = max(a, b, c, d), all MAs must be valid
         ('bbi:5,10,15,20', 20),
-        # ATR/RSI: lookback = period (TR needs prev close; RSI needs SMMA warmup)
-        ('atr:7', 7), ('rsi:7', 7),
+        # ATR: lookback = period (TR needs prev close)
+        ('atr:7', 7), ('rsi:7', 120),
         # Bollinger: lookback = period - 1 (MA + std need N points)
         ('boll:10', 9), ('boll.upper:30,2.5', 29),
-        # KDJ: lookback = period * 3 (EWMA needs longer warmup for stability)
-        ('kdj.k:5,3,50', 15), ('kdj.d:14,5,5,50', 42),
+        # KDJ: lookback = period of rsv - 1 + lookback of the EWMAs
+        ('kdj.k:5,3,50', 49), ('kdj.d:14,5,5,50', 109),
         # HV: lookback = period (log returns need period price changes)
         ('hv:10', 10), ('hv:30', 30),
     ]
@@ -253,3 +360,42 @@ def test_lookback():
         assert (
             StockDataFrame.directive_lookback(directive) == expected
         ), f'{directive} lookback mismatch'
+
+
+def test_lookback_tolerance():
+    assert get_lookback_tolerance() == 1e-8
+
+    set_lookback_tolerance(1e-4)
+
+    try:
+        assert StockDataFrame.directive_lookback('ema:12') == 55
+        assert StockDataFrame.directive_lookback('kdj.k') == 30
+        # The cached directive follows the tolerance
+        assert StockDataFrame.directive_lookback('ma:5@(ema:12)') == 59
+        # Not an exponential filter
+        assert StockDataFrame.directive_lookback('ma:5') == 4
+
+        with pytest.raises(ValueError, match='between 0 and 1'):
+            set_lookback_tolerance(0)
+    finally:
+        set_lookback_tolerance(1e-8)
+
+    assert StockDataFrame.directive_lookback('ma:5@(ema:12)') == 114
+
+
+def test_lookback_precision():
+    close = 100 + np.cumsum(np.random.default_rng(1).normal(0, 1, 1000))
+    stock = StockDataFrame({
+        'open': close,
+        'high': close + 1,
+        'low': close - 1,
+        'close': close
+    })
+
+    for directive in ['ema:12', 'macd.signal', 'kdj.j', 'rsi']:
+        lookback = StockDataFrame.directive_lookback(directive)
+
+        # Calculated with only the rows of the lookback
+        partial = stock.iloc[- lookback - 1:].exec(directive)[-1]
+
+        assert partial == pytest.approx(stock.exec(directive)[-1], abs=1e-5)
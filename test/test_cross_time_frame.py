@@ -0,0 +1,164 @@
+import numpy as np
+import pytest
+from pandas import (
+    DataFrame,
+    Series,
+    merge_asof
+)
+
+from stock_pandas import (
+    StockDataFrame,
+    StockStream,
+    TimeFrame,
+    DirectiveValueError
+)
+
+from .common import get_1m_tencent
+
+
+@pytest.fixture
+def data():
+    return StockDataFrame(
+        get_1m_tencent(),
+        date_col='time_key'
+    )._stock_raw_rows(0)
+
+
+def expected(rows, time_frame, directive):
+    """
+    The value of the last closed bar of the higher time frame by `merge_asof()`
+    """
+
+    derived = StockDataFrame(rows, time_frame=time_frame).cumulate()
+
+    values = Series(
+        derived.exec(directive), index=derived.index, name='value'
+    ).shift(1)
+
+    return merge_asof(
+        DataFrame(index=rows.index),
+        values.to_frame(),
+        left_index=True,
+        right_index=True
+    )['value'].to_numpy()
+
+
+@pytest.mark.parametrize('time_frame, directive', [
+    ('15m', 'ma:2'),
+    ('1h', 'close'),
+    ('5m', 'macd.signal'),
+    ('15m', 'hhv:3')
+])
+def test_time_frame_command(data, time_frame, directive):
+    stock = StockDataFrame(data)
+
+    result = stock.exec(f'tf:{time_frame}@({directive})')
+
+    np.testing.assert_array_equal(
+        result,
+        expected(data, time_frame, directive)
+    )
+
+
+def test_time_frame_command_syntax(data):
+    stock = StockDataFrame(data)
+
+    assert StockDataFrame.directive_stringify('tf:1H') == 'tf:1h'
+    assert StockDataFrame.directive_lookback('tf:1h@(ma:20)') == 0
+    assert StockDataFrame.directive_lookback('close - tf:1h@(ma:20)') == 0
+
+    np.testing.assert_array_equal(
+        stock.exec('tf:15m'),
+        expected(data, '15m', 'close')
+    )
+
+    np.testing.assert_array_equal(
+        stock.exec('close > tf:15m@(ma:2)'),
+        data['close'].to_numpy() > expected(data, '15m', 'ma:2')
+    )
+
+    with pytest.raises(DirectiveValueError, match='invalid time frame'):
+        stock.exec('tf:2m@(ma:2)')
+
+    with pytest.raises(ValueError, match='not supported by StockStream'):
+        StockStream(['tf:1h@(ma:20)'])
+
+
+def test_time_frame_command_append(data):
+    directive = 'tf:15m@(ma:2)'
+
+    stock = StockDataFrame(data.iloc[:10])
+    stock[directive]
+
+    for i in range(10, len(data), 3):
+        stock = stock.append(data.iloc[i:i + 3])
+
+        np.testing.assert_array_equal(
+            stock[directive].to_numpy(),
+            expected(data.iloc[:i + 3], '15m', 'ma:2')
+        )
+
+    derived = stock._derived_frames_map[TimeFrame.m15]
+
+    assert derived.size == len(stock)
+    assert len(derived.frame) == 7
+
+    # The column of the directive is kept in the derived frame
+    assert 'ma:2' in derived.frame._stock_columns_info_map
+
+
+def test_time_frame_command_cum_append(data):
+    directive = 'tf:15m@(ma:2)'
+
+    stock = StockDataFrame(time_frame='5m')
+
+    for i in range(len(data)):
+        stock = stock.cum_append(data.iloc[[i]])
+        stock[directive]
+
+        if i in (10, 11, 33):
+            # Replace the unclosed bar by the row of the same time
+            stock = stock.cum_append(data.iloc[[i]].assign(close=1000.))
+
+    rows = data.copy()
+    rows.iloc[[10, 11, 33], rows.columns.get_loc('close')] = 1000.
+
+    cumulated = StockDataFrame(rows, time_frame='5m').cumulate()
+
+    np.testing.assert_array_equal(
+        stock[directive].to_numpy(),
+        expected(cumulated._stock_raw_rows(0), '15m', 'ma:2')
+    )
+
+
+def test_time_frame_command_max_rows(data):
+    stock = StockDataFrame(data.iloc[:30], max_rows=20)
+    stock['tf:15m@(ma:2)']
+
+    for i in range(30, len(data), 7):
+        stock = stock.append(data.iloc[i:i + 7])
+
+    # The bars of the dropped rows are retained in the derived frame
+    np.testing.assert_array_equal(
+        stock['tf:15m@(ma:2)'].to_numpy(),
+        expected(data, '15m', 'ma:2')[- 20:]
+    )
+
+
+def test_time_frame_command_invalidate(data):
+    stock = StockDataFrame(data)
+    stock.exec('tf:15m@(ma:2)')
+
+    assert TimeFrame.m15 in stock._derived_frames_map
+
+    stock.loc[stock.index[3], 'close'] = 1000.
+
+    assert not stock._derived_frames_map
+
+    rows = data.copy()
+    rows.iloc[3, rows.columns.get_loc('close')] = 1000.
+
+    np.testing.assert_array_equal(
+        stock.exec('tf:15m@(ma:2)'),
+        expected(rows, '15m', 'ma:2')
+    )
@@ -1,13 +1,16 @@
 import math
 
+import numpy as np
 import pytest
 from pandas import (
     DataFrame,
     concat
 )
+from pandas.testing import assert_frame_equal
 
 from stock_pandas import (
     StockDataFrame,
+    cumulators
 )
 
 from .common import (
@@ -286,3 +289,150 @@ def test_cum_append_mixed_list(tencent):
     assert isinstance(stock, StockDataFrame)
     # Should have cumulated 5 rows (0-4 are in first 5-min period)
     expect_cumulated(tencent.iloc[:5], stock, 5)
+
+
+def test_cum_append_chunks():
+    tencent = get_1m_tencent()
+
+    # Duplicated timestamps at the boundaries of the chunks
+    to_append = tencent.iloc[[*range(50), 49, 49, *range(50, 100)]].copy()
+    to_append['close'] = range(len(to_append))
+
+    expected = StockDataFrame(
+        concat([
+            to_append.iloc[:49],
+            # The last one of the duplicates is used
+            to_append.iloc[51:]
+        ]),
+        date_col=TIME_KEY,
+        time_frame='15m'
+    ).cumulate()
+
+    for step in (1, 7, 13, len(to_append)):
+        stock = StockDataFrame(
+            date_col=TIME_KEY,
+            time_frame='15m'
+        )
+
+        for i in range(0, len(to_append), step):
+            stock = stock.cum_append(to_append.iloc[i:i + step])
+
+        assert stock.equals(expected), f'step {step}'
+        assert stock.index.name == TIME_KEY
+
+    assert len(expected) == 7
+    assert expected['close'].iloc[3] == 61
+
+
+def test_custom_cumulators(tencent):
+    stock = StockDataFrame(
+        tencent.assign(tag='foo'),
+        date_col=TIME_KEY,
+        time_frame='3m',
+        cumulators={
+            'open': lambda array: array[0],
+            'volume': lambda array: array.mean(),
+            'tag': lambda array: ''.join(array)
+        }
+    )
+
+    cumulated = stock.cumulate()
+
+    assert len(cumulated) == 7
+    assert list(cumulated['open']) == list(tencent['open'].iloc[::3])
+    # The column without a cumulator uses the last row
+    assert cumulated['high'].iloc[0] == tencent['high'].iloc[2]
+    assert cumulated['volume'].iloc[0] == tencent['volume'].iloc[:3].mean()
+    assert cumulated['tag'].iloc[0] == 'foofoofoo'
+    # A single row is not cumulated
+    assert cumulated['tag'].iloc[-1] == 'foofoo'
+
+
+def test_unclosed_running_cumulated():
+    tencent = get_1m_tencent().iloc[:30]
+    tencent['tag'] = [str(i) for i in range(30)]
+
+    settings = dict(
+        date_col=TIME_KEY,
+        time_frame='15m',
+        cumulators={
+            **cumulators,
+            'tag': lambda array: ','.join(array)
+        }
+    )
+
+    # Duplicated timestamps at the boundaries of the chunks
+    to_append = tencent.iloc[[*range(10), 9, 9, *range(10, 30)]].copy()
+    to_append['close'] = range(len(to_append))
+
+    expected = StockDataFrame(**settings).cum_append(to_append)
+
+    for step in (1, 2, 5):
+        stock = StockDataFrame(**settings)
+
+        for i in range(0, len(to_append), step):
+            stock = stock.cum_append(to_append.iloc[i:i + step])
+
+        assert stock.equals(expected), f'step {step}'
+
+    assert list(expected['tag']) == [
+        ','.join(str(i) for i in range(15)),
+        ','.join(str(i) for i in range(15, 30))
+    ]
+
+    unclosed = stock._cumulator._unclosed
+    head = dict(zip(unclosed.columns, unclosed.head.values))
+
+    # The rows of the unclosed time period are not retained,
+    # except for the columns of custom cumulators
+    assert unclosed.head.count == 14
+    assert np.isscalar(head['volume'])
+    assert head['volume'] == tencent['volume'].iloc[15:29].sum()
+    assert len(head['tag']) == 14
+
+
+def test_unclosed_new_column():
+    tencent = get_1m_tencent().iloc[:10]
+
+    stock = StockDataFrame(
+        date_col=TIME_KEY,
+        time_frame='5m'
+    ).cum_append(tencent.iloc[:3])
+
+    stock = stock.cum_append(tencent.iloc[3:6].assign(foo=1.))
+
+    expected = StockDataFrame(
+        date_col=TIME_KEY,
+        time_frame='5m'
+    ).cum_append(concat([tencent.iloc[:3], tencent.iloc[3:6].assign(foo=1.)]))
+
+    assert_frame_equal(stock, expected)
+    assert stock['foo'].iloc[0] == 1.
+
+
+def test_cum_append_subscriptions():
+    tencent = get_1m_tencent()
+
+    stock = StockDataFrame(
+        date_col=TIME_KEY,
+        time_frame='5m',
+        subscriptions=['ma:2', 'ema:3']
+    )
+
+    for i in range(0, 60, 3):
+        stock = stock.cum_append(tencent.iloc[i:i + 3])
+
+        for info in stock._stock_columns_info_map.values():
+            assert info.size == len(stock)
+
+    expected = StockDataFrame(
+        tencent.iloc[:60],
+        date_col=TIME_KEY,
+        time_frame='5m'
+    ).cumulate()
+
+    for directive in ['ma:2', 'ema:3']:
+        np.testing.assert_allclose(
+            stock[directive].to_numpy(),
+            expected[directive].to_numpy()
+        )
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+from pandas.testing import assert_frame_equal
+
+from stock_pandas import (
+    StockDataFrame,
+    MultiTimeFrame,
+    TimeFrame
+)
+
+from .common import get_1m_tencent
+
+
+TIME_FRAMES = ['1m', '5m', '15m', '1h']
+
+
+@pytest.fixture
+def data():
+    return get_1m_tencent()
+
+
+def expected_frame(data, time_frame):
+    return StockDataFrame(
+        data,
+        date_col='time_key',
+        time_frame=time_frame
+    ).cumulate()
+
+
+@pytest.mark.parametrize('step', [1, 7, 100])
+def test_multi_time_frame(data, step):
+    frames = MultiTimeFrame(
+        TIME_FRAMES,
+        directives={
+            '5m': ['ma:3'],
+            TimeFrame.m15: ['ma:2', 'close > ma:2']
+        },
+        date_col='time_key'
+    )
+
+    for i in range(0, len(data), step):
+        assert frames.cum_append(data.iloc[i:i + step]) is frames
+
+    for time_frame in TIME_FRAMES:
+        expected = expected_frame(data, time_frame)
+        stock = frames[time_frame]
+
+        assert isinstance(stock, StockDataFrame)
+        assert_frame_equal(
+            stock[expected.columns], expected, check_freq=False
+        )
+
+    assert len(frames['1h']) == 2
+
+    for time_frame, directive in (
+        ('5m', 'ma:3'),
+        ('15m', 'ma:2'),
+        ('15m', 'close>ma:2')
+    ):
+        stock = frames[time_frame]
+
+        # The column is kept updated along with the frame
+        assert directive in stock._stock_columns_info_map
+
+        np.testing.assert_array_equal(
+            stock.exec(directive, create_column=False),
+            expected_frame(data, time_frame).exec(directive)
+        )
+
+
+def test_multi_time_frame_update(data):
+    frames = MultiTimeFrame(TIME_FRAMES, date_col='time_key')
+
+    frames.cum_append(data.iloc[:10])
+
+    # An update of the last row goes through all time frames
+    update = data.iloc[[9]].copy()
+    update['high'] = 1000.
+    frames.cum_append(update)
+
+    rows = data.iloc[:10].copy()
+    rows.iloc[9] = update.iloc[0]
+
+    for time_frame in TIME_FRAMES:
+        assert frames[time_frame]['high'].iloc[-1] == 1000.
+        assert_frame_equal(
+            frames[time_frame][['open', 'high', 'low', 'close', 'volume']],
+            expected_frame(rows, time_frame),
+            check_freq=False
+        )
+
+    assert frames.time_frames == [
+        TimeFrame.m1, TimeFrame.m5, TimeFrame.m15, TimeFrame.H1
+    ]
+    assert [time_frame for time_frame, _ in frames.items()] == \
+        frames.time_frames
+
+
+def test_multi_time_frame_invalid():
+    with pytest.raises(ValueError, match='lowest to the highest'):
+        MultiTimeFrame(['5m', '1m'])
+
+    with pytest.raises(ValueError, match='multiple'):
+        MultiTimeFrame(['1m', '3m', '5m'])
+
+    with pytest.raises(ValueError, match='multiple'):
+        MultiTimeFrame(['1d', '1w', '1M'])
+
+    with pytest.raises(ValueError, match='at least'):
+        MultiTimeFrame([])
+
+    with pytest.raises(KeyError, match='not in the container'):
+        MultiTimeFrame(['1m', '5m'])['15m']
+
+    with pytest.raises(KeyError, match='not in the container'):
+        MultiTimeFrame(['1m', '5m'], directives={'1h': ['ma:5']})
@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+from pandas import (
+    DataFrame,
+    date_range,
+    to_datetime
+)
+from pandas.testing import assert_frame_equal
+
+from stock_pandas import (
+    StockDataFrame,
+    is_rust_available,
+    set_backend
+)
+from stock_pandas.math.bars import aggregate_ticks
+
+
+LENGTH = 500
+
+
+@pytest.fixture
+def ticks():
+    rng = np.random.default_rng(3)
+
+    # Unique timestamps of irregular intervals
+    ts = date_range('2020-01-01', periods=LENGTH * 4, freq='s')
+    ts = ts[np.sort(rng.choice(len(ts), LENGTH, replace=False))]
+
+    return (
+        ts,
+        rng.normal(100, 1, LENGTH).round(2),
+        rng.integers(1, 100, LENGTH).astype(float)
+    )
+
+
+def to_rows(ts, price, size):
+    return DataFrame({
+        'open': price,
+        'high': price,
+        'low': price,
+        'close': price,
+        'volume': size
+    }, index=ts)
+
+
+def test_from_ticks(ticks):
+    stock = StockDataFrame.from_ticks(*ticks, time_frame='1m')
+
+    expected = StockDataFrame(time_frame='1m').cum_append(to_rows(*ticks))
+
+    assert_frame_equal(stock, expected, check_freq=False)
+    assert str(stock._cumulator._time_frame) == '1m'
+
+
+def test_from_ticks_cum_append(ticks):
+    ts, price, size = ticks
+    expected = StockDataFrame.from_ticks(*ticks, time_frame='5m')
+
+    for split in (1, 100, 257, LENGTH - 1):
+        stock = StockDataFrame.from_ticks(
+            ts[:split], price[:split], size[:split], time_frame='5m'
+        ).cum_append(to_rows(ts[split:], price[split:], size[split:]))
+
+        assert_frame_equal(stock, expected, check_freq=False)
+
+
+def test_from_ticks_same_timestamp():
+    ts = np.array([0, 0, 60, 60, 61], dtype=np.int64) * 1_000_000_000
+
+    stock = StockDataFrame.from_ticks(
+        ts,
+        [2., 3., 4., 1., 5.],
+        [1, 2, 3, 4, 5],
+        time_frame='1m'
+    )
+
+    # The trades of the same timestamp are all cumulated
+    assert stock['volume'].tolist() == [3., 12.]
+    assert stock['low'].tolist() == [2., 1.]
+    assert stock['close'].tolist() == [3., 5.]
+
+    # The last trade of the unclosed bar is updated by the same timestamp
+    stock = stock.cum_append(to_rows(to_datetime(ts[-1:]), [6.], [6.]))
+    assert stock['volume'].tolist() == [3., 13.]
+    assert stock['high'].tolist() == [3., 6.]
+
+
+def test_from_ticks_invalid():
+    with pytest.raises(ValueError, match='same length'):
+        StockDataFrame.from_ticks(
+            np.arange(3), [1., 2.], [1., 2., 3.], time_frame='1m'
+        )
+
+    stock = StockDataFrame.from_ticks([], [], [], time_frame='1m')
+    assert len(stock) == 0
+    assert list(stock.columns) == ['open', 'high', 'low', 'close', 'volume']
+
+
+@pytest.mark.skipif(
+    not is_rust_available(),
+    reason='requires stock_pandas_rs'
+)
+def test_aggregate_ticks_native(ticks):
+    ts, price, size = ticks
+    keys = ts.asi8 // 60_000_000_000
+    price[7] = np.nan
+
+    set_backend('rust')
+
+    try:
+        result = aggregate_ticks(keys, price, size)
+    finally:
+        set_backend('auto')
+
+    set_backend('python')
+
+    try:
+        expected = aggregate_ticks(keys, price, size)
+    finally:
+        set_backend('auto')
+
+    for array, expected_array in zip(result, expected):
+        np.testing.assert_array_equal(array, expected_array)
@@ -1,13 +1,21 @@
 import pytest
 from numpy import isnan
+from numpy.testing import (
+    assert_array_equal,
+    assert_allclose
+)
 from pandas import DataFrame
 
 from stock_pandas import (
-    StockDataFrame
+    StockDataFrame,
+    set_backend,
+    is_rust_available
 )
 
 from .common import (
-    get_tencent
+    get_tencent,
+    get_1m_tencent,
+    TIME_KEY
 )
 
 
@@ -31,3 +39,152 @@ def test_fulfill(tencent: DataFrame):
     row_41 = stock.iloc[40]
 
     assert row_41['ma:20'] == stock['ma:20'].iloc[40]
+
+
+STATEFUL_DIRECTIVES = [
+    'ema:5',
+    'macd',
+    'macd.signal',
+    'macd.histogram',
+    'kdj.k',
+    'kdj.d',
+    'kdj.j:9,3,3,20',
+    'rsi:6'
+]
+
+
+@pytest.mark.parametrize('backend', [
+    'python',
+    pytest.param('rust', marks=pytest.mark.skipif(
+        not is_rust_available(),
+        reason='requires stock_pandas_rs'
+    ))
+])
+@pytest.mark.parametrize('directive_str', STATEFUL_DIRECTIVES)
+def test_fulfill_stateful(tencent, backend, directive_str):
+    set_backend(backend)
+
+    try:
+        tencent = StockDataFrame(tencent)
+        expected = tencent.exec(directive_str)
+
+        stock = tencent.iloc[:20]
+        name = StockDataFrame.directive_stringify(directive_str)
+        stock[directive_str]
+
+        for start in range(20, len(tencent), 7):
+            stock = stock.append(tencent.iloc[start:start + 7])
+            stock.fulfill()
+
+            assert stock._stock_columns_info_map[name].state is not None
+
+        # Only the new rows are calculated, and the result is the same as
+        # the one of the full calculation
+        assert_array_equal(stock[directive_str].to_numpy(), expected)
+    finally:
+        set_backend('auto')
+
+
+@pytest.mark.parametrize('directive_str', STATEFUL_DIRECTIVES)
+def test_cum_append_stateful(directive_str):
+    ticks = get_1m_tencent()
+
+    stock = StockDataFrame(
+        date_col=TIME_KEY,
+        time_frame='5m'
+    ).cum_append(ticks.iloc[:30])
+
+    name = StockDataFrame.directive_stringify(directive_str)
+    stock[directive_str]
+
+    # Each tick replaces the unclosed bar until the bar is closed
+    for i in range(30, len(ticks)):
+        stock = stock.cum_append(ticks.iloc[i:i + 1])
+        stock.fulfill()
+
+        assert stock._stock_columns_info_map[name].state is not None
+
+    expected = StockDataFrame(
+        date_col=TIME_KEY,
+        time_frame='5m'
+    ).cum_append(ticks).exec(directive_str)
+
+    assert_array_equal(stock[directive_str].to_numpy(), expected)
+
+
+def test_stateful_slice(tencent):
+    stock = StockDataFrame(tencent).iloc[:50]
+    stock['ema:5']
+
+    assert stock.iloc[10:]._stock_columns_info_map['ema:5'].state is not None
+
+    # Only the last calculated row is dropped,
+    # so that the state before the row is used
+    rewound = stock.iloc[:-1]
+    info = rewound._stock_columns_info_map['ema:5']
+
+    assert info.state is not None
+    assert info.prev_state is None
+
+    rewound = rewound.append(tencent.iloc[49:51])
+    assert_array_equal(
+        rewound['ema:5'].to_numpy(),
+        StockDataFrame(tencent).iloc[:51].exec('ema:5')
+    )
+
+    # More rows are dropped
+    assert stock.iloc[:-2]._stock_columns_info_map['ema:5'].state is None
+
+
+PARALLEL_DIRECTIVES = [
+    'ma:5',
+    'ema:5',
+    'kdj.j',
+    'boll.upper',
+    'close > ma:10',
+    'repeat:2@(close > ma:20)',
+    'hv:10',
+    'tf:1w@(ma:2)'
+]
+
+
+def fulfill_with_workers(tencent, workers):
+    stock = tencent.iloc[:60]
+
+    for directive_str in PARALLEL_DIRECTIVES:
+        stock[directive_str]
+
+    stock.alias('m5', 'ma:5')
+    stock['ma:3@m5']
+
+    for i in range(60, 100, 13):
+        stock = stock.append(tencent.iloc[i:i + 13])
+        stock.fulfill(workers)
+
+        for info in stock._stock_columns_info_map.values():
+            assert info.size == len(stock)
+
+    return stock
+
+
+def test_fulfill_workers(tencent):
+    tencent = StockDataFrame(tencent)
+
+    expected = fulfill_with_workers(tencent, None)
+    stock = fulfill_with_workers(tencent, 4)
+
+    for directive_str in [*PARALLEL_DIRECTIVES, 'ma:3@m5']:
+        # The same as fulfilling one by one
+        assert_array_equal(
+            stock[directive_str].to_numpy(),
+            expected[directive_str].to_numpy()
+        )
+
+        assert_allclose(
+            stock[directive_str].to_numpy().astype(float),
+            tencent.exec(
+                # Calculated after ma:5 is fulfilled
+                'ma:3@(ma:5)' if directive_str == 'ma:3@m5'
+                else directive_str
+            ).astype(float)
+        )
@@ -1,11 +1,10 @@
-# import numpy as np
-# import itertools
+import numpy as np
 import pytest
-# import pandas as pd
 
 from stock_pandas import StockDataFrame
 from .common import (
-    create_stock
+    create_stock,
+    get_tencent
 )
 
 
@@ -33,3 +32,115 @@ def test_indexing_with_column_list(stock):
     stock = stock[['close', 'open']]
     assert isinstance(stock, StockDataFrame)
     assert list(stock.columns) == ['close', 'open']
+
+
+DIRTY_DIRECTIVES = ['ma:5', 'hhv:3', 'close > ma:3', 'ma:5@high']
+
+
+def source_of(stock):
+    return StockDataFrame(
+        stock[['open', 'high', 'low', 'close', 'volume']].copy()
+    )
+
+
+@pytest.mark.parametrize('change, start', [
+    (lambda s: s.iloc.__setitem__((-10, 3), 1000.), 90),
+    (lambda s: s.loc.__setitem__((s.index[20], 'close'), 1.), 20),
+    (lambda s: s.at.__setitem__((s.index[30], 'close'), 2.), 30),
+    (lambda s: s.iat.__setitem__((40, 3), 3.), 40),
+    (lambda s: s.iloc.__setitem__((slice(50, 60), 3), 4.), 50),
+    (lambda s: s.loc.__setitem__((s['close'] > 100, 'close'), 100.), None),
+])
+def test_dirty_range(change, start):
+    stock = get_tencent()
+    stock = stock[['open', 'high', 'low', 'close', 'volume']]
+
+    assert stock.columns.get_loc('close') == 3
+
+    for directive_str in DIRTY_DIRECTIVES:
+        stock[directive_str]
+
+    mask = stock['close'] > 100
+    change(stock)
+
+    if start is None:
+        start = int(mask.to_numpy().argmax())
+
+    info_map = stock._stock_columns_info_map
+
+    # Only the columns which read from close are to be recalculated
+    assert info_map['ma:5'].size == start
+    assert info_map['close>ma:3'].size == start
+    assert info_map['hhv:3'].size == len(stock)
+    assert info_map['ma:5@high'].size == len(stock)
+
+    expected = source_of(stock)
+
+    for directive_str in DIRTY_DIRECTIVES:
+        np.testing.assert_array_equal(
+            stock.exec(directive_str),
+            expected.exec(directive_str)
+        )
+
+
+def test_dirty_range_through_aliases():
+    def prepare(stock):
+        stock.exec('ma:5', True)
+        stock.alias('m5', 'ma:5')
+        stock.exec('ma:3@m5', True)
+        stock.alias('m3', 'ma:3@m5')
+        stock.exec('ma:2@m3', True)
+        # A nested directive which reads from an alias
+        stock.exec('ma:2@(ma:3@m5)', True)
+        stock.exec('hhv:3', True)
+
+        return stock
+
+    stock = prepare(get_tencent()[['open', 'high', 'low', 'close', 'volume']])
+    stock.loc[stock.index[20], 'close'] = 1000.
+
+    info_map = stock._stock_columns_info_map
+
+    # The columns which read from close, even through other columns
+    for name, info in info_map.items():
+        assert info.size == (len(stock) if name == 'hhv:3' else 20), name
+
+    expected = prepare(source_of(stock))
+
+    for directive_str in [
+        'ma:5', 'm5', 'ma:3@m5', 'm3', 'ma:2@m3', 'ma:2@(ma:3@m5)'
+    ]:
+        np.testing.assert_array_equal(
+            stock.exec(directive_str),
+            expected.exec(directive_str),
+            err_msg=directive_str
+        )
+
+
+@pytest.mark.parametrize('change', [
+    lambda s: s.replace(
+        {'close': {s['close'].iloc[20]: 1000.}}, inplace=True
+    ),
+    lambda s: s.mask(s['close'] > 100, 100., inplace=True)
+])
+def test_dirty_range_inplace_methods(change):
+    stock = get_tencent()
+    stock = stock[['open', 'high', 'low', 'close', 'volume']]
+
+    for directive_str in DIRTY_DIRECTIVES:
+        stock[directive_str]
+
+    change(stock)
+
+    info_map = stock._stock_columns_info_map
+
+    assert info_map['ma:5'].size < len(stock)
+
+    expected = source_of(stock)
+
+    for directive_str in DIRTY_DIRECTIVES:
+        np.testing.assert_array_equal(
+            stock.exec(directive_str),
+            expected.exec(directive_str),
+            err_msg=directive_str
+        )
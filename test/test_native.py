@@ -0,0 +1,244 @@
+import pytest
+import numpy as np
+
+from stock_pandas import (
+    StockDataFrame,
+    set_backend,
+    is_rust_available
+)
+from stock_pandas.directive.command import CommandDefinition
+from stock_pandas.directive.types import (
+    CommandPreset,
+    COMMAND_TIME_FRAME_NAME
+)
+from stock_pandas.directive.native import (
+    compile_directive,
+    run_native,
+    create_job,
+    run_kernels
+)
+from stock_pandas.commands.base import BUILTIN_COMMANDS
+from stock_pandas.commands.common import (
+    lookback_period,
+    series_close,
+    arg_period
+)
+
+from .common import get_tencent
+
+
+@pytest.fixture
+def stock():
+    return get_tencent()
+
+
+def parse(df: StockDataFrame, directive_str: str):
+    return df._parse_directive(directive_str)
+
+
+def test_builtin_commands_have_kernels():
+    for name, definition in BUILTIN_COMMANDS.items():
+        if name == COMMAND_TIME_FRAME_NAME:
+            # Its series is calculated on another data frame
+            continue
+
+        presets = [definition.preset, *(definition.sub_commands or {}).values()]
+
+        for preset in presets:
+            if preset is not None:
+                assert preset.native is not None, name
+
+
+def test_compile_time_frame_command(stock):
+    # The time frame command is never handed over to the Rust backend
+    assert compile_directive(parse(stock, 'tf:1h@(ma:5)')) is None
+    assert compile_directive(parse(stock, 'ma:5 > tf:1h@(ma:5)')) is None
+
+
+def test_compile_directive(stock):
+    plan, columns = compile_directive(parse(stock, 'ma:5 > boll.upper'))
+
+    assert plan == (
+        'binary', '>',
+        ('kernel', 'ma', (5,), (('column', 'close'),)),
+        ('kernel', 'boll.upper', (20, 2.), (('column', 'close'),))
+    )
+    assert columns == {'close'}
+
+    plan, columns = compile_directive(parse(stock, '~ kdj.j < 0'))
+
+    assert plan == (
+        'binary', '<',
+        (
+            'unary', '~',
+            (
+                'kernel', 'kdj.j', (9, 3, 3, 50.),
+                (('column', 'high'), ('column', 'low'), ('column', 'close'))
+            )
+        ),
+        ('scalar', 0.)
+    )
+    assert columns == {'high', 'low', 'close'}
+
+
+def test_compile_directive_without_kernel(stock):
+    # Plain columns and scalars are cheap enough for numpy
+    assert compile_directive(parse(stock, 'close')) is None
+    assert compile_directive(parse(stock, 'high - low')) is None
+
+
+def test_compile_user_defined_command(stock):
+    def double(period, series):
+        return series * period
+
+    class Stock(StockDataFrame):
+        COMMANDS = StockDataFrame.COMMANDS.copy()
+
+    Stock.define_command('double', CommandDefinition(
+        CommandPreset(
+            formula=double,
+            lookback=lookback_period,
+            args=[arg_period],
+            series=series_close
+        )
+    ))
+
+    plan, _ = compile_directive(parse(Stock(stock), 'double:2@(ma:5)'))
+
+    assert plan == (
+        'formula', double, (2,),
+        (('kernel', 'ma', (5,), (('column', 'close'),)),)
+    )
+
+
+def test_run_native_python_backend(stock):
+    set_backend('python')
+
+    try:
+        assert run_native(parse(stock, 'ma:5'), stock, slice(None)) is None
+    finally:
+        set_backend('auto')
+
+
+def assert_same(result, expected):
+    assert result.dtype == expected.dtype
+
+    if result.dtype == bool:
+        np.testing.assert_array_equal(result, expected)
+    else:
+        np.testing.assert_allclose(result, expected, equal_nan=True)
+
+
+DIRECTIVES = [
+    'ma:5',
+    'ema:12 - ma:20',
+    'macd.signal',
+    'boll.upper:20,2 - boll.lower',
+    'kdj.j < 0',
+    'rsi:14 > 70',
+    'increase:3@(ma:5)',
+    'repeat:2@(close > ma:20)',
+    'ma:5 // ma:10',
+    'ma:5 \\ ma:10',
+    '~ style:bullish',
+    'change@(hhv:5)',
+    'hv:10 * 100',
+]
+
+
+@pytest.mark.skipif(
+    not is_rust_available(),
+    reason='requires stock_pandas_rs'
+)
+@pytest.mark.parametrize('directive_str', DIRECTIVES)
+def test_run_native(stock, directive_str):
+    set_backend('rust')
+
+    try:
+        directive = parse(stock, directive_str)
+
+        expected = directive.run(stock, slice(None))
+        result = run_native(directive, stock, slice(None))
+        partial = run_native(directive, stock, slice(- 30, None))
+        expected_partial = directive.run(stock, slice(- 30, None))
+    finally:
+        set_backend('auto')
+
+    assert_same(result, expected)
+    assert_same(partial, expected_partial)
+
+
+def test_create_job(stock):
+    stock.alias('Close', 'close')
+
+    native, args, inputs = create_job(
+        parse(stock, 'kdj.j@high,low,Close'), stock, slice(- 10, None)
+    )
+
+    assert native == 'kdj.j'
+    assert args == (9, 3, 3, 50.)
+    assert len(inputs) == 3
+    np.testing.assert_array_equal(inputs[2], stock['close'].to_numpy()[- 10:])
+
+    # Not a single kernel on columns
+    assert create_job(parse(stock, 'ma:5@(ema:5)'), stock, slice(None)) is None
+
+
+def test_run_kernels_python_backend(stock):
+    set_backend('python')
+
+    try:
+        job = create_job(parse(stock, 'ma:5'), stock, slice(None))
+        assert run_kernels([job]) is None
+    finally:
+        set_backend('auto')
+
+
+@pytest.mark.skipif(
+    not is_rust_available(),
+    reason='requires stock_pandas_rs'
+)
+@pytest.mark.parametrize('parallel', [True, False])
+def test_run_kernels(stock, parallel):
+    directives = ['ma:5', 'macd.signal', 'kdj.j', 'rsi', 'style:bullish']
+
+    set_backend('rust')
+
+    try:
+        results = run_kernels([
+            create_job(parse(stock, directive_str), stock, slice(None))
+            for directive_str in directives
+        ], parallel)
+
+        for directive_str, result in zip(directives, results):
+            assert_same(
+                result,
+                parse(stock, directive_str).run(stock, slice(None))
+            )
+    finally:
+        set_backend('auto')
+
+
+@pytest.mark.skipif(
+    not is_rust_available(),
+    reason='requires stock_pandas_rs'
+)
+def test_fulfill_natively(stock):
+    set_backend('rust')
+
+    try:
+        current = stock.iloc[:-5]
+        current['ma:5']
+        current['kdj.j']
+        current['ma:5 > ma:10']
+
+        current = current.append(stock.iloc[-5:])
+        current.fulfill()
+
+        for directive_str in ['ma:5', 'kdj.j', 'ma:5 > ma:10']:
+            assert_same(
+                current[directive_str].to_numpy(),
+                stock.exec(directive_str)
+            )
+    finally:
+        set_backend('auto')
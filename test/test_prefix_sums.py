@@ -0,0 +1,116 @@
+import pytest
+import numpy as np
+
+from stock_pandas.math.prefix_sums import (
+    calc_prefix_sums,
+    PrefixSums
+)
+
+from .common import get_tencent
+
+
+@pytest.fixture
+def stock():
+    return get_tencent()
+
+
+def rolling(array, period, func):
+    result = np.full(len(array), np.nan)
+
+    for i in range(period - 1, len(array)):
+        result[i] = func(array[i + 1 - period:i + 1])
+
+    return result
+
+
+def test_calc_prefix_sums():
+    sums, comps = calc_prefix_sums(np.array([1e16, 1., -1e16, 1.]), 0., 0.)
+
+    # Naive summation results in 1.
+    assert sums[-1] + comps[-1] == 2.
+
+    # Continue from the previous state
+    sums2, comps2 = calc_prefix_sums(np.array([-1e16, 1.]), sums[1], comps[1])
+
+    assert sums2[-1] == sums[-1]
+    assert comps2[-1] == comps[-1]
+
+
+def test_rolling():
+    array = np.random.default_rng(1).normal(1000, 10, 100)
+    array[50] = np.nan
+
+    prefix_sums = PrefixSums.create(array)
+    r = prefix_sums.rolling(0, 100)
+
+    np.testing.assert_allclose(r.sum(5), rolling(array, 5, np.sum))
+    np.testing.assert_allclose(r.mean(5), rolling(array, 5, np.mean))
+    np.testing.assert_allclose(r.std(5), rolling(array, 5, np.std))
+    np.testing.assert_allclose(
+        r.var(5, 1),
+        rolling(array, 5, lambda x: np.var(x, ddof=1))
+    )
+
+    assert np.isnan(r.mean(101)).all()
+    assert np.isnan(r.var(1, 1)).all()
+
+    # Rows of a partial range
+    np.testing.assert_allclose(
+        prefix_sums.rolling(90, 100).mean(5),
+        rolling(array, 5, np.mean)[90:]
+    )
+
+    # The sliced prefix sums only see the rows inside the slice
+    np.testing.assert_allclose(
+        prefix_sums.slice(60, 100).rolling(0, 40).mean(5),
+        rolling(array[60:], 5, np.mean)
+    )
+
+
+def test_extend():
+    array = np.arange(20, dtype=float)
+
+    prefix_sums = PrefixSums.create(array[:10])
+    extended = prefix_sums.extend(array[10:15])
+
+    assert extended.size == 15
+    # Appending to the tip shares the buffer
+    assert extended._buffer is prefix_sums._buffer
+
+    # Another branch could not write to the shared buffer
+    branch = prefix_sums.extend(-array[10:15])
+    assert branch._buffer is not prefix_sums._buffer
+
+    np.testing.assert_allclose(
+        extended.extend(array[15:]).rolling(0, 20).mean(3),
+        rolling(array, 3, np.mean)
+    )
+    np.testing.assert_allclose(
+        branch.rolling(0, 15).mean(3),
+        rolling(np.concatenate([array[:10], -array[10:15]]), 3, np.mean)
+    )
+
+    assert PrefixSums.create(np.array([1., np.inf])) is None
+    assert prefix_sums.extend(np.array([np.inf])) is None
+
+
+def test_extend_compact():
+    array = np.arange(20, dtype=float)
+
+    prefix_sums = PrefixSums.create(array[:10])
+    tail = prefix_sums.slice(3, 10)
+
+    assert tail.extend(array[10:11])._buffer is prefix_sums._buffer
+
+    # Only a few rows are retained, such as by `max_rows`,
+    # so that the dropped rows are released
+    prefix_sums = PrefixSums.create(array[:10])
+    compacted = prefix_sums.slice(7, 10).extend(array[10:])
+
+    assert compacted._buffer is not prefix_sums._buffer
+    assert compacted._start == 0
+
+    np.testing.assert_allclose(
+        compacted.rolling(0, 13).mean(3),
+        rolling(array[7:], 3, np.mean)
+    )
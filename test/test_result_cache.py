@@ -0,0 +1,174 @@
+import warnings
+
+import pytest
+import numpy as np
+from pandas import option_context
+
+from stock_pandas import StockDataFrame
+from stock_pandas.meta.cache import ResultCache
+
+from .common import get_tencent
+
+
+@pytest.fixture
+def stock():
+    return get_tencent()
+
+
+def cached(stock, name):
+    return stock._result_cache.get(name, len(stock))
+
+
+def test_result_cache_budget():
+    cache = ResultCache(800)
+
+    a = np.zeros(50)
+    b = np.ones(50)
+
+    cache.set('a', 50, a, ['close'])
+    cache.set('b', 50, b, ['open'])
+
+    assert cache.nbytes == 800
+    assert not a.flags.writeable
+
+    # Touch `a` so that `b` is the least recently used one
+    assert cache.get('a', 50) is a
+
+    cache.set('c', 10, np.zeros(10), ['close'])
+
+    assert cache.get('b', 50) is None
+    assert cache.get('a', 50) is a
+    assert cache.nbytes == 480
+
+    # Too large to cache
+    cache.set('d', 101, np.zeros(101), ['close'])
+    assert cache.get('d', 101) is None
+
+    # The frame length is part of the key
+    assert cache.get('a', 49) is None
+
+
+def test_result_cache_invalidate():
+    cache = ResultCache(1024)
+
+    cache.set('a', 1, np.zeros(1), ['close'])
+    cache.set('b', 1, np.zeros(1), ['open', 'close'])
+    cache.set('c', 1, np.zeros(1), ['high'])
+
+    cache.invalidate(['open'])
+    assert cache.get('a', 1) is not None
+    assert cache.get('b', 1) is None
+
+    cache.invalidate()
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+
+def test_exec_cached(stock):
+    ma = stock.exec('ma:5')
+    cached_ma = cached(stock, 'ma:5')
+
+    assert not cached_ma.flags.writeable
+    np.testing.assert_array_equal(ma, cached_ma)
+
+    stock.exec('ma:5@close')
+    assert cached(stock, 'ma:5') is cached_ma
+    assert 'ma:5' not in stock.columns
+
+    # The returned ndarrays are copies which could be changed
+    ma[:] = 0.
+    np.testing.assert_array_equal(stock.exec('ma:5'), cached_ma)
+    assert not (cached_ma == 0.).any()
+
+    window = stock.exec('ma:5', tail=10)
+    window[:] = 0.
+    np.testing.assert_array_equal(window, 0.)
+    assert not (cached_ma == 0.).any()
+
+    np.testing.assert_array_equal(
+        stock.exec('ma:5 > ma:10'),
+        cached_ma > stock.exec('ma:10')
+    )
+
+    # The column itself will be the cache
+    stock.exec('ma:20', create_column=True)
+    assert stock._result_cache.get('ma:20', len(stock)) is None
+
+
+def test_exec_cache_invalidation(stock):
+    ma = stock.exec('ma:5')
+    cached_ma = cached(stock, 'ma:5')
+    stock.exec('hhv:5')
+
+    # A column which `ma:5` does not depend on
+    stock.loc[:, 'high'] = stock['high'] + 1
+
+    assert cached(stock, 'ma:5') is cached_ma
+    assert cached(stock, 'hhv:5') is None
+
+    stock['close'] = stock['close'] * 2
+    assert cached(stock, 'ma:5') is None
+
+    ma2 = stock.exec('ma:5')
+    cached_ma2 = cached(stock, 'ma:5')
+
+    assert cached_ma2 is not cached_ma
+    np.testing.assert_allclose(ma2, ma * 2, equal_nan=True)
+
+    stock.iloc[-1, stock.columns.get_loc('close')] = 0.
+    assert cached(stock, 'ma:5') is None
+
+
+def test_exec_cache_after_append(stock):
+    current = stock.iloc[:-1]
+    current.exec('ma:5')
+    cached_ma = cached(current, 'ma:5')
+
+    appended = current.append(stock.iloc[-1])
+
+    assert cached(appended, 'ma:5') is None
+    assert len(appended.exec('ma:5')) == len(stock)
+
+    # The origin data frame is not affected
+    assert cached(current, 'ma:5') is cached_ma
+
+
+def test_exec_cache_disabled(stock):
+    class Stock(StockDataFrame):
+        RESULT_CACHE_BYTES = 0
+
+    stock = Stock(stock)
+
+    ma = stock.exec('ma:5')
+    assert ma.flags.writeable
+    assert len(stock._result_cache) == 0
+
+
+def test_exec_cache_replace(stock):
+    stock.exec('ma:5')
+    close = stock['close'].iloc[20]
+
+    stock.replace({'close': {close: 1000.}}, inplace=True)
+
+    assert cached(stock, 'ma:5') is None
+    np.testing.assert_array_equal(
+        stock.exec('ma:5'),
+        StockDataFrame(stock[['close']].copy()).exec('ma:5')
+    )
+
+
+def test_exec_cache_chained_assignment(stock):
+    # Chained assignments only change the data frame without copy-on-write
+    with option_context('mode.copy_on_write', False):
+        stock.exec('ma:5')
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            stock['close'].iloc[20] = 1000.
+
+        assert stock['close'].iloc[20] == 1000.
+        assert cached(stock, 'ma:5') is None
+        np.testing.assert_array_equal(
+            stock.exec('ma:5'),
+            StockDataFrame(stock[['close']].copy()).exec('ma:5')
+        )
@@ -0,0 +1,139 @@
+from threading import Thread
+
+import numpy as np
+import pytest
+
+from pandas import (
+    DataFrame,
+    option_context
+)
+
+from stock_pandas import (
+    StockDataFrame,
+    Snapshot
+)
+
+from .common import (
+    get_tencent,
+    TIME_KEY
+)
+
+
+@pytest.fixture
+def tencent() -> DataFrame:
+    return get_tencent(stock=False)
+
+
+@pytest.fixture(params=[True, False], ids=['cow', 'no_cow'])
+def cow(request):
+    with option_context('mode.copy_on_write', request.param):
+        yield request.param
+
+
+DIRECTIVES = ['ma:5', 'close > ma:10', 'kdj.j']
+
+
+def expected_of(tencent: DataFrame, size: int):
+    stock = StockDataFrame(tencent.iloc[:size], date_col=TIME_KEY)
+
+    return {
+        directive_str: stock.exec(directive_str)
+        for directive_str in DIRECTIVES
+    }
+
+
+def assert_snapshot(snapshot: Snapshot, expected):
+    for directive_str, array in expected.items():
+        np.testing.assert_array_equal(snapshot.exec(directive_str), array)
+
+
+def test_snapshot(tencent: DataFrame, cow):
+    stock = StockDataFrame(tencent.iloc[:30], date_col=TIME_KEY)
+    stock['ma:5']
+
+    stock = stock.append(tencent.iloc[30:40])
+    stock.alias('m5', 'ma:5')
+
+    snapshot = stock.snapshot()
+
+    assert isinstance(snapshot, Snapshot)
+    assert len(snapshot) == 40
+    assert dict(snapshot.versions) == {'ma:5': 30}
+
+    # The data frame is appended, fulfilled and changed afterwards
+    appended = stock.append(tencent.iloc[40:50])
+    appended['ma:5']
+    stock['ma:5']
+    stock['kdj.j']
+    stock.loc[stock.index[35], 'close'] = 0.
+
+    assert len(snapshot) == 40
+    assert 'kdj.j' not in snapshot.columns
+    assert dict(snapshot.versions) == {'ma:5': 30}
+
+    expected = expected_of(tencent, 40)
+    assert_snapshot(snapshot, expected)
+
+    np.testing.assert_array_equal(
+        snapshot.get_column('m5').to_numpy(),
+        expected['ma:5']
+    )
+
+    frame = snapshot.to_frame()
+
+    assert isinstance(frame, StockDataFrame)
+    np.testing.assert_array_equal(frame['ma:5'].to_numpy(), expected['ma:5'])
+
+    # The snapshot is not affected by the created data frame
+    assert dict(snapshot.versions) == {'ma:5': 30}
+
+    frame.loc[frame.index[36], 'close'] = 0.
+    assert_snapshot(snapshot, expected)
+
+
+def test_snapshot_threads(tencent: DataFrame, cow):
+    stock = StockDataFrame(
+        tencent.iloc[:30],
+        date_col=TIME_KEY,
+        subscriptions=DIRECTIVES
+    )
+
+    snapshots = []
+    errors = []
+
+    def write():
+        nonlocal stock
+
+        for i in range(30, 60):
+            stock = stock.append(tencent.iloc[i:i + 1])
+
+    def read():
+        try:
+            for _ in range(30):
+                snapshot = stock.snapshot()
+                snapshots.append(snapshot)
+
+                for directive_str in DIRECTIVES:
+                    snapshot.exec(directive_str)
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+
+    threads = [Thread(target=write), *[Thread(target=read) for _ in range(3)]]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+
+    cache = {}
+
+    for snapshot in snapshots:
+        size = len(snapshot)
+
+        if size not in cache:
+            cache[size] = expected_of(tencent, size)
+
+        assert_snapshot(snapshot, cache[size])
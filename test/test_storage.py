@@ -0,0 +1,182 @@
+import numpy as np
+import pytest
+from pandas import (
+    DataFrame,
+    concat,
+    date_range,
+    option_context
+)
+from pandas.testing import assert_frame_equal
+
+from stock_pandas import StockDataFrame
+from stock_pandas.properties import KEY_STORAGE
+
+
+LENGTH = 50
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(7)
+
+    return DataFrame({
+        'open': rng.normal(100, 1, LENGTH),
+        'high': rng.normal(101, 1, LENGTH),
+        'low': rng.normal(99, 1, LENGTH),
+        'close': rng.normal(100, 1, LENGTH),
+        'volume': rng.integers(1000, 2000, LENGTH)
+    }, index=date_range('2020-01-01', periods=LENGTH, freq='min'))
+
+
+@pytest.fixture(params=[True, False], ids=['cow', 'no_cow'])
+def cow(request):
+    # The storage is only used with copy-on-write
+    with option_context('mode.copy_on_write', request.param):
+        yield request.param
+
+
+def span_of(stock):
+    return getattr(stock, KEY_STORAGE, None)
+
+
+def test_append_storage(data, cow):
+    stock = StockDataFrame(data.iloc[:10])
+    stock['ma:3']
+    stock['ema:5']
+
+    storages = set()
+
+    for i in range(10, LENGTH):
+        stock = stock.append(data.iloc[i:i + 1])
+
+        span = span_of(stock)
+        assert (span is not None) == cow
+
+        stock['ma:3']
+        stock['ema:5']
+
+        if cow:
+            storages.add(id(span.storage))
+
+            # The columns are fulfilled in place
+            assert span_of(stock) is span
+
+    if cow:
+        # The capacity doubles
+        assert len(storages) < 5
+
+    expected = StockDataFrame(data)
+    expected['ma:3']
+    expected['ema:5']
+
+    assert_frame_equal(
+        DataFrame(stock),
+        DataFrame(expected),
+        check_freq=False
+    )
+
+
+def test_branches(data, cow):
+    stock = StockDataFrame(data.iloc[:10]).append(data.iloc[10:11])
+
+    a = stock.append(data.iloc[11:12])
+    # `stock` is no longer the latest rows of the storage
+    b = stock.append(data.iloc[20:21])
+
+    if cow:
+        assert span_of(a).storage is span_of(stock).storage
+        assert span_of(b).storage is not span_of(stock).storage
+
+    assert_frame_equal(DataFrame(a), data.iloc[:12], check_freq=False)
+    assert_frame_equal(
+        DataFrame(b),
+        concat([data.iloc[:11], data.iloc[20:21]])
+    )
+
+    # In-place modification copies the view
+    a.loc[a.index[0], 'close'] = 0.
+    assert span_of(a) is None
+    assert stock['close'].iloc[0] == data['close'].iloc[0]
+    assert b['close'].iloc[0] == data['close'].iloc[0]
+
+    c = a.append(data.iloc[12:13])
+    assert c['close'].iloc[0] == 0.
+
+    if cow:
+        assert span_of(c).storage is not span_of(stock).storage
+
+
+def test_modify_appended(data, cow):
+    stock = StockDataFrame(data.iloc[:10]).append(data.iloc[10:11])
+    appended = stock.append(data.iloc[11:12])
+
+    appended.loc[appended.index[0], 'close'] = -999.
+    appended.loc[appended.index[-1], 'close'] = -999.
+
+    assert_frame_equal(DataFrame(stock), data.iloc[:11], check_freq=False)
+
+    # Rows appended after the modification are not affected either
+    other = stock.append(data.iloc[30:31])
+    assert_frame_equal(
+        DataFrame(other),
+        concat([data.iloc[:11], data.iloc[30:31]])
+    )
+
+
+def test_fallback(data, cow):
+    stock = StockDataFrame(data.iloc[:10]).append(data.iloc[10:11])
+
+    # A new column
+    other = data.iloc[11:12].assign(foo=1.)
+    assert_frame_equal(
+        DataFrame(stock.append(other)),
+        concat([data.iloc[:11], other]),
+        check_freq=False
+    )
+
+    # The dtype of volume is promoted as `concat()`
+    other = data.iloc[11:12].astype({'volume': float})
+    appended = stock.append(other)
+
+    assert (span_of(appended) is not None) == cow
+    assert appended['volume'].dtype == float
+    assert_frame_equal(
+        DataFrame(appended),
+        concat([data.iloc[:11], other]),
+        check_freq=False
+    )
+
+    # Missing columns are filled with nan
+    other = data.iloc[11:12][['close']]
+    assert_frame_equal(
+        DataFrame(stock.append(other)),
+        concat([data.iloc[:11], other]),
+        check_freq=False
+    )
+
+    # Not supported index
+    other = data.iloc[11:12].reset_index(drop=True)
+    appended = stock.append(other)
+
+    assert span_of(appended) is None
+    assert len(appended) == 12
+
+
+def test_max_rows_storage(data, cow):
+    stock = StockDataFrame(data.iloc[:10], max_rows=8)
+    stock['ema:3']
+
+    for i in range(10, LENGTH):
+        stock = stock.append(data.iloc[i:i + 1])
+        stock['ema:3']
+
+        assert len(stock) == 8
+        assert (span_of(stock) is not None) == cow
+
+    if cow:
+        span = span_of(stock)
+        # The dropped rows are released
+        assert span.storage.capacity < 32
+
+    expected = StockDataFrame(data.iloc[2:])['ema:3'].to_numpy()[-8:]
+    assert (stock['ema:3'].to_numpy() == expected).all()
@@ -0,0 +1,172 @@
+import pytest
+import numpy as np
+
+from stock_pandas import StockStream
+
+from .common import get_tencent
+
+
+DIRECTIVES = [
+    'ma:5',
+    'ema:5',
+    'macd.histogram',
+    'kdj.j',
+    'rsi:6',
+    'boll.upper',
+    'atr',
+    'hhv:5@high',
+    'ma:5@(ema:5)',
+    'close > ma:5',
+    'close // ma:5',
+    'ma:5 \\ ma:10',
+    '-ema:5',
+    'repeat:2@(close > open)',
+    'close'
+]
+
+
+@pytest.fixture
+def stock():
+    return get_tencent()
+
+
+def check_values(stream, stock):
+    for directive in DIRECTIVES:
+        expected = stock.exec(directive)
+
+        assert stream[directive] == pytest.approx(
+            expected[-1],
+            nan_ok=True
+        ), directive
+
+
+def test_stream_rows(stock):
+    stream = StockStream(DIRECTIVES)
+
+    for i in range(60):
+        stream.append(stock.iloc[i])
+
+    assert len(stream) == 60
+
+    check_values(stream, stock[:60])
+
+    latest = stream.latest()
+    assert latest['close'] == stock['close'].iloc[59]
+    assert latest['kdj.j'] == stream['kdj.j']
+
+
+def test_stream_batches(stock):
+    stream = StockStream(DIRECTIVES)
+
+    for start in range(0, 80, 7):
+        stream.append(stock.iloc[start:start + 7])
+
+    stream.append([])
+
+    check_values(stream, stock[:84])
+
+    snapshot = stream.to_frame()
+
+    assert len(snapshot) == 84
+    assert list(snapshot.index) == list(stock.index[:84])
+
+    for directive in DIRECTIVES:
+        np.testing.assert_allclose(
+            snapshot[directive].to_numpy(dtype=float),
+            stock[:84].exec(directive).astype(float),
+            equal_nan=True,
+            err_msg=directive
+        )
+
+
+def test_stream_snapshot_append(stock):
+    stream = StockStream(['ema:5', 'ma:5'])
+    stream.append([
+        dict(row) for _, row in stock.iloc[:50].iterrows()
+    ])
+
+    snapshot = stream.to_frame()
+
+    # There is no index for dicts
+    assert list(snapshot.index) == list(range(50))
+    assert snapshot._stock_columns_info_map['ema:5'].state is not None
+
+    snapshot = snapshot.append(
+        stock.iloc[50:60].reset_index(drop=True)
+    )
+
+    np.testing.assert_array_equal(
+        snapshot['ema:5'].to_numpy(),
+        stock[:60].exec('ema:5')
+    )
+
+
+def test_stream_invalid(stock):
+    stream = StockStream(['ma:5@foo'])
+
+    with pytest.raises(KeyError, match='foo'):
+        stream['ma:5@foo']
+
+    with pytest.raises(KeyError, match='foo'):
+        stream.append(stock.iloc[0])
+
+
+def test_stream_append_failed():
+    stream = StockStream(['ma:2', 'ema:3@open'])
+    stream.append({'open': 1., 'close': 1.})
+
+    # `ma:2` is updated before `ema:3@open` fails
+    with pytest.raises(KeyError, match='open'):
+        stream.append({'close': 5.})
+
+    assert len(stream) == 1
+    assert stream['close'] == 1.
+
+    stream.append({'open': 4., 'close': 4.})
+
+    assert stream['ma:2'] == 2.5
+    assert len(stream.to_frame()) == 2
+
+
+def test_stream_peek(stock):
+    stream = StockStream(DIRECTIVES)
+    stream.append(stock.iloc[:30])
+
+    for i in range(30, 60):
+        row = stock.iloc[i]
+
+        # Ticks of the unclosed bar
+        for close in (row['close'] * 0.9, row['close'] * 1.1):
+            tick = row.copy()
+            tick['close'] = close
+
+            peeked = stream.peek(tick)
+
+            assert peeked['close'] == close
+            assert len(stream) == i
+
+        expected = StockStream(DIRECTIVES).append(stock.iloc[:i + 1])
+        peeked = stream.peek(row)
+
+        assert peeked.keys() == expected.latest().keys()
+
+        for key, value in peeked.items():
+            assert value == pytest.approx(
+                expected[key], nan_ok=True
+            ), key
+
+        stream.append(row)
+
+    # Peeking never changes the state
+    check_values(stream, stock[:60])
+    assert stream.peek([]) == stream.latest()
+
+    snapshot = stream.to_frame()
+
+    for directive in DIRECTIVES:
+        np.testing.assert_allclose(
+            snapshot[directive].to_numpy(dtype=float),
+            stock[:60].exec(directive).astype(float),
+            equal_nan=True,
+            err_msg=directive
+        )
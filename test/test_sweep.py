@@ -0,0 +1,79 @@
+import pytest
+import numpy as np
+
+from stock_pandas.backend import is_rust_available
+from stock_pandas.exceptions import DirectiveError
+from stock_pandas.math.sweep import calc_sweep
+
+from .common import get_tencent
+
+
+@pytest.fixture
+def stock():
+    return get_tencent()
+
+
+@pytest.mark.parametrize('directive_str,template', [
+    ('ma', 'ma:{}'),
+    ('boll.upper:20,3@open', 'boll.upper:{},3@open'),
+    ('ema', 'ema:{}'),
+    ('rsi', 'rsi:{}'),
+    ('hhv', 'hhv:{}'),
+    ('llv', 'llv:{}'),
+    ('macd.signal:,26,5', 'macd.signal:{},26,5'),
+    ('ma@(ema:5)', 'ma:{}@(ema:5)')
+])
+def test_sweep(stock, directive_str, template):
+    periods = [2, 3, 5, 20, 50]
+    columns = set(stock.columns)
+
+    result = stock.sweep(directive_str, periods)
+
+    assert result.shape == (len(stock), len(periods))
+    assert set(stock.columns) == columns
+
+    for i, period in enumerate(periods):
+        np.testing.assert_allclose(
+            result[:, i],
+            stock.exec(template.format(period)),
+            equal_nan=True
+        )
+
+
+def test_sweep_invalid(stock):
+    assert stock.sweep('ma', []).shape == (len(stock), 0)
+
+    with pytest.raises(DirectiveError):
+        stock.sweep('ma', [0])
+
+    with pytest.raises(ValueError, match='period'):
+        stock.sweep('ma', [5, 0])
+
+    with pytest.raises(ValueError, match='period argument'):
+        stock.sweep('ma:5 > ma:10', [5])
+
+    with pytest.raises(DirectiveError):
+        stock.sweep('close', [5])
+
+
+@pytest.mark.skipif(not is_rust_available(), reason='requires stock_pandas_rs')
+@pytest.mark.parametrize('kernel,args,template', [
+    ('ma', [], 'ma:{}'),
+    ('boll.lower', [2.], 'boll.lower:{},2'),
+    ('ema', [], 'ema:{}'),
+    ('rsi', [], 'rsi:{}'),
+    ('hhv', [], 'hhv:{}@close'),
+    ('llv', [], 'llv:{}@close')
+])
+def test_calc_sweep_native(stock, kernel, args, template):
+    array = stock['close'].to_numpy()
+    periods = [1, 2, 7, 30, len(array) + 1]
+
+    result = calc_sweep(kernel, array, periods, args)
+
+    for i, period in enumerate(periods):
+        np.testing.assert_allclose(
+            result[:, i],
+            stock.exec(template.format(period)),
+            equal_nan=True
+        )
@@ -1,14 +1,24 @@
 import pytest
 import numpy as np
 
+from functools import partial
 from typing import Union
-from pandas import Timestamp
+from pandas import (
+    DatetimeIndex,
+    Timestamp,
+    date_range
+)
 
 from stock_pandas import (
     StockDataFrame,
     TimeFrame,
     cumulators
 )
+from stock_pandas.meta.time_frame import (
+    define,
+    timeFrames,
+    unify_minute
+)
 
 from .common import (
     get_1m_tencent,
@@ -64,3 +74,55 @@ def test_redefine_time_frame():
 def test_time_frame_unify_second():
     date = Timestamp('2020-01-02 03:04:05')
     assert TimeFrame.s1.unify(date) == 20200102030405
+
+
+@pytest.mark.parametrize('tz', [None, 'Asia/Shanghai'])
+def test_time_frame_unify_many(tz):
+    rng = np.random.default_rng(1)
+    dates = DatetimeIndex(
+        # From 1900 to 2100, including the dates before 1970
+        rng.integers(-2208988800, 4102444800, 2000) * 1_000_000_000
+        + rng.integers(0, 1_000_000_000, 2000),
+        tz=tz
+    )
+
+    for name, time_frame in timeFrames.items():
+        expected = [time_frame.unify(date) for date in dates]
+        unified = time_frame.unify_many(dates)
+
+        assert unified.dtype == np.int64
+        assert unified.tolist() == expected, name
+
+    if tz is None:
+        # int64 nanoseconds
+        assert np.array_equal(
+            TimeFrame.m5.unify_many(dates.asi8),
+            TimeFrame.m5.unify_many(dates)
+        )
+
+
+def test_define_unify_many():
+    dates = date_range('2020-01-01', periods=100, freq='17min')
+
+    # Unifiers of attributes are vectorized
+    time_frame = define(
+        'm20', 'test-20m', partial(unify_minute, 20), 20
+    )
+
+    assert time_frame.unify_many(dates).tolist() == [
+        time_frame.unify(date) for date in dates
+    ]
+
+    # Other unifiers are applied to each timestamp
+    time_frame = define(
+        'weekday', 'test-weekday',
+        lambda date: date.year * 1000 + date.dayofyear - date.weekday(),
+        10080
+    )
+
+    assert time_frame.unify_many(dates).tolist() == [
+        time_frame.unify(date) for date in dates
+    ]
+
+    timeFrames.pop('test-20m')
+    timeFrames.pop('test-weekday')
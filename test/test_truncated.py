@@ -1,4 +1,5 @@
 from stock_pandas.dataframe import StockDataFrame
+from stock_pandas.meta.cumulator import _indexer
 import pytest
 import numpy as np
 
@@ -99,7 +100,7 @@ def test_invalid_slicing(stock: StockDataFrame):
         # we have to test about this case
         stock._slice({})  # type: ignore
 
-    assert stock._stock_indexer_slice is None
+    assert _indexer.get() is None
 
 
 def test_columns_manipulate(stock: StockDataFrame):